@@ -8,4 +8,8 @@ urlpatterns = [
     path('dashboard/stats/', admin_views.dashboard_stats, name='dashboard_stats'),
     path('payments/failures/', admin_views.payment_failures, name='payment_failures'),
     path('exams/issues/', admin_views.exam_issues, name='exam_issues'),
+    path('load-shedding/', admin_views.load_shedding_stats, name='load_shedding_stats'),
+    path('profiles/', admin_views.request_profiles, name='request_profiles'),
+    path('profiles/<str:profile_id>/', admin_views.request_profile, name='request_profile'),
+    path('memory/', admin_views.memory_diagnostics, name='memory_diagnostics'),
 ]
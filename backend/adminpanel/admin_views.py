@@ -5,6 +5,8 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
 from django.db.models import Count, Sum, Q
 from datetime import timedelta
@@ -13,6 +15,16 @@ from payments.models import Payment, Subscription, Plan
 from users.models import User, UserActivity
 from results.models import Attempt
 from exams.models import Exam
+from api.admission import exam_start_admission
+from core.load_shedding import load_shedder
+from core.memory import memory_tracker
+from core.profiling import profile_store
+from core.pagination import KeysetPagination, paginate
+
+
+class PaymentFailurePagination(KeysetPagination):
+    page_size = 50
+    page_size_query_param = 'limit'
 
 
 @api_view(['GET'])
@@ -25,18 +37,18 @@ def dashboard_stats(request):
     """
     now = timezone.now()
     
-    # Active users (last 24h, 7d, 30d)
-    active_24h = UserActivity.objects.filter(
-        created_at__gte=now - timedelta(hours=24)
-    ).values('user').distinct().count()
-    
-    active_7d = UserActivity.objects.filter(
-        created_at__gte=now - timedelta(days=7)
-    ).values('user').distinct().count()
-    
-    active_30d = UserActivity.objects.filter(
+    # Active users (last 24h, 7d, 30d) in a single range scan over
+    # the (created_at, user) index
+    active_users = UserActivity.objects.filter(
         created_at__gte=now - timedelta(days=30)
-    ).values('user').distinct().count()
+    ).aggregate(
+        active_24h=Count('user', distinct=True, filter=Q(created_at__gte=now - timedelta(hours=24))),
+        active_7d=Count('user', distinct=True, filter=Q(created_at__gte=now - timedelta(days=7))),
+        active_30d=Count('user', distinct=True),
+    )
+    active_24h = active_users['active_24h']
+    active_7d = active_users['active_7d']
+    active_30d = active_users['active_30d']
     
     # Payment statistics
     total_revenue = Payment.objects.filter(
@@ -118,18 +130,22 @@ def payment_failures(request):
     
     GET /api/admin/payments/failures/
     Query params:
-    - limit: Number of records (default: 50)
+    - limit: Records per page (default: 50, max: 100)
     - days: Number of days to look back (default: 7)
+    - cursor: From the previous page's next/previous link
     """
-    limit = int(request.GET.get('limit', 50))
     days = int(request.GET.get('days', 7))
     
     cutoff_date = timezone.now() - timedelta(days=days)
     
-    failed_payments = Payment.objects.filter(
-        status='failed',
-        created_at__gte=cutoff_date
-    ).select_related('user').order_by('-created_at')[:limit]
+    failed_payments, links = paginate(
+        request,
+        Payment.objects.filter(
+            status='failed',
+            created_at__gte=cutoff_date
+        ).select_related('user'),
+        pagination_class=PaymentFailurePagination,
+    )
     
     failures = []
     for payment in failed_payments:
@@ -154,6 +170,7 @@ def payment_failures(request):
         'failures': failures,
         'count': len(failures),
         'period_days': days,
+        **links,
     })
 
 
@@ -209,3 +226,119 @@ def exam_issues(request):
         'count': len(issues),
         'period_days': days,
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def load_shedding_stats(request):
+    """
+    Load shedding decisions
+    
+    GET /api/admin/load-shedding/
+    Returns shed totals across all workers and the counters of the worker
+    that served this request.
+    """
+    return Response({
+        'success': True,
+        'enabled': settings.LOAD_SHEDDING_ENABLED,
+        'shed_totals': load_shedder.shed_totals(),
+        'worker': load_shedder.stats(),
+        'exam_start_queue_length': exam_start_admission.queue_length(),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_profiles(request):
+    """
+    Stored request profiles, newest first (see core/profiling.py)
+    
+    GET /api/admin/profiles/
+    Query params:
+    - limit: Number of profiles (default: 50, max: 200)
+    """
+    try:
+        limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+    except ValueError:
+        limit = 50
+    
+    try:
+        profiles = profile_store.recent(limit)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': f'Profiles unavailable: {str(e)}'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    return Response({
+        'success': True,
+        'enabled': settings.PROFILING_ENABLED,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'profiles': profiles,
+        'count': len(profiles),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_profile(request, profile_id):
+    """
+    One request profile: top functions, collapsed stacks and the SQL / Redis log
+    
+    GET /api/admin/profiles/<profile_id>/
+    GET /api/admin/profiles/<profile_id>/?download=collapsed
+        Collapsed stacks as text, for flamegraph.pl or speedscope.app
+    """
+    try:
+        profile = profile_store.get(profile_id)
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': f'Profiles unavailable: {str(e)}'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    if profile is None:
+        return Response({
+            'success': False,
+            'error': 'Profile not found or expired'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.query_params.get('download') == 'collapsed':
+        response = HttpResponse(profile['collapsed'], content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.txt"'
+        return response
+    
+    return Response({'success': True, 'profile': profile})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def memory_diagnostics(request):
+    """
+    Memory growth of every worker (see core/memory.py)
+    
+    GET /api/admin/memory/
+    Returns each live worker's last published report (RSS growth, growth by
+    endpoint and, with tracemalloc on, the allocation sites that grew most)
+    and a fresh report of the worker that served this request.
+    """
+    if not settings.MEMORY_DIAGNOSTICS_ENABLED:
+        return Response({'success': True, 'enabled': False, 'workers': []})
+    
+    memory_tracker.ensure_started()
+    try:
+        workers = memory_tracker.worker_reports()
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': f'Memory reports unavailable: {str(e)}'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    return Response({
+        'success': True,
+        'enabled': True,
+        'snapshot_interval_seconds': settings.MEMORY_SNAPSHOT_INTERVAL_SECONDS,
+        'tracemalloc_frames': settings.MEMORY_TRACEMALLOC_FRAMES,
+        'this_worker': memory_tracker.report(),
+        'workers': workers,
+    })
@@ -0,0 +1,227 @@
+"""
+Admission control (virtual waiting room) for exam starts.
+
+When a live mock opens, every student calls the start endpoint in the same
+minute. Starting an exam takes a transaction, several queries and a timer
+write, so letting all of them through at once saturates MySQL and every
+request times out together. Instead, starts are admitted through a Redis
+token bucket sized to measured capacity (EXAM_ADMISSION_RATE per second,
+bursts of EXAM_ADMISSION_BURST). Clients over the limit get 202 with their
+queue position and an ETA, and retry after Retry-After seconds.
+
+The queue is strict FIFO: a client is only admitted when there are enough
+tokens for everyone ahead of it, so a lucky retry can't overtake a client
+that has waited longer. Clients that stop polling for
+EXAM_ADMISSION_QUEUE_TIMEOUT_SECONDS lose their place.
+
+No attempt or timer exists until admission, so queued students don't lose
+exam time. Students resuming an attempt that is already running skip the
+queue. If Redis is unavailable, requests are admitted.
+
+The exam_start rate (ExamStartRateThrottle) is applied only once a request
+is admitted, so waiting-room polls don't use it up: a student queued for a
+minute polls at least six times, more than the rate allows.
+"""
+import logging
+import math
+from collections import namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpRequest
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.throttling import ExamStartRateThrottle
+
+logger = logging.getLogger(__name__)
+
+Admission = namedtuple('Admission', ['admitted', 'position', 'eta_seconds'])
+
+# KEYS[1] = bucket hash {tokens, ts}
+# KEYS[2] = queue zset (member -> ticket number)
+# KEYS[3] = last-seen zset (member -> last poll, ms)
+# KEYS[4] = ticket counter
+# ARGV[1] = member, ARGV[2] = rate (tokens/s), ARGV[3] = burst
+# ARGV[4] = queue timeout (ms)
+# Returns {admitted, position, eta_ms}
+ADMIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local member = ARGV[1]
+local rate = tonumber(ARGV[2]) / 1000
+local burst = tonumber(ARGV[3])
+local timeout = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if not tokens then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+-- Drop clients that stopped polling so they don't hold up the queue
+local stale = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now - timeout, 'LIMIT', 0, 100)
+if #stale > 0 then
+    redis.call('ZREM', KEYS[2], unpack(stale))
+    redis.call('ZREM', KEYS[3], unpack(stale))
+end
+
+local rank = redis.call('ZRANK', KEYS[2], member)
+local queued = rank ~= false
+if not queued then
+    rank = redis.call('ZCARD', KEYS[2])
+end
+
+-- Tokens are reserved for everyone ahead in the queue
+local admitted = 0
+if rank < math.floor(tokens) then
+    tokens = tokens - 1
+    admitted = 1
+    if queued then
+        redis.call('ZREM', KEYS[2], member)
+        redis.call('ZREM', KEYS[3], member)
+    end
+else
+    if not queued then
+        redis.call('ZADD', KEYS[2], redis.call('INCR', KEYS[4]), member)
+    end
+    redis.call('ZADD', KEYS[3], now, member)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate) + 1000)
+for i = 2, 4 do
+    redis.call('PEXPIRE', KEYS[i], timeout * 2)
+end
+
+if admitted == 1 then
+    return {1, 0, 0}
+end
+return {0, rank + 1, math.ceil((rank + 1 - tokens) / rate)}
+"""
+
+
+class AdmissionController:
+    """FIFO token-bucket admission shared by all workers through Redis"""
+
+    def __init__(self, name):
+        self.name = name
+        self._redis = None
+        self._script = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    def _keys(self):
+        prefix = f"admission:{self.name}"
+        return [f"{prefix}:bucket", f"{prefix}:queue", f"{prefix}:seen", f"{prefix}:seq"]
+
+    def admit(self, member):
+        """
+        Try to admit member (e.g. a user id) now.
+
+        Returns:
+            Admission: admitted flag, 1-based queue position and ETA in seconds
+        """
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(ADMIT_SCRIPT)
+            admitted, position, eta_ms = self._script(
+                keys=self._keys(),
+                args=[
+                    str(member),
+                    settings.EXAM_ADMISSION_RATE,
+                    settings.EXAM_ADMISSION_BURST,
+                    settings.EXAM_ADMISSION_QUEUE_TIMEOUT_SECONDS * 1000,
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"Admission control unavailable, admitting {member}: {str(e)}")
+            return Admission(True, 0, 0)
+
+        return Admission(bool(int(admitted)), int(position), math.ceil(int(eta_ms) / 1000))
+
+    def queue_length(self):
+        """Number of clients currently waiting"""
+        try:
+            return self.redis.zcard(self._keys()[1])
+        except Exception as e:
+            logger.warning(f"Failed to read admission queue length: {str(e)}")
+            return 0
+
+
+exam_start_admission = AdmissionController('exam_start')
+
+
+def _has_running_attempt(request, exam_id):
+    from results.models import Attempt
+
+    try:
+        exam_id = int(exam_id)
+    except (TypeError, ValueError):
+        return False
+    return Attempt.objects.filter(user=request.user, exam_id=exam_id, status='in_progress').exists()
+
+
+def queued_response(admission):
+    """202 telling the client its place in the queue and when to retry"""
+    # Poll at least a few times per timeout window so the place isn't lost
+    max_poll = max(1, settings.EXAM_ADMISSION_QUEUE_TIMEOUT_SECONDS // 3)
+    retry_after = min(max(1, admission.eta_seconds), max_poll)
+    response = Response(
+        {
+            "status": "queued",
+            "position": admission.position,
+            "eta_seconds": admission.eta_seconds,
+            "retry_after": retry_after,
+            "message": "Many students are starting exams right now. You are in the queue; "
+                       "your exam timer starts only once you are admitted.",
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _check_exam_start_rate(request, view):
+    """Raise Throttled (429) if the user is over the exam_start rate"""
+    throttle = ExamStartRateThrottle()
+    if not throttle.allow_request(request, view):
+        raise Throttled(throttle.wait())
+
+
+def admission_required(view_func):
+    """
+    Gate an exam-start view (function or method) behind exam_start_admission,
+    then apply ExamStartRateThrottle to admitted requests.
+
+    The exam id is read from the exam_id URL kwarg or request body. Apply
+    outside @idempotent so queued responses are never stored for replay, and
+    leave ExamStartRateThrottle out of the view's throttle_classes.
+    """
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        if isinstance(args[0], (Request, HttpRequest)):
+            view, request = None, args[0]
+        else:
+            view, request = args[0], args[1]
+
+        if settings.EXAM_ADMISSION_ENABLED:
+            exam_id = kwargs.get('exam_id') or request.data.get('exam_id')
+            if not _has_running_attempt(request, exam_id):
+                admission = exam_start_admission.admit(request.user.id)
+                if not admission.admitted:
+                    return queued_response(admission)
+
+        _check_exam_start_rate(request, view)
+        return view_func(*args, **kwargs)
+    return wrapper
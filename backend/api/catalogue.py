@@ -0,0 +1,147 @@
+"""
+Cached content catalogues (notes, PYQs, videos, announcements).
+
+Each catalogue is built once, pre-grouped, and stored in Redis under a
+version stamp (utils.cache.get_cache_version). Saving or deleting a row in
+the admin bumps the version (see exams/signals.py), so the next request
+rebuilds it. Workers also keep them in memory (core/local_cache.py).
+Per-user access flags are not cached: they are overlaid on the shared
+payload using the user's tier, resolved once per request.
+
+Responses carry an ETag derived from the catalogue version and the user's
+tier, so clients that send If-None-Match get a 304 without a body.
+"""
+from rest_framework.response import Response
+
+from core.conditional import make_etag, not_modified_response, set_validators
+from core.local_cache import local_cache
+from exams.models import Note, PYQ, VideoSolution, Announcement
+from utils.cache import get_cache_version
+
+CATALOGUE_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _group(rows, group_key, item):
+    groups = {}
+    for row in rows:
+        groups.setdefault(group_key(row), []).append(item(row))
+    return groups
+
+
+def build_notes_catalogue():
+    """Active notes grouped by subject"""
+    return _group(
+        Note.objects.filter(is_active=True),
+        lambda note: note.subject,
+        lambda note: {
+            'id': note.id,
+            'topic': note.topic,
+            'description': note.description,
+            'access_tier': note.access_tier,
+        },
+    )
+
+
+def build_pyqs_catalogue():
+    """Active PYQs grouped by year"""
+    return _group(
+        PYQ.objects.filter(is_active=True),
+        lambda pyq: str(pyq.year),
+        lambda pyq: {
+            'id': pyq.id,
+            'exam_name': pyq.exam_name,
+            'description': pyq.description,
+            'access_tier': pyq.access_tier,
+        },
+    )
+
+
+def build_videos_catalogue():
+    """Active video solutions grouped by topic"""
+    return _group(
+        VideoSolution.objects.filter(is_active=True),
+        lambda video: video.topic,
+        lambda video: {
+            'id': video.id,
+            'title': video.title,
+            'description': video.description,
+            'youtube_url': video.youtube_url,
+            'duration_minutes': video.duration_minutes,
+        },
+    )
+
+
+def build_announcements_catalogue():
+    """Active announcements, newest first"""
+    return [
+        {
+            'id': announcement.id,
+            'title': announcement.title,
+            'message': announcement.message,
+            'type': announcement.announcement_type,
+            'created_at': announcement.created_at.strftime('%B %d, %Y'),
+        }
+        for announcement in Announcement.objects.filter(is_active=True)
+    ]
+
+
+# Catalogue name -> (builder, models whose changes invalidate it)
+CATALOGUES = {
+    'notes': (build_notes_catalogue, [Note]),
+    'pyqs': (build_pyqs_catalogue, [PYQ]),
+    'videos': (build_videos_catalogue, [VideoSolution]),
+    'announcements': (build_announcements_catalogue, [Announcement]),
+}
+
+
+def catalogue_namespace(name):
+    return f"catalogue:{name}"
+
+
+def get_catalogue(name):
+    """
+    Return (version, payload) for a catalogue, building it on a cache miss.
+    """
+    builder, _ = CATALOGUES[name]
+    version = get_cache_version(catalogue_namespace(name))
+    cache_key = f"apollo11:catalogue:{name}:v{version}"
+
+    payload = local_cache.get(cache_key)
+    if payload is None:
+        payload = builder()
+        local_cache.set(cache_key, payload, CATALOGUE_CACHE_TIMEOUT)
+    return version, payload
+
+
+def with_access_flags(groups, has_pro):
+    """Overlay can_access/is_locked on a grouped catalogue for one user"""
+    overlaid = {}
+    for group, items in groups.items():
+        overlaid[group] = []
+        for item in items:
+            can_access = item['access_tier'] != 'PRO' or has_pro
+            overlaid[group].append({**item, 'can_access': can_access, 'is_locked': not can_access})
+    return overlaid
+
+
+def catalogue_response(request, name, render, variant=''):
+    """
+    Serve a catalogue with ETag / If-None-Match support.
+
+    Args:
+        request: Current request
+        name (str): Key of CATALOGUES
+        render (callable): Turns the cached payload into the response body
+        variant (str): Anything else the body depends on (e.g. user tier)
+
+    Returns:
+        Response (200) or HttpResponseNotModified (304)
+    """
+    version, payload = get_catalogue(name)
+    etag = make_etag(name, version, variant)
+
+    not_modified = not_modified_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    return set_validators(Response(render(payload)), etag=etag)
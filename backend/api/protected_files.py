@@ -0,0 +1,108 @@
+"""
+Protected PDF delivery for notes and PYQs.
+
+The views only decide whether the user may read a file. With
+PROTECTED_FILES_USE_X_ACCEL enabled the response is an empty
+X-Accel-Redirect to an `internal` nginx location, and nginx streams the file
+itself (sendfile, Range requests, ETag/Last-Modified and If-None-Match).
+Without it (local development) the file is streamed by Django as before.
+
+PDF viewers fetch large files as many small Range requests, so each
+granted entitlement is cached per user and file for
+PROTECTED_FILES_ACCESS_CACHE_SECONDS; repeat requests cost one cache read.
+Refusals are not cached, so a student who has just bought PRO can open the
+file straight away.
+"""
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+# Directory (relative to BASE_DIR) and nginx location name for each kind
+PROTECTED_ROOTS = {
+    'notes': 'notes',
+    'pyq': 'pyq',
+}
+
+# Returned by get_file_entitlement() when the object is missing or inactive
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+
+
+def resolve_protected_path(kind, relative_path):
+    """
+    Resolve a stored file_path against its protected root.
+
+    Returns:
+        str: Absolute path, or None if it escapes the root directory
+    """
+    root = os.path.realpath(os.path.join(settings.BASE_DIR, PROTECTED_ROOTS[kind]))
+    full_path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, full_path]) != root:
+        return None
+    return full_path
+
+
+def _entitlement_cache_key(kind, object_id, user_id):
+    return f"download_access:{kind}:{object_id}:{user_id}"
+
+
+def get_file_entitlement(user, kind, object_id, loader):
+    """
+    Decide whether user may download a protected file (cached if allowed).
+
+    Args:
+        user: Authenticated user
+        kind (str): Key of PROTECTED_ROOTS
+        object_id (int): Note/PYQ primary key
+        loader (callable): Returns the active object for object_id or None
+
+    Returns:
+        dict with 'file_path' and 'filename', or NOT_FOUND / FORBIDDEN
+    """
+    cache_key = _entitlement_cache_key(kind, object_id, user.id)
+    entitlement = cache.get(cache_key)
+    if entitlement is not None:
+        return entitlement
+
+    obj = loader(object_id)
+    if obj is None:
+        entitlement = NOT_FOUND
+    elif not user.has_tier_access(obj.access_tier):
+        entitlement = FORBIDDEN
+    else:
+        entitlement = {'file_path': obj.file_path, 'filename': obj.download_filename}
+        cache.set(cache_key, entitlement, settings.PROTECTED_FILES_ACCESS_CACHE_SECONDS)
+    return entitlement
+
+
+def protected_file_response(kind, relative_path, filename):
+    """
+    Build the response that delivers a protected PDF.
+
+    Returns:
+        HttpResponse, or None if the file does not exist
+    """
+    full_path = resolve_protected_path(kind, relative_path)
+    if full_path is None or not os.path.isfile(full_path):
+        return None
+
+    if settings.PROTECTED_FILES_USE_X_ACCEL:
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = (
+            f"{settings.PROTECTED_FILES_INTERNAL_PREFIX}{PROTECTED_ROOTS[kind]}/"
+            f"{quote(os.path.relpath(full_path, resolve_protected_path(kind, '')))}"
+        )
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+        return response
+
+    # Serve file directly (development)
+    return FileResponse(
+        open(full_path, 'rb'),
+        content_type='application/pdf',
+        as_attachment=False,  # Display inline, not download
+        filename=filename
+    )
@@ -18,8 +18,15 @@ class RedisTimerManager:
     """Manages exam timers in Redis with automatic expiration."""
     
     def __init__(self):
-        """Initialize Redis connection."""
-        self.redis = get_redis_connection("default")
+        # Connected on first use, so importing this module (in the gunicorn
+        # master, before workers fork) opens nothing
+        self._redis = None
+    
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
     
     @staticmethod
     def _get_key(attempt_id: int) -> str:
@@ -3,6 +3,7 @@ from exams.models import Exam
 from results.models import Attempt
 from exams.serializers import ExamListSerializer
 from results.serializers import AttemptSerializer
+from core.pagination import AttemptKeysetPagination
 
 class ExamListView(generics.ListAPIView):
     queryset = Exam.objects.filter(is_published=True)
@@ -12,6 +13,9 @@ class ExamListView(generics.ListAPIView):
 class UserAttemptListView(generics.ListAPIView):
     serializer_class = AttemptSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AttemptKeysetPagination
 
     def get_queryset(self):
-        return Attempt.objects.filter(user=self.request.user)
+        return Attempt.objects.filter(user=self.request.user).select_related(
+            'user', 'exam'
+        ).with_answer_counts()
@@ -7,10 +7,14 @@ from exams.models import Exam, Question
 from results.models import Attempt, AttemptAnswer
 from exams.serializers import ExamSerializer
 from results.serializers import AttemptSerializer
+from .admission import admission_required
 
 class StartExamView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    # ExamStartRateThrottle is applied by @admission_required once admitted
+    throttle_classes = []
 
+    @admission_required
     def post(self, request, exam_id):
         try:
             exam = Exam.objects.get(id=exam_id)
@@ -16,12 +16,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db import transaction, models
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
+from exams.exam_cache import get_answer_key, get_exam_questions
 from exams.models import Exam, Question
 from exams.serializers import QuestionResponseSerializer
 from results.models import Attempt, AttemptAnswer
+from results.scoring import score_answers
+from core.idempotency import idempotent
+from .admission import admission_required
 from .redis_utils import timer_manager
 from .serializers import SubmitAnswerSerializer
 
@@ -30,6 +34,22 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def normalize_question_keys(questions):
+    """
+    Rename Question.values() keys to the names the frontend expects
+    ('text', 'section_name', 'section_order'), in place. Rows that are
+    already renamed are left alone.
+    """
+    for q in questions:
+        if 'question_text' in q and 'text' not in q:
+            q['text'] = q.pop('question_text')
+        if 'section__name' in q and 'section_name' not in q:
+            q['section_name'] = q.pop('section__name')
+        if 'section__order' in q and 'section_order' not in q:
+            q['section_order'] = q.pop('section__order')
+    return questions
+
+
 class StartExamView(APIView):
     """
     Start an exam and create Redis timer.
@@ -57,6 +77,14 @@ class StartExamView(APIView):
         "total_marks": 100
     }
     
+    Response (Queued, see api/admission.py):
+    {
+        "status": "queued",
+        "position": 120,
+        "eta_seconds": 6,
+        "retry_after": 6
+    }
+    
     Error Responses:
     - 400: Exam not published / Already have ongoing attempt
     - 404: Exam not found
@@ -64,7 +92,11 @@ class StartExamView(APIView):
     """
     
     permission_classes = [IsAuthenticated]
+    # ExamStartRateThrottle is applied by @admission_required once admitted
+    throttle_classes = []
     
+    @admission_required
+    @idempotent('exam_start')
     def post(self, request, exam_id):
         """Start a new exam attempt with Redis timer."""
         
@@ -77,56 +109,49 @@ class StartExamView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check for existing ongoing attempt
-        existing_attempt = Attempt.objects.filter(
-            user=request.user,
-            exam=exam,
-            status='in_progress'
-        ).first()
-        
-        if existing_attempt:
-            # Check if timer still exists in Redis
-            remaining = timer_manager.get_remaining_time(existing_attempt.id)
-            
-            if remaining > 0:
-                # Timer still running, return existing attempt
-                return Response(
-                    {
-                        "attempt_id": existing_attempt.id,
-                        "exam_id": exam.id,
-                        "exam_title": f"{exam.name} {exam.year}",
-                        "duration_minutes": exam.duration_minutes,
-                        "remaining_seconds": remaining,
-                        "total_questions": Question.objects.filter(section__exam=exam).count(),
-                        "total_marks": exam.total_marks,
-                        "message": "Resuming existing exam attempt"
-                    },
-                    status=status.HTTP_200_OK
-                )
-            else:
-                # Timer expired, mark as timeout and allow new attempt
-                existing_attempt.status = 'timeout'
-                existing_attempt.completed_at = timezone.now()
-                existing_attempt.save()
-                logger.info(f"Marked expired attempt {existing_attempt.id} as timeout, allowing new attempt")
-                # Continue to create new attempt below
-        
-        
-        # Create new attempt in MySQL
         try:
             with transaction.atomic():
-                # Calculate attempt number (get max attempt number for this user-exam combo)
-                max_attempt = Attempt.objects.filter(
-                    user=request.user,
-                    exam=exam
-                ).aggregate(models.Max('attempt_number'))['attempt_number__max']
-                
-                next_attempt_number = (max_attempt or 0) + 1
+                # Lock the user's attempts so concurrent starts can't both
+                # miss the ongoing attempt or pick the same attempt number
+                user_attempts = Attempt.objects.lock_user(request.user)
                 
-                attempt = Attempt.objects.create(
-                    user=request.user,
+                # Check for existing ongoing attempt
+                existing_attempt = user_attempts.filter(
                     exam=exam,
-                    attempt_number=next_attempt_number,
+                    status='in_progress'
+                ).first()
+                
+                if existing_attempt:
+                    # Check if timer still exists in Redis
+                    remaining = timer_manager.get_remaining_time(existing_attempt.id)
+                    
+                    if remaining > 0:
+                        # Timer still running, return existing attempt
+                        return Response(
+                            {
+                                "attempt_id": existing_attempt.id,
+                                "exam_id": exam.id,
+                                "exam_title": f"{exam.name} {exam.year}",
+                                "duration_minutes": exam.duration_minutes,
+                                "remaining_seconds": remaining,
+                                "total_questions": len(get_answer_key(exam.id)),
+                                "total_marks": exam.total_marks,
+                                "message": "Resuming existing exam attempt"
+                            },
+                            status=status.HTTP_200_OK
+                        )
+                    else:
+                        # Timer expired, mark as timeout and allow new attempt
+                        existing_attempt.status = 'timeout'
+                        existing_attempt.finished_at = timezone.now()
+                        existing_attempt.save()
+                        logger.info(f"Marked expired attempt {existing_attempt.id} as timeout, allowing new attempt")
+                        # Continue to create new attempt below
+                
+                # Create new attempt in MySQL with the next attempt number
+                attempt = Attempt.objects.create_next(
+                    request.user,
+                    exam,
                     status='in_progress'
                 )
                 
@@ -158,7 +183,7 @@ class StartExamView(APIView):
                         "exam_title": f"{exam.name} {exam.year}",
                         "duration_minutes": exam.duration_minutes,
                         "remaining_seconds": duration_seconds,
-                        "total_questions": Question.objects.filter(section__exam=exam).count(),
+                        "total_questions": len(get_answer_key(exam.id)),
                         "total_marks": exam.total_marks,
                     },
                     status=status.HTTP_201_CREATED
@@ -312,6 +337,7 @@ class SubmitAnswerView(APIView):
     
     permission_classes = [IsAuthenticated]
     
+    @idempotent('exam_answer')
     def post(self, request):
         """Submit an answer to a question."""
         
@@ -358,10 +384,13 @@ class SubmitAnswerView(APIView):
                 status=status.HTTP_410_GONE
             )
         
-        # Validate question belongs to this exam
-        question = get_object_or_404(Question, id=question_id)
-        
-        if question.section.exam_id != attempt.exam_id:
+        # Validate question belongs to this exam (cached answer key, no query)
+        if question_id not in get_answer_key(attempt.exam_id):
+            if not Question.objects.filter(id=question_id).exists():
+                return Response(
+                    {"error": "Question not found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(
                 {"error": "This question does not belong to this exam."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -371,7 +400,7 @@ class SubmitAnswerView(APIView):
         try:
             answer, created = AttemptAnswer.objects.update_or_create(
                 attempt=attempt,
-                question=question,
+                question_id=question_id,
                 defaults={
                     'selected_option': selected_option,
                 }
@@ -432,6 +461,7 @@ class SubmitExamView(APIView):
     
     permission_classes = [IsAuthenticated]
     
+    @idempotent('exam_submit')
     def post(self, request, attempt_id):
         """Submit exam and calculate score."""
         
@@ -474,17 +504,25 @@ class SubmitExamView(APIView):
         # Calculate score
         try:
             with transaction.atomic():
-                score = 0
-                correct_count = 0
-                total_questions = Question.objects.filter(section__exam=attempt.exam).count()
+                # Lock the attempt so a concurrent submit waits, then sees it submitted
+                attempt = Attempt.objects.select_for_update().select_related('exam').get(pk=attempt.pk)
+                if attempt.status == 'submitted':
+                    return Response(
+                        {
+                            "status": "already_completed",
+                            "score": attempt.score or 0,
+                            "total_marks": attempt.exam.total_marks,
+                            "percentage": round((attempt.score or 0) / attempt.exam.total_marks * 100, 2) if attempt.exam.total_marks > 0 else 0,
+                            "message": "Exam was already submitted"
+                        },
+                        status=status.HTTP_200_OK
+                    )
+                
+                total_questions = len(get_answer_key(attempt.exam_id))
                 
                 # Get all answers for this attempt
                 answers = AttemptAnswer.objects.filter(attempt=attempt).select_related('question')
-                
-                for answer in answers:
-                    if answer.is_correct:
-                        score += answer.question.marks
-                        correct_count += 1
+                score, correct_count = score_answers(answers)
                 
                 # Calculate time taken
                 time_taken = None
@@ -565,8 +603,6 @@ class GetExamQuestionsView(APIView):
     
     def get(self, request, attempt_id):
         """Get all questions for exam attempt with Redis caching."""
-        from django.core.cache import cache
-        
         # Get attempt with exam in one query (optimization)
         attempt = get_object_or_404(
             Attempt.objects.select_related('exam'), 
@@ -592,46 +628,11 @@ class GetExamQuestionsView(APIView):
                     status=status.HTTP_410_GONE
                 )
         
-        # Try to get questions from Redis cache first
-        exam_id = attempt.exam.id
-        cache_key = f'exam_{exam_id}_questions'
-        questions_data = cache.get(cache_key)
-        
-        if not questions_data:
-            # Cache miss - fetch from database with optimizations
-            logger.info(f"Cache miss for exam {exam_id}, fetching from DB")
-            
-            # Optimized query: select_related to avoid N+1, values() for speed
-            questions_data = list(
-                Question.objects.filter(section__exam=attempt.exam)
-                .select_related('section')
-                .values(
-                    'id', 'question_text', 'option_a', 'option_b',
-                    'option_c', 'option_d', 'marks', 'question_number',
-                    'section__name', 'section__order', 'diagram_url'
-                )
-                .order_by('section__order', 'question_number')
-            )
-            
-            # Rename fields for frontend compatibility
-            for q in questions_data:
-                q['text'] = q.pop('question_text')  # Frontend expects 'text'
-                q['section_name'] = q.pop('section__name')
-                q['section_order'] = q.pop('section__order')
-            
-            # Cache for 1 hour (questions rarely change)
-            cache.set(cache_key, questions_data, 3600)
-            logger.info(f"Cached {len(questions_data)} questions for exam {exam_id}")
-        else:
-            logger.info(f"Cache hit for exam {exam_id}, serving from Redis")
-            # Also rename fields from cache (in case cache has old format)
-            for q in questions_data:
-                if 'question_text' in q and 'text' not in q:
-                    q['text'] = q.pop('question_text')
-                if 'section__name' in q and 'section_name' not in q:
-                    q['section_name'] = q.pop('section__name')
-                if 'section__order' in q and 'section_order' not in q:
-                    q['section_order'] = q.pop('section__order')
+        # Questions are cached per exam (see exams/exam_cache.py); copied
+        # before renaming keys so the cached rows are left as they are
+        questions_data = normalize_question_keys(
+            [dict(question) for question in get_exam_questions(attempt.exam_id)]
+        )
         
         # Get user's saved answers (optimized with values_list)
         saved_answers = dict(
@@ -1,68 +1,45 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.http import FileResponse
-from django.conf import settings
 from exams.models import Note
-import os
+from .catalogue import catalogue_response, with_access_flags
+from .protected_files import (
+    get_file_entitlement, protected_file_response, NOT_FOUND, FORBIDDEN
+)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_notes(request):
-    """List all available notes grouped by subject"""
-    notes = Note.objects.filter(is_active=True)
-    
-    # Group by subject
-    subjects = {}
-    for note in notes:
-        if note.subject not in subjects:
-            subjects[note.subject] = []
-        
-        # Check access (for future PRO implementation)
-        can_access = True
-        if note.access_tier == 'PRO':
-            # Check if user has PRO access
-            can_access = request.user.profile.is_pro if hasattr(request.user, 'profile') else False
-            
-        subjects[note.subject].append({
-            'id': note.id,
-            'topic': note.topic,
-            'description': note.description,
-            'access_tier': note.access_tier,
-            'can_access': can_access,
-            'is_locked': not can_access,
-        })
-    
-    return Response({'subjects': subjects})
+    """List all available notes grouped by subject (cached, see api/catalogue.py)"""
+    # Resolve the user's tier once rather than per note
+    has_pro = request.user.is_pro()
+
+    return catalogue_response(
+        request, 'notes',
+        lambda subjects: {'subjects': with_access_flags(subjects, has_pro)},
+        variant='PRO' if has_pro else 'FREE',
+    )
+
+
+def _load_note(note_id):
+    return Note.objects.filter(id=note_id, is_active=True).first()
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def serve_note(request, note_id):
-    """Serve PDF file with access control"""
-    try:
-        note = Note.objects.get(id=note_id, is_active=True)
-    except Note.DoesNotExist:
+    """Serve PDF file with access control (streamed by nginx in production)"""
+    entitlement = get_file_entitlement(request.user, 'notes', note_id, _load_note)
+
+    if entitlement == NOT_FOUND:
         return Response({'error': 'Note not found'}, status=404)
-    
+
     # Check access tier
-    if note.access_tier == 'PRO':
-        has_pro = request.user.profile.is_pro if hasattr(request.user, 'profile') else False
-        if not has_pro:
-            return Response({'error': 'PRO membership required'}, status=403)
-    
-    # Build file path
-    notes_root = os.path.join(settings.BASE_DIR, 'notes')
-    file_path = os.path.join(notes_root, note.file_path)
-    
-    if not os.path.exists(file_path):
-        return Response({'error': f'File not found on server: {file_path}'}, status=404)
-    
-    # Serve file directly (development)
-    return FileResponse(
-        open(file_path, 'rb'),
-        content_type='application/pdf',
-        as_attachment=False,  # Display inline, not download
-        filename=f"{note.topic}.pdf"
-    )
+    if entitlement == FORBIDDEN:
+        return Response({'error': 'PRO membership required'}, status=403)
+
+    response = protected_file_response('notes', entitlement['file_path'], entitlement['filename'])
+    if response is None:
+        return Response({'error': 'File not found on server'}, status=404)
+    return response
@@ -1,69 +1,45 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.http import FileResponse
-from django.conf import settings
 from exams.models import PYQ
-import os
+from .catalogue import catalogue_response, with_access_flags
+from .protected_files import (
+    get_file_entitlement, protected_file_response, NOT_FOUND, FORBIDDEN
+)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_pyqs(request):
-    """List all available PYQs grouped by year"""
-    pyqs = PYQ.objects.filter(is_active=True)
-    
-    # Group by year
-    years = {}
-    for pyq in pyqs:
-        year_str = str(pyq.year)
-        if year_str not in years:
-            years[year_str] = []
-        
-        # Check access (for future PRO implementation)
-        can_access = True
-        if pyq.access_tier == 'PRO':
-            # Check if user has PRO access
-            can_access = request.user.profile.is_pro if hasattr(request.user, 'profile') else False
-            
-        years[year_str].append({
-            'id': pyq.id,
-            'exam_name': pyq.exam_name,
-            'description': pyq.description,
-            'access_tier': pyq.access_tier,
-            'can_access': can_access,
-            'is_locked': not can_access,
-        })
-    
-    return Response({'years': years})
+    """List all available PYQs grouped by year (cached, see api/catalogue.py)"""
+    # Resolve the user's tier once rather than per PYQ
+    has_pro = request.user.is_pro()
+
+    return catalogue_response(
+        request, 'pyqs',
+        lambda years: {'years': with_access_flags(years, has_pro)},
+        variant='PRO' if has_pro else 'FREE',
+    )
+
+
+def _load_pyq(pyq_id):
+    return PYQ.objects.filter(id=pyq_id, is_active=True).first()
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def serve_pyq(request, pyq_id):
-    """Serve PYQ PDF file with access control"""
-    try:
-        pyq = PYQ.objects.get(id=pyq_id, is_active=True)
-    except PYQ.DoesNotExist:
+    """Serve PYQ PDF file with access control (streamed by nginx in production)"""
+    entitlement = get_file_entitlement(request.user, 'pyq', pyq_id, _load_pyq)
+
+    if entitlement == NOT_FOUND:
         return Response({'error': 'PYQ not found'}, status=404)
-    
+
     # Check access tier
-    if pyq.access_tier == 'PRO':
-        has_pro = request.user.profile.is_pro if hasattr(request.user, 'profile') else False
-        if not has_pro:
-            return Response({'error': 'PRO membership required'}, status=403)
-    
-    # Build file path
-    pyqs_root = os.path.join(settings.BASE_DIR, 'pyq')
-    file_path = os.path.join(pyqs_root, pyq.file_path)
-    
-    if not os.path.exists(file_path):
-        return Response({'error': f'File not found on server: {file_path}'}, status=404)
-    
-    # Serve file directly (development)
-    return FileResponse(
-        open(file_path, 'rb'),
-        content_type='application/pdf',
-        as_attachment=False,  # Display inline, not download
-        filename=f"{pyq.exam_name}_{pyq.year}.pdf"
-    )
+    if entitlement == FORBIDDEN:
+        return Response({'error': 'PRO membership required'}, status=403)
+
+    response = protected_file_response('pyq', entitlement['file_path'], entitlement['filename'])
+    if response is None:
+        return Response({'error': 'File not found on server'}, status=404)
+    return response
@@ -7,13 +7,40 @@ from django.db.models import Count, Q, Avg
 from datetime import datetime
 
 from results.models import Attempt, AttemptAnswer
-from exams.models import Exam, Section, Question
+from results.scoring import build_results_payload
+from exams.models import Exam, Section
+from exams.signals import exam_namespace
+from core.conditional import conditional_response, make_etag
+from utils.cache import get_cache_version
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _finished_attempt(request, attempt_id):
+    """(exam_id, finished_at) of the user's finished attempt, or None"""
+    return (
+        Attempt.objects.filter(id=attempt_id, user=request.user)
+        .exclude(status='in_progress')
+        .values_list('exam_id', 'finished_at')
+        .first()
+    )
+
+
+def _results_etag(view, request, attempt_id):
+    """Finished attempts never change; only edits to the exam's questions do"""
+    attempt = _finished_attempt(request, attempt_id)
+    if attempt is None:
+        return None
+    exam_id, finished_at = attempt
+    return make_etag(
+        'results', attempt_id,
+        finished_at.timestamp() if finished_at else '',
+        get_cache_version(exam_namespace(exam_id)),
+    )
+
+
 class AttemptResultsView(APIView):
     """
     Get detailed results for a completed exam attempt.
@@ -29,6 +56,7 @@ class AttemptResultsView(APIView):
     
     permission_classes = [IsAuthenticated]
     
+    @conditional_response(etag_func=_results_etag)
     def get(self, request, attempt_id):
         """Get detailed results for an attempt."""
         
@@ -50,94 +78,15 @@ class AttemptResultsView(APIView):
         
         exam = attempt.exam
         
-        # Get all answers with optimized query (select_related to avoid N+1)
-        answers = AttemptAnswer.objects.filter(attempt=attempt).select_related(
-            'question', 'question__section'
+        # All answers in review order, with questions and sections in one query
+        answers = list(
+            AttemptAnswer.objects.filter(attempt=attempt)
+            .select_related('question', 'question__section')
+            .order_by('question__section__order', 'question__question_number')
         )
-        
-        # Calculate scores
-        total_score = sum(answer.question.marks for answer in answers if answer.is_correct)
-        total_marks = exam.total_marks
-        percentage = (total_score / total_marks * 100) if total_marks > 0 else 0
-        
-        # Section-wise performance (optimized with prefetch_related)
         sections = Section.objects.filter(exam=exam).prefetch_related('questions')
-        section_performance = []
-        
-        for section in sections:
-            section_questions = section.questions.all()
-            section_answers = answers.filter(question__section=section)
-            
-            section_score = sum(ans.question.marks for ans in section_answers if ans.is_correct)
-            section_total = sum(q.marks for q in section_questions)
-            section_accuracy = (section_score / section_total * 100) if section_total > 0 else 0
-            
-            answered_count = section_answers.filter(selected_option__isnull=False).count()
-            
-            section_performance.append({
-                'section_name': section.name,
-                'score': section_score,
-                'total_marks': section_total,
-                'accuracy': round(section_accuracy, 1),
-                'answered': answered_count,
-                'total_questions': section_questions.count(),
-            })
         
-        # Question-by-question review
-        questions_review = []
-        for answer in answers.order_by('question__section__order', 'question__question_number'):
-            question = answer.question
-            questions_review.append({
-                'question_id': question.id,
-                'question_number': question.question_number,
-                'section_name': question.section.name,
-                'question_text': question.question_text,
-                'option_a': question.option_a,
-                'option_b': question.option_b,
-                'option_c': question.option_c,
-                'option_d': question.option_d,
-                'user_answer': answer.selected_option,
-                'correct_answer': question.correct_option,
-                'is_correct': answer.is_correct,
-                'marks': question.marks,
-            })
-        
-        # Performance insights
-        strengths = [s['section_name'] for s in section_performance if s['accuracy'] >= 80]
-        improvements = [s['section_name'] for s in section_performance if s['accuracy'] < 60]
-        
-        # Time analysis
-        time_spent = None
-        if attempt.finished_at and attempt.started_at:
-            time_diff = attempt.finished_at - attempt.started_at
-            hours = time_diff.seconds // 3600
-            minutes = (time_diff.seconds % 3600) // 60
-            time_spent = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
-        
-        # Build response
-        results_data = {
-            'attempt_id': attempt.id,
-            'exam_name': f"{exam.name} {exam.year}",
-            'user': request.user.username,
-            'started_at': attempt.started_at.isoformat(),
-            'finished_at': attempt.finished_at.isoformat() if attempt.finished_at else None,
-            'time_spent': time_spent,
-            'status': attempt.status,
-            'total_score': total_score,
-            'total_marks': total_marks,
-            'percentage': round(percentage, 2),
-            'correct_answers': sum(1 for ans in answers if ans.is_correct),
-            'total_questions': answers.count(),
-            'section_performance': section_performance,
-            'questions': questions_review,
-            'insights': {
-                'strengths': strengths,
-                'improvements': improvements,
-                'overall_performance': 'Excellent' if percentage >= 80 else 'Good' if percentage >= 60 else 'Needs Improvement',
-            },
-            # Video solution (only for completed exams)
-            'solution_video_url': exam.solution_video_url if exam.solution_video_url else None,
-        }
+        results_data = build_results_payload(attempt, exam, answers, sections, request.user.username)
         
         logger.info(f"Results retrieved for attempt {attempt_id} by user {request.user.id}")
         
@@ -176,20 +125,20 @@ class UserDashboardView(APIView):
             best_score = max(scores) if scores else 0
         
         # Available exams
-        available_exams = Exam.objects.filter(is_published=True).prefetch_related('sections')
+        available_exams = Exam.objects.filter(is_published=True).annotate(
+            sections_count=Count('sections', distinct=True),
+            total_questions=Count('sections__questions'),
+        )
         exams_list = []
         
         for exam in available_exams:
-            total_questions = Question.objects.filter(section__exam=exam).count()
-            sections_count = exam.sections.count()
-            
             exams_list.append({
                 'id': exam.id,
                 'name': f"{exam.name} {exam.year}",
                 'duration_minutes': exam.duration_minutes,
                 'total_marks': exam.total_marks,
-                'total_questions': total_questions,
-                'sections_count': sections_count,
+                'total_questions': exam.total_questions,
+                'sections_count': exam.sections_count,
                 'access_tier': exam.access_tier,
                 'is_premium': exam.is_premium,
             })
@@ -77,18 +77,43 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.LoadSheddingMiddleware",
+    "core.middleware.RequestTracingMiddleware",
+    "core.middleware.RequestMetricsMiddleware",
+    "core.middleware.MemoryDiagnosticsMiddleware",
+    "core.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    # Custom middleware
-    "core.middleware.SubscriptionExpiryMiddleware",
-    "core.middleware.ActiveExamSessionMiddleware",
+    # Runs one of MIDDLEWARE_PIPELINES below, chosen by URL prefix
+    "core.pipeline.RoutedMiddleware",
 ]
 
+# Middleware per URL prefix (longest match wins, '' is the default).
+# The JSON API authenticates with JWT in DRF, so it skips sessions, CSRF,
+# messages and session auth, which only the Django admin needs.
+# Benchmark with: python manage.py benchmark_middleware
+MIDDLEWARE_PIPELINES = {
+    "": [
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.common.CommonMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        # Custom middleware
+        "core.middleware.SubscriptionExpiryMiddleware",
+        "core.middleware.ActiveExamSessionMiddleware",
+    ],
+    "/api/": [
+        "django.middleware.common.CommonMiddleware",
+    ],
+    # '$' makes it an exact path rather than a prefix
+    "/metrics$": [],
+}
+
+# The admin looks for its middleware in MIDDLEWARE only; core checks the
+# default pipeline instead (core.pipeline.check_admin_pipeline)
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -176,6 +201,13 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
 
+# Protected PDF downloads - notes/ and pyq/ (see api/protected_files.py)
+# When enabled Django only checks access and nginx serves the file from an
+# `internal` location under PROTECTED_FILES_INTERNAL_PREFIX
+PROTECTED_FILES_USE_X_ACCEL = os.getenv('PROTECTED_FILES_USE_X_ACCEL', 'False') == 'True'
+PROTECTED_FILES_INTERNAL_PREFIX = os.getenv('PROTECTED_FILES_INTERNAL_PREFIX', '/protected/')
+PROTECTED_FILES_ACCESS_CACHE_SECONDS = int(os.getenv('PROTECTED_FILES_ACCESS_CACHE_SECONDS', '300'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -206,10 +238,12 @@ else:
 # Redis Cache Configuration (Optimized for Performance)
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        # django-redis RedisCache plus hit/miss metrics per key namespace
+        "BACKEND": "core.instrumentation.InstrumentedRedisCache",
         "LOCATION": os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'),
         "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # DefaultClient with serialisation/compression per key namespace
+            "CLIENT_CLASS": "core.cache_codec.CodecClient",
             # Connection pool settings
             "CONNECTION_POOL_KWARGS": {
                 "max_connections": 50,
@@ -221,22 +255,55 @@ CACHES = {
     }
 }
 
+# Cache value codecs per key namespace, "namespace=serializer[+compressor]"
+# (see core/cache_codec.py; compare them with `manage.py cache_codec_report`)
+CACHE_CODEC_DEFAULT = os.getenv('CACHE_CODEC_DEFAULT', 'pickle')
+CACHE_CODECS = dict(
+    entry.strip().split('=', 1)
+    for entry in os.getenv('CACHE_CODECS', 'exam=pickle+zlib,exams=pickle+zlib,catalogue=pickle+zlib').split(',')
+    if entry.strip()
+)
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', '1024'))  # smaller values aren't compressed
+
+# Per-worker in-memory cache in front of Redis for exam content, catalogues
+# and version stamps (see core/local_cache.py)
+LOCAL_CACHE_ENABLED = os.getenv('LOCAL_CACHE_ENABLED', 'True') == 'True'
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', '2000'))
+LOCAL_CACHE_MAX_BYTES = int(os.getenv('LOCAL_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # pickled size
+LOCAL_CACHE_TTL_SECONDS = int(os.getenv('LOCAL_CACHE_TTL_SECONDS', '300'))
+
+# User activity audit log (see users/activity.py)
+# Events are queued in Redis and written by `manage.py flush_user_activity --loop`
+USER_ACTIVITY_BATCH_SIZE = int(os.getenv('USER_ACTIVITY_BATCH_SIZE', '500'))
+USER_ACTIVITY_RETENTION_DAYS = int(os.getenv('USER_ACTIVITY_RETENTION_DAYS', '180'))
+
+# Rate limiting (see core/throttling.py)
+# Anonymous requests are throttled per client IP, taken from the
+# X-Forwarded-For entry added by the trusted proxies in front (nginx: 1).
+# Entries before it are client-supplied and would let clients pick their IP.
+THROTTLE_NUM_PROXIES = int(os.getenv('THROTTLE_NUM_PROXIES', '1'))
+# Per-IP login and OTP rates; raise them for load tests, where every
+# simulated student comes from the same IP
+THROTTLE_RATE_LOGIN = os.getenv('THROTTLE_RATE_LOGIN', '5/min')
+THROTTLE_RATE_OTP = os.getenv('THROTTLE_RATE_OTP', '3/5min')
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "core.throttling.RedisAnonRateThrottle",
+        "core.throttling.RedisUserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/hour",
         "user": "1000/hour",
-        "login": "5/min",
-        "otp": "3/5min",
+        "login": THROTTLE_RATE_LOGIN,
+        "otp": THROTTLE_RATE_OTP,
         "payment": "10/min",
         "exam_start": "5/min",
     },
+    "NUM_PROXIES": THROTTLE_NUM_PROXIES,
 }
 
 # Simple JWT Configuration
@@ -256,7 +323,10 @@ SIMPLE_JWT = {
 import os
 
 # Brevo email backend via Anymail
-EMAIL_BACKEND = 'anymail.backends.brevo.EmailBackend'
+# Override for local testing, e.g. EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend
+# or django.core.mail.backends.filebased.EmailBackend together with EMAIL_FILE_PATH
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'anymail.backends.brevo.EmailBackend')
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', BASE_DIR / 'sent_emails')
 
 ANYMAIL = {
     'BREVO_API_KEY': os.getenv('BREVO_API_KEY', ''),
@@ -264,6 +334,105 @@ ANYMAIL = {
 
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@apollo11.com')
 
+# Idempotency-Key responses for exam start/answer/submit (see core/idempotency.py)
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', '86400'))
+
+# Waiting room for exam start surges (see api/admission.py)
+EXAM_ADMISSION_ENABLED = os.getenv('EXAM_ADMISSION_ENABLED', 'True') == 'True'
+EXAM_ADMISSION_RATE = float(os.getenv('EXAM_ADMISSION_RATE', '20'))  # exam starts per second
+EXAM_ADMISSION_BURST = int(os.getenv('EXAM_ADMISSION_BURST', '40'))
+EXAM_ADMISSION_QUEUE_TIMEOUT_SECONDS = int(os.getenv('EXAM_ADMISSION_QUEUE_TIMEOUT_SECONDS', '30'))
+
+# Per-worker load shedding of non-exam traffic (see core/load_shedding.py)
+LOAD_SHEDDING_ENABLED = os.getenv('LOAD_SHEDDING_ENABLED', 'True') == 'True'
+LOAD_SHEDDING_INTERACTIVE_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHEDDING_INTERACTIVE_MAX_IN_FLIGHT', '40'))
+LOAD_SHEDDING_INTERACTIVE_MAX_QUEUE_MS = int(os.getenv('LOAD_SHEDDING_INTERACTIVE_MAX_QUEUE_MS', '2000'))
+LOAD_SHEDDING_BACKGROUND_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHEDDING_BACKGROUND_MAX_IN_FLIGHT', '10'))
+LOAD_SHEDDING_BACKGROUND_MAX_QUEUE_MS = int(os.getenv('LOAD_SHEDDING_BACKGROUND_MAX_QUEUE_MS', '500'))
+LOAD_SHEDDING_RETRY_AFTER_SECONDS = int(os.getenv('LOAD_SHEDDING_RETRY_AFTER_SECONDS', '5'))
+
+# Per-endpoint request metrics, scraped from /metrics (see core/metrics.py)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_FLUSH_INTERVAL_SECONDS = float(os.getenv('METRICS_FLUSH_INTERVAL_SECONDS', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # Bearer token; empty = localhost only
+
+# Sampling profiler for staff-requested (X-Profile: 1) and sampled requests (see core/profiling.py)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))  # fraction of all requests
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', '5'))
+PROFILING_TTL_SECONDS = int(os.getenv('PROFILING_TTL_SECONDS', '86400'))
+PROFILING_MAX_STORED = int(os.getenv('PROFILING_MAX_STORED', '200'))
+
+# Worker memory growth per endpoint and allocation site (see core/memory.py)
+MEMORY_DIAGNOSTICS_ENABLED = os.getenv('MEMORY_DIAGNOSTICS_ENABLED', 'True') == 'True'
+MEMORY_SNAPSHOT_INTERVAL_SECONDS = int(os.getenv('MEMORY_SNAPSHOT_INTERVAL_SECONDS', '300'))
+MEMORY_TRACEMALLOC_FRAMES = int(os.getenv('MEMORY_TRACEMALLOC_FRAMES', '0'))  # 0 = tracemalloc off
+
+# Warm-up of each forked gunicorn worker before it serves (see core/warmup.py)
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True') == 'True'
+WARMUP_STEPS = [
+    step.strip()
+    for step in os.getenv('WARMUP_STEPS', 'database,redis,django,catalogues,exams').split(',')
+    if step.strip()
+]
+
+# Span tracing of views, SQL, Redis and outbound HTTP (see core/tracing.py)
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'False') == 'True'
+TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', '1.0'))  # fraction of requests
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'jsonl')  # jsonl, otlp or a dotted class path
+TRACING_JSONL_PATH = os.getenv('TRACING_JSONL_PATH', str(BASE_DIR / 'traces.jsonl'))
+TRACING_OTLP_ENDPOINT = os.getenv('TRACING_OTLP_ENDPOINT', 'http://127.0.0.1:4318/v1/traces')
+TRACING_SERVICE_NAME = os.getenv('TRACING_SERVICE_NAME', 'apollo11-backend')
+TRACING_QUEUE_SIZE = int(os.getenv('TRACING_QUEUE_SIZE', '1000'))  # traces waiting for export
+TRACING_BATCH_SIZE = int(os.getenv('TRACING_BATCH_SIZE', '50'))  # traces per export
+
+# Log records carry the trace and span id of the request being traced ('-' otherwise)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'trace_context': {'()': 'core.tracing.TraceContextFilter'},
+    },
+    'formatters': {
+        'traced': {
+            'format': '%(asctime)s %(levelname)s %(name)s [trace=%(trace_id)s span=%(span_id)s] %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'filters': ['trace_context'],
+            'formatter': 'traced',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Email OTPs live in Redis with a native TTL (see users/otp_store.py)
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', '600'))  # 10 minutes
+OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', '5'))
+# Also record each delivered OTP in the email_otps table (written by the mail worker)
+OTP_AUDIT_ENABLED = os.getenv('OTP_AUDIT_ENABLED', 'False') == 'True'
+
+# Outbound mail queue (see users/mail_queue.py)
+# Emails are delivered by `python manage.py run_mail_worker`
+MAIL_WORKER_CONCURRENCY = int(os.getenv('MAIL_WORKER_CONCURRENCY', '4'))
+MAIL_QUEUE_MAX_ATTEMPTS = int(os.getenv('MAIL_QUEUE_MAX_ATTEMPTS', '5'))
+MAIL_QUEUE_BACKOFF_SECONDS = int(os.getenv('MAIL_QUEUE_BACKOFF_SECONDS', '10'))
+# How many dead-lettered jobs are kept (the newest) and for how long
+MAIL_DEAD_LETTER_MAX = int(os.getenv('MAIL_DEAD_LETTER_MAX', '1000'))
+MAIL_DEAD_LETTER_TTL_SECONDS = int(os.getenv('MAIL_DEAD_LETTER_TTL_SECONDS', str(7 * 24 * 3600)))
+
 # Note: Make sure BREVO_API_KEY starts with 'xkeysib-' (API key)
 # NOT 'xsmtpsib-' (SMTP key)
 
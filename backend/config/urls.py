@@ -20,11 +20,17 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.throttling import LoginRateThrottle
+from core.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     
+    # Prometheus scrape endpoint (not proxied by nginx)
+    path("metrics", metrics_view, name='metrics'),
+    
     # JWT Token endpoints
-    path("api/token/", TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path("api/token/", TokenObtainPairView.as_view(throttle_classes=[LoginRateThrottle]), name='token_obtain_pair'),
     path("api/token/refresh/", TokenRefreshView.as_view(), name='token_refresh'),
     
     # App URLs
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.conf import settings
+        from django.core import checks
+        from . import instrumentation, tracing
+        from .pipeline import check_admin_pipeline
+
+        checks.register(check_admin_pipeline, checks.Tags.admin)
+        # Profiles log Redis commands through the same hooks as the metrics
+        if settings.METRICS_ENABLED or settings.PROFILING_ENABLED:
+            instrumentation.install()
+        if settings.TRACING_ENABLED:
+            tracing.install()
@@ -0,0 +1,205 @@
+"""
+Per-namespace serialisation and compression of Django cache values.
+
+django-redis pickles every value and can only compress all of them the same
+way. CodecClient (settings.CACHES' CLIENT_CLASS) picks a codec per key
+namespace instead ("exam" for "apollo11:exam:42:detail:v7", see
+core.instrumentation.cache_namespace): CACHE_CODECS maps namespaces to a
+codec, everything else uses CACHE_CODEC_DEFAULT. A codec is a serializer
+with an optional compressor, written "serializer" or "serializer+compressor":
+
+- serializers: pickle, json, msgpack (needs the msgpack package)
+- compressors: zlib, zstd (needs the zstandard package)
+
+Values shorter than CACHE_COMPRESS_MIN_BYTES once serialised are stored
+uncompressed. Every value starts with a 3-byte header naming its serializer
+and compressor, so changing a namespace's codec needs no cache flush:
+values written before are still read correctly, as are values written
+before this module (plain pickles) and integers (stored as is, for incr()).
+
+json and msgpack are smaller and faster than pickle for plain dicts and
+lists, but they don't round-trip everything: tuples come back as lists and
+json turns integer dict keys into strings. A value they can't encode at all
+(e.g. a datetime) is pickled instead. `python manage.py cache_codec_report`
+measures each codec on the values in Redis, per namespace, including
+whether they come back unchanged.
+"""
+import json
+import pickle
+import zlib
+from enum import Enum
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django_redis.client import DefaultClient
+
+from .instrumentation import cache_namespace
+
+MAGIC = 0xCC
+
+ZLIB_LEVEL = 1
+ZSTD_LEVEL = 3
+
+
+def _pickle_dumps(value):
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _json_dumps(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _json_loads(data):
+    return json.loads(data)
+
+
+def _msgpack_dumps(value):
+    import msgpack
+
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data):
+    import msgpack
+
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _zstd_compress(data):
+    import zstandard
+
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def _zstd_decompress(data):
+    import zstandard
+
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+# name -> (id in the header, dumps, loads, module it needs)
+SERIALIZERS = {
+    'pickle': (1, _pickle_dumps, pickle.loads, None),
+    'json': (2, _json_dumps, _json_loads, None),
+    'msgpack': (3, _msgpack_dumps, _msgpack_loads, 'msgpack'),
+}
+
+# name -> (id in the header, compress, decompress, module it needs)
+COMPRESSORS = {
+    'none': (0, None, None, None),
+    'zlib': (1, lambda data: zlib.compress(data, ZLIB_LEVEL), zlib.decompress, None),
+    'zstd': (2, _zstd_compress, _zstd_decompress, 'zstandard'),
+}
+
+_SERIALIZERS_BY_ID = {entry[0]: entry for entry in SERIALIZERS.values()}
+_COMPRESSORS_BY_ID = {entry[0]: entry for entry in COMPRESSORS.values()}
+
+
+def _installed(module):
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def parse_codec(codec):
+    """'json+zlib' -> ('json', 'zlib'); raises ImproperlyConfigured"""
+    serializer, _, compressor = codec.strip().partition('+')
+    compressor = compressor or 'none'
+    for name, registry, kind in ((serializer, SERIALIZERS, 'serializer'), (compressor, COMPRESSORS, 'compressor')):
+        if name not in registry:
+            raise ImproperlyConfigured(f"Unknown cache {kind} {name!r} in codec {codec!r}")
+        module = registry[name][3]
+        if module and not _installed(module):
+            raise ImproperlyConfigured(f"Cache codec {codec!r} needs the {module} package")
+    return serializer, compressor
+
+
+def available_codecs():
+    """Every serializer/compressor combination whose packages are installed"""
+    return [
+        f"{serializer}+{compressor}" if compressor != 'none' else serializer
+        for serializer, (_, _, _, s_module) in SERIALIZERS.items()
+        for compressor, (_, _, _, c_module) in COMPRESSORS.items()
+        if (not s_module or _installed(s_module)) and (not c_module or _installed(c_module))
+    ]
+
+
+_codecs = None
+
+
+def codec_for(key):
+    """(serializer, compressor) configured for key's namespace"""
+    global _codecs
+    if _codecs is None:
+        _codecs = (
+            parse_codec(settings.CACHE_CODEC_DEFAULT),
+            {namespace: parse_codec(codec) for namespace, codec in settings.CACHE_CODECS.items()},
+        )
+    default, by_namespace = _codecs
+    if not by_namespace:
+        return default
+    return by_namespace.get(cache_namespace(key), default)
+
+
+def encode(value, codec):
+    """Bytes for a value with a (serializer, compressor) codec"""
+    serializer, compressor = codec
+    try:
+        data = SERIALIZERS[serializer][1](value)
+    except (TypeError, ValueError, OverflowError):
+        # Types json / msgpack can't represent
+        serializer = 'pickle'
+        data = _pickle_dumps(value)
+    if compressor != 'none' and len(data) >= settings.CACHE_COMPRESS_MIN_BYTES:
+        data = COMPRESSORS[compressor][1](data)
+    else:
+        compressor = 'none'
+    return bytes((MAGIC, SERIALIZERS[serializer][0], COMPRESSORS[compressor][0])) + data
+
+
+def is_encoded(data):
+    return isinstance(data, bytes) and data[:1] == bytes((MAGIC,))
+
+
+def decode(data):
+    """Value of bytes written by encode()"""
+    loads = _SERIALIZERS_BY_ID[data[1]][2]
+    decompress = _COMPRESSORS_BY_ID[data[2]][2]
+    payload = data[3:]
+    return loads(decompress(payload) if decompress else payload)
+
+
+class _Keyed:
+    """A value on its way to encode(), with the key it is stored under"""
+
+    __slots__ = ('key', 'value')
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+
+class CodecClient(DefaultClient):
+    """django-redis client that encodes values with their namespace's codec"""
+
+    def set(self, key, value, *args, **kwargs):
+        # set() encodes before it knows anything but the value; add(),
+        # set_many() and incr_version() all go through here
+        return super().set(key, _Keyed(key, value), *args, **kwargs)
+
+    def encode(self, value, *, allow_int=True):
+        key = None
+        if isinstance(value, _Keyed):
+            key, value = value.key, value.value
+        if allow_int and isinstance(value, int) and not isinstance(value, (bool, Enum)):
+            # Stored as is so incr() works, as django-redis does
+            return value
+        return encode(value, codec_for(key or ''))
+
+    def decode(self, value):
+        if is_encoded(value):
+            return decode(value)
+        # Integers, and values written before CodecClient
+        return super().decode(value)
@@ -0,0 +1,89 @@
+"""
+Conditional GET support (ETag / Last-Modified) for read-mostly endpoints.
+
+The validators are computed by cheap callables - a cache version stamp or
+an updated_at maximum - so a client revalidating with If-None-Match or
+If-Modified-Since gets a 304 before the view queries and serialises
+anything.
+
+Usage:
+    @api_view(['GET'])
+    @conditional_response(etag_func=lambda request: f"plans-{get_cache_version('plans')}")
+    def list_plans(request): ...
+
+    class ExamViewSet(viewsets.ModelViewSet):
+        @conditional_response(etag_func=lambda view, request, *a, **kw: ...)
+        def list(self, request, *args, **kwargs): ...
+
+The callables receive exactly the arguments of the view they decorate and
+return None to skip conditional handling for that request.
+"""
+import hashlib
+from functools import wraps
+
+from django.http import HttpRequest
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+
+
+def make_etag(*parts):
+    """Build an opaque ETag value from version parts"""
+    raw = ':'.join(str(part) for part in parts)
+    if len(raw) <= 64:
+        return raw
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def not_modified_response(request, etag=None, last_modified=None):
+    """
+    Return a 304 response if the request's validators still match, else None.
+
+    Args:
+        etag (str): Unquoted ETag value
+        last_modified (datetime): Last modification time
+    """
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag) if etag else None,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """Attach ETag/Last-Modified to a 200 response and make clients revalidate"""
+    if response.status_code != 200:
+        return response
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = quote_etag(etag)
+    if last_modified and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Per-user content: clients may keep a copy but must revalidate it
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def conditional_response(etag_func=None, last_modified_func=None):
+    """
+    Decorator adding conditional GET handling to a DRF view function or method.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            request = args[0] if isinstance(args[0], (Request, HttpRequest)) else args[1]
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(*args, **kwargs)
+
+            etag = etag_func(*args, **kwargs) if etag_func else None
+            last_modified = last_modified_func(*args, **kwargs) if last_modified_func else None
+
+            if etag or last_modified:
+                response = not_modified_response(request, etag, last_modified)
+                if response is not None:
+                    return response
+
+            response = view_func(*args, **kwargs)
+            return set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
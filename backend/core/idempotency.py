@@ -0,0 +1,142 @@
+"""
+Idempotency-Key support for retry-prone POST endpoints.
+
+Clients on flaky networks send the same Idempotency-Key header with every
+retry of one logical action (submit exam, save answer, start exam). The first
+request runs the view and its response is stored in Redis for
+IDEMPOTENCY_KEY_TTL_SECONDS; retries get the stored response back, marked
+with "Idempotent-Replayed: true", without the view running again.
+
+Keys are scoped per endpoint and per user. Reusing a key with a different
+request body is rejected with 422, and a retry that arrives while the first
+request is still running gets 409 so the client can try again shortly.
+Requests without the header behave exactly as before.
+"""
+import hashlib
+import json
+import logging
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest
+from django_redis import get_redis_connection
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# How long a key stays "in progress" if the worker dies mid-request
+PENDING_TTL_SECONDS = 60
+
+_KEY_RE = re.compile(r'^[A-Za-z0-9_\-:.]{8,255}$')
+
+
+def _fingerprint(request):
+    """Hash of the request target and payload, to catch key reuse"""
+    try:
+        payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    except (TypeError, ValueError):
+        payload = repr(request.data)
+    return hashlib.sha256(f"{request.method}:{request.path}:{payload}".encode()).hexdigest()
+
+
+def _redis_key(scope, request, idempotency_key):
+    user_id = request.user.id if request.user.is_authenticated else 'anon'
+    return f"idempotency:{scope}:{user_id}:{idempotency_key}"
+
+
+def idempotent(scope):
+    """
+    Decorator making a DRF view function or method idempotent per Idempotency-Key.
+
+    Args:
+        scope (str): Name of the endpoint, part of the Redis key
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            request = args[0] if isinstance(args[0], (Request, HttpRequest)) else args[1]
+            idempotency_key = request.META.get(IDEMPOTENCY_HEADER)
+            if not idempotency_key:
+                return view_func(*args, **kwargs)
+
+            if not _KEY_RE.match(idempotency_key):
+                return Response(
+                    {"error": "Idempotency-Key must be 8-255 characters of letters, digits, '-', '_', ':' or '.'."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            key = _redis_key(scope, request, idempotency_key)
+            fingerprint = _fingerprint(request)
+
+            try:
+                redis = get_redis_connection("default")
+                claimed = redis.set(
+                    key, json.dumps({'state': 'pending', 'fingerprint': fingerprint}),
+                    nx=True, ex=PENDING_TTL_SECONDS
+                )
+                stored = None if claimed else redis.get(key)
+            except Exception as e:
+                logger.warning(f"Idempotency store unavailable, running request normally: {str(e)}")
+                return view_func(*args, **kwargs)
+
+            if not claimed:
+                if stored is None:
+                    # Expired between SET and GET - treat as a fresh request
+                    return wrapper(*args, **kwargs)
+                return _replay(json.loads(stored), fingerprint)
+
+            try:
+                response = view_func(*args, **kwargs)
+            except Exception:
+                redis.delete(key)
+                raise
+
+            _store(redis, key, fingerprint, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def _replay(record, fingerprint):
+    """Build the response for a repeated Idempotency-Key"""
+    if record.get('fingerprint') != fingerprint:
+        return Response(
+            {"error": "This Idempotency-Key was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    if record.get('state') == 'pending':
+        response = Response(
+            {"error": "A request with this Idempotency-Key is still being processed."},
+            status=status.HTTP_409_CONFLICT
+        )
+        response['Retry-After'] = '1'
+        return response
+
+    response = Response(record.get('data'), status=record['status'])
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _store(redis, key, fingerprint, response):
+    """Keep the outcome of a request; server errors are not stored so they can be retried"""
+    try:
+        if response.status_code >= 500 or not hasattr(response, 'data'):
+            redis.delete(key)
+            return
+        record = {
+            'state': 'done',
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'data': response.data,
+        }
+        redis.set(key, json.dumps(record, cls=DjangoJSONEncoder), ex=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to store idempotent response for {key}: {str(e)}")
@@ -0,0 +1,193 @@
+"""
+Per-request DB / Redis / cache instrumentation feeding core.metrics.
+
+- DB: a connection execute_wrapper counts queries and their time.
+- Redis: redis-py's Redis.execute_command and Pipeline.execute are wrapped
+  once per process (install()), so every client - django-redis, the exam
+  timer, throttles, Lua scripts - is counted. A pipeline counts as its
+  number of commands and one round trip of time.
+- Cache: InstrumentedRedisCache (settings.CACHES backend) records hits and
+  misses per key namespace, e.g. "exam" for "apollo11:exam:42".
+
+Counts are collected in a RequestStats bound to the current request through
+a context variable, so work done outside a request isn't attributed to any
+endpoint. RequestMetricsMiddleware turns each request's stats into metrics.
+When a request is profiled (core/profiling.py), its stats also keep a log of
+every SQL statement and Redis command.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django_redis.cache import RedisCache
+
+from .metrics import format_labels, metrics
+
+_current = ContextVar('request_stats', default=None)
+_installed = False
+
+
+class RequestStats:
+    """DB and Redis work done while serving one request"""
+
+    __slots__ = ('db_queries', 'db_seconds', 'redis_commands', 'redis_seconds', 'log')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.redis_commands = 0
+        self.redis_seconds = 0.0
+        # [(kind, statement, seconds)] while profiling, otherwise None
+        self.log = None
+
+
+def current_stats():
+    """RequestStats of the request being served, or None"""
+    return _current.get()
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+        if stats.log is not None:
+            stats.log.append(('sql', sql, elapsed))
+
+
+@contextmanager
+def track_request():
+    """Collect DB and Redis stats for the code inside the block"""
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_db_wrapper))
+            yield stats
+    finally:
+        _current.reset(token)
+
+
+def _timed_redis(method, commands, describe):
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return method(self, *args, **kwargs)
+        count = commands(self)
+        # Before the call: a pipeline's command stack is reset by execute()
+        description = describe(self, args) if stats.log is not None else None
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.redis_commands += count
+            stats.redis_seconds += elapsed
+            if description is not None:
+                stats.log.append(('redis', description, elapsed))
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def describe_command(client, args):
+    """'GET apollo11:exam:42': the command and its first argument, never values"""
+    return ' '.join(_text(arg) for arg in args[:2])
+
+
+def describe_pipeline(pipe, args):
+    names = [_text(command_args[0]) for command_args, _ in pipe.command_stack]
+    return f"PIPELINE[{len(names)}] {' '.join(names[:20])}"
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        value = value.decode(errors='replace')
+    return str(value)[:200]
+
+
+def install():
+    """Wrap redis-py's command execution; safe to call more than once"""
+    global _installed
+    if _installed:
+        return
+    from redis.client import Pipeline, Redis
+
+    Redis.execute_command = _timed_redis(Redis.execute_command, lambda client: 1, describe_command)
+    # Commands queued in a pipeline (or MULTI) are buffered until execute();
+    # WATCH and the reads after it run immediately
+    Pipeline.execute = _timed_redis(Pipeline.execute, lambda pipe: len(pipe.command_stack), describe_pipeline)
+    Pipeline.immediate_execute_command = _timed_redis(
+        Pipeline.immediate_execute_command, lambda pipe: 1, describe_command
+    )
+    _installed = True
+
+
+def cache_namespace(key):
+    """'apollo11:exam:42' -> 'exam', 'download_access:notes:1:2' -> 'download_access'"""
+    parts = str(key).split(':')
+    if parts[0] == 'apollo11' and len(parts) > 1:
+        return parts[1]
+    return parts[0]
+
+
+def record_cache_lookup(key, hit):
+    metrics.inc(
+        'cache_requests_total',
+        format_labels(namespace=cache_namespace(key), result='hit' if hit else 'miss')
+    )
+
+
+class InstrumentedRedisCache(RedisCache):
+    """django-redis cache backend that records hit/miss per key namespace"""
+
+    _MISSING = object()
+
+    def get(self, key, default=None, version=None, client=None):
+        value = super().get(key, self._MISSING, version, client)
+        record_cache_lookup(key, value is not self._MISSING)
+        return default if value is self._MISSING else value
+
+    def get_many(self, keys, version=None, client=None):
+        found = super().get_many(keys, version, client)
+        for key in keys:
+            record_cache_lookup(key, key in found)
+        return found
+
+
+def endpoint_name(request):
+    """Bounded-cardinality endpoint label: the URL name, or 'unmatched'"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def record_request(request, response, duration, stats):
+    """Turn one request's stats into metric samples"""
+    endpoint = endpoint_name(request)
+    labels = format_labels(endpoint=endpoint)
+
+    metrics.inc('http_requests_total', format_labels(
+        endpoint=endpoint, method=request.method, status=response.status_code
+    ))
+    metrics.observe('http_request_duration_seconds', labels, duration)
+
+    if response.streaming:
+        size = int(response.get('Content-Length') or 0)
+    else:
+        size = len(response.content)
+    metrics.inc('http_response_size_bytes_total', labels, size)
+
+    metrics.observe('db_queries_per_request', labels, stats.db_queries)
+    metrics.inc('db_query_duration_seconds_total', labels, stats.db_seconds)
+    metrics.inc('redis_commands_total', labels, stats.redis_commands)
+    metrics.inc('redis_command_duration_seconds_total', labels, stats.redis_seconds)
+    metrics.maybe_flush()
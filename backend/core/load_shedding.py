@@ -0,0 +1,171 @@
+"""
+Priority-aware load shedding.
+
+Under overload every request waits in the same queue, so a dashboard refresh
+delays an in-exam answer save as much as anything else. Requests are
+classified into three tiers by path:
+
+- critical:    exam starts, answer saves, submits, timer checks, payment
+               verification, token refresh, the shedding stats and
+               /metrics. Never shed. Exam starts are paced by the waiting
+               room instead (api/admission.py), which clients already
+               retry on.
+- interactive: everything else a student clicks on (dashboard, lists, results).
+- background:  admin pages, activity/notification feeds, payment history.
+
+Each worker tracks its requests in flight and the queueing delay reported by
+nginx (X-Request-Start, set to $msec in nginx.conf). Once a tier's threshold
+is crossed, new requests of that tier get 503 with Retry-After, so the
+worker's capacity goes to critical traffic. Background traffic is shed first.
+
+Counters are per worker (stats()) and shed totals are also kept in Redis so
+every worker's decisions can be read in one place (shed_totals()).
+"""
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+CRITICAL = 'critical'
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+TIERS = (CRITICAL, INTERACTIVE, BACKGROUND)
+
+ROUTE_TIERS = [
+    (re.compile(r'^/api/exam/timer/(start|submit-answer|submit|remaining|questions)/'), CRITICAL),
+    (re.compile(r'^/api/exam/(start|submit-answer|submit)/'), CRITICAL),
+    (re.compile(r'^/api/attempts/start_exam/'), CRITICAL),
+    (re.compile(r'^/api/attempts/\d+/(submit_answer|submit_exam)/'), CRITICAL),
+    (re.compile(r'^/api/payments/(verify-payment|webhook)/'), CRITICAL),
+    (re.compile(r'^/api/(token|auth)/refresh/'), CRITICAL),
+    # Shedding stats and metrics must stay readable while shedding
+    (re.compile(r'^/api/admin/load-shedding/'), CRITICAL),
+    (re.compile(r'^/metrics$'), CRITICAL),
+    (re.compile(r'^/api/admin/'), BACKGROUND),
+    (re.compile(r'^/admin/'), BACKGROUND),
+    (re.compile(r'^/api/users/(activities|notifications)/'), BACKGROUND),
+    (re.compile(r'^/api/payments/history/'), BACKGROUND),
+]
+
+SHED_TOTALS_KEY = 'load_shedding:shed'
+
+# Weight of the newest sample in the queue delay moving average
+_EWMA_ALPHA = 0.2
+
+
+def classify(path):
+    """Priority tier of a request path"""
+    for pattern, tier in ROUTE_TIERS:
+        if pattern.match(path):
+            return tier
+    return INTERACTIVE
+
+
+def queue_delay_ms(request):
+    """
+    Time the request waited before reaching Django, from nginx's
+    X-Request-Start header ("t=<seconds.millis>"). None if not set.
+    """
+    header = request.META.get('HTTP_X_REQUEST_START')
+    if not header:
+        return None
+    try:
+        started = float(header[2:] if header.startswith('t=') else header)
+    except ValueError:
+        return None
+    return max(0.0, (time.time() - started) * 1000)
+
+
+class LoadShedder:
+    """Per-worker admission decisions and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = dict.fromkeys(TIERS, 0)
+        self.peak_in_flight = 0
+        self.admitted = dict.fromkeys(TIERS, 0)
+        self.shed = dict.fromkeys(TIERS, 0)
+        self.queue_delay_ewma_ms = 0.0
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    def _limits(self, tier):
+        """(max in flight, max queue delay ms) for a sheddable tier"""
+        if tier == BACKGROUND:
+            return settings.LOAD_SHEDDING_BACKGROUND_MAX_IN_FLIGHT, settings.LOAD_SHEDDING_BACKGROUND_MAX_QUEUE_MS
+        return settings.LOAD_SHEDDING_INTERACTIVE_MAX_IN_FLIGHT, settings.LOAD_SHEDDING_INTERACTIVE_MAX_QUEUE_MS
+
+    def enter(self, tier, delay_ms=None):
+        """
+        Decide whether to serve a request; counts it in flight if so.
+
+        Returns:
+            str: None if admitted, otherwise the reason it was shed
+        """
+        with self._lock:
+            if delay_ms is not None:
+                self.queue_delay_ewma_ms += _EWMA_ALPHA * (delay_ms - self.queue_delay_ewma_ms)
+
+            reason = None
+            if tier != CRITICAL:
+                max_in_flight, max_queue_ms = self._limits(tier)
+                if sum(self.in_flight.values()) >= max_in_flight:
+                    reason = 'in_flight'
+                elif self.queue_delay_ewma_ms > max_queue_ms:
+                    reason = 'queue_delay'
+
+            if reason:
+                self.shed[tier] += 1
+            else:
+                self.admitted[tier] += 1
+                self.in_flight[tier] += 1
+                self.peak_in_flight = max(self.peak_in_flight, sum(self.in_flight.values()))
+
+        if reason:
+            self._record_shed(tier, reason)
+        return reason
+
+    def exit(self, tier):
+        with self._lock:
+            self.in_flight[tier] -= 1
+
+    def _record_shed(self, tier, reason):
+        try:
+            self.redis.hincrby(SHED_TOTALS_KEY, f"{tier}:{reason}", 1)
+        except Exception as e:
+            logger.warning(f"Failed to record shed request: {str(e)}")
+
+    def stats(self):
+        """Snapshot of this worker's counters"""
+        with self._lock:
+            return {
+                'in_flight': dict(self.in_flight),
+                'peak_in_flight': self.peak_in_flight,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'queue_delay_ewma_ms': round(self.queue_delay_ewma_ms, 1),
+            }
+
+    def shed_totals(self):
+        """Shed counts of all workers by 'tier:reason'"""
+        try:
+            return {
+                field.decode(): int(count)
+                for field, count in self.redis.hgetall(SHED_TOTALS_KEY).items()
+            }
+        except Exception as e:
+            logger.warning(f"Failed to read shed totals: {str(e)}")
+            return {}
+
+
+load_shedder = LoadShedder()
@@ -0,0 +1,219 @@
+"""
+Per-worker in-memory cache (L1) in front of the Redis cache (L2).
+
+Exam content, catalogues and version stamps are read by every worker
+thousands of times a minute and rarely change; serving them from the
+worker's memory saves a Redis round trip and unpickling a large payload
+each time. local_cache.get() looks in a bounded LRU in this process first,
+then in the Django cache, and keeps what it found for
+LOCAL_CACHE_TTL_SECONDS. The LRU holds at most LOCAL_CACHE_MAX_ENTRIES
+entries and LOCAL_CACHE_MAX_BYTES (pickled size) and evicts the least
+recently used entries beyond that.
+
+Most keys are versioned (utils.cache.get_cache_version) and so never change
+once written; what changes is the version stamp. Changes go through
+local_cache.delete() / invalidate() (bump_cache_version does this), which
+publish the keys on the CHANNEL Redis pub/sub channel. Every worker listens
+on a background thread and drops them, so all workers stop serving a stale
+entry together. The local tier is only used while that listener is
+subscribed: until it is (and while Redis is unreachable) reads go straight
+to Redis, and everything held locally is dropped when it (re)subscribes,
+since invalidations may have been missed.
+
+Values are shared by every request the worker serves; treat them as
+read-only. Hits and misses of this tier are counted per key namespace in
+local_cache_requests_total (the Redis tier's in cache_requests_total), and
+evictions by reason in local_cache_evictions_total.
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .instrumentation import cache_namespace
+from .metrics import format_labels, metrics
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache:invalidate'
+
+# Wait this long before subscribing again after losing the connection
+RESUBSCRIBE_DELAY_SECONDS = 1
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Bounded LRU with TTL in front of the Django cache; state is per process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    def ensure_started(self, timeout=0):
+        """
+        Start listening for invalidations in this process (cheap once
+        started); wait up to timeout seconds for the subscription
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # key -> (value, pickled size, expiry on the monotonic clock)
+                    self._entries = OrderedDict()
+                    self._bytes = 0
+                    # Bumped by every invalidation, so a value read from Redis
+                    # before one is not kept after it
+                    self._generation = 0
+                    self._listening = threading.Event()
+                    threading.Thread(target=self._listen, name='local-cache-invalidation', daemon=True).start()
+                    self._pid = os.getpid()
+        if timeout:
+            self._listening.wait(timeout)
+        return self._listening.is_set()
+
+    def get(self, key, default=None):
+        """Value of key from this worker's memory, else from the Django cache"""
+        if not settings.LOCAL_CACHE_ENABLED or not self.ensure_started():
+            return cache.get(key, default)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(key)
+                    value = entry[0]
+                else:
+                    self._remove(key)
+                    self._evicted('ttl')
+                    entry = None
+            generation = self._generation
+        self._record(key, entry is not None)
+        if entry is not None:
+            return value
+
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._store(key, value, generation)
+        return value
+
+    def set(self, key, value, timeout):
+        """
+        Store in the Django cache and in this worker's memory. Other workers
+        are not told: use it for keys whose value never changes (versioned
+        keys), or call invalidate() after changing one.
+        """
+        cache.set(key, value, timeout)
+        if settings.LOCAL_CACHE_ENABLED and self.ensure_started():
+            with self._lock:
+                generation = self._generation
+            self._store(key, value, generation, copy=True)
+
+    def delete(self, key):
+        """Delete from the Django cache and from every worker's memory"""
+        cache.delete(key)
+        self.invalidate(key)
+
+    def invalidate(self, *keys):
+        """Drop keys from every worker's memory (they stay in the Django cache)"""
+        if not settings.LOCAL_CACHE_ENABLED:
+            return
+        if self._pid == os.getpid():
+            self._drop(keys)
+        try:
+            self.redis.publish(CHANNEL, json.dumps(keys))
+        except Exception as e:
+            logger.warning(f"Failed to publish local cache invalidation: {str(e)}")
+
+    def _store(self, key, value, generation, copy=False):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        size = len(pickled)
+        if size > settings.LOCAL_CACHE_MAX_BYTES:
+            return
+        if copy:
+            # Keep what a later get() from Redis would return, not the
+            # caller's object (which it may change, and which can hold more,
+            # e.g. the serializer behind response.data)
+            value = pickle.loads(pickled)
+        expires = time.monotonic() + settings.LOCAL_CACHE_TTL_SECONDS
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._remove(key)
+            self._entries[key] = (value, size, expires)
+            self._bytes += size
+            while (len(self._entries) > settings.LOCAL_CACHE_MAX_ENTRIES
+                   or self._bytes > settings.LOCAL_CACHE_MAX_BYTES):
+                self._remove(next(iter(self._entries)))
+                self._evicted('size')
+
+    def _remove(self, key):
+        """Remove one entry; call with the lock held"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+        return entry is not None
+
+    def _drop(self, keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._remove(key):
+                    self._evicted('invalidated')
+
+    def _clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub()
+                pubsub.subscribe(CHANNEL)
+                for message in pubsub.listen():
+                    if message['type'] == 'subscribe':
+                        # Anything kept before may have missed invalidations
+                        self._clear()
+                        self._listening.set()
+                    elif message['type'] == 'message':
+                        self._drop(json.loads(message['data']))
+            except Exception as e:
+                logger.warning(f"Local cache invalidation listener disconnected: {str(e)}")
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+            self._listening.clear()
+            self._clear()
+            time.sleep(RESUBSCRIBE_DELAY_SECONDS)
+
+    def _record(self, key, hit):
+        if settings.METRICS_ENABLED:
+            metrics.inc(
+                'local_cache_requests_total',
+                format_labels(namespace=cache_namespace(key), result='hit' if hit else 'miss')
+            )
+
+    def _evicted(self, reason):
+        if settings.METRICS_ENABLED:
+            metrics.inc('local_cache_evictions_total', format_labels(reason=reason))
+
+
+local_cache = LocalCache()
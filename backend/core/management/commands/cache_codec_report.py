@@ -0,0 +1,103 @@
+"""
+Django management command to compare cache codecs on the values in Redis
+Usage:
+    python manage.py cache_codec_report
+    python manage.py cache_codec_report --namespace exam --namespace catalogue
+    python manage.py cache_codec_report --sample 200 --repeat 20
+
+Samples keys of each cache namespace (see core/cache_codec.py), and for every
+available codec reports the bytes the sampled values would take, the
+saving against their current size in Redis, the time to encode and decode
+one value, and whether values come back unchanged. The codec the namespace
+uses now is marked with '*'; set CACHE_CODECS to change it.
+"""
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache_codec import SERIALIZERS, available_codecs, codec_for, decode, encode, parse_codec
+from core.instrumentation import cache_namespace
+
+
+def _timed(function, values, repeat):
+    """(results of the last pass, mean microseconds per value)"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [function(value) for value in values]
+    return results, (time.perf_counter() - started) / repeat / len(values) * 1e6
+
+
+def _round_trip(originals, decoded):
+    if all(a == b for a, b in zip(originals, decoded)):
+        return 'ok'
+    return 'changed'
+
+
+class Command(BaseCommand):
+    help = 'Compares cache serializers and compressors per key namespace: bytes saved and encode/decode time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', action='append', default=[],
+                            help='Only this namespace (repeatable; default: all)')
+        parser.add_argument('--sample', type=int, default=50, help='Keys sampled per namespace (default: 50)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Times each value is encoded and decoded for timing (default: 5)')
+        parser.add_argument('--codec', action='append', default=[],
+                            help='Codec to compare, e.g. json+zlib (repeatable; default: all installed)')
+
+    def handle(self, *args, **options):
+        codecs = options['codec'] or available_codecs()
+        for codec in codecs:
+            parse_codec(codec)
+
+        # Unprefixed keys grouped by namespace, up to --sample each
+        keys = defaultdict(list)
+        for key in cache.iter_keys('*'):
+            namespace = cache_namespace(key)
+            if options['namespace'] and namespace not in options['namespace']:
+                continue
+            if len(keys[namespace]) < options['sample']:
+                keys[namespace].append(key)
+        if not keys:
+            raise CommandError('No cached keys found')
+
+        client = cache.client.get_client(write=False)
+        self.stdout.write(
+            f"Values of {settings.CACHE_COMPRESS_MIN_BYTES} bytes or more are compressed (CACHE_COMPRESS_MIN_BYTES); "
+            "'changed' values don't come back equal (tuples, integer dict keys)"
+        )
+        for namespace, namespace_keys in sorted(keys.items()):
+            # Integers are stored as they are by every codec
+            found = {
+                key: value for key, value in cache.get_many(namespace_keys).items()
+                if not isinstance(value, int) or isinstance(value, bool)
+            }
+            if not found:
+                continue
+            values = list(found.values())
+            pipe = client.pipeline(transaction=False)
+            for key in found:
+                pipe.strlen(cache.client.make_key(key))
+            stored = sum(pipe.execute())
+            current = codec_for(namespace_keys[0])
+
+            self.stdout.write(
+                f"\n{namespace}: {len(values)} values, {stored} bytes in Redis now\n"
+                f"  {'codec':<18}{'bytes':>11} {'saved':>10}{'encode us':>12}{'decode us':>12}  round trip"
+            )
+            for codec in codecs:
+                parsed = parse_codec(codec)
+                encoded, encode_us = _timed(lambda value: encode(value, parsed), values, options['repeat'])
+                decoded, decode_us = _timed(decode, encoded, options['repeat'])
+                size = sum(len(data) for data in encoded)
+                saved = (1 - size / stored) * 100 if stored else 0
+                # Values the serializer couldn't encode were pickled
+                pickled = sum(1 for data in encoded if data[1] != SERIALIZERS[parsed[0]][0])
+                marker = '*' if parsed == current else ' '
+                self.stdout.write(
+                    f"{marker} {codec:<18}{size:>11} {saved:>9.1f}%{encode_us:>12.1f}{decode_us:>12.1f}  "
+                    f"{_round_trip(values, decoded)}{f' ({pickled} pickled)' if pickled else ''}"
+                )
@@ -0,0 +1,291 @@
+"""
+Django management command to check database query budgets of the GET API endpoints
+Usage:
+    python manage.py check_query_budgets
+    python manage.py check_query_budgets --sizes 2 5 10
+    python manage.py check_query_budgets --report           # also write docs/QUERY_BUDGETS.md
+
+Finds every GET route in the URLconf and requests it through the full
+middleware stack, once for each fixture size: a user with N exams (N
+sections of 2 questions each), N finished attempts, N notifications,
+activities, notes, PYQs, videos, announcements, payments and reported
+issues. Counts database queries and Redis commands per request.
+
+Fails if an endpoint's query count grows with N, exceeds its budget in
+core.query_budgets.QUERY_BUDGETS, or has no budget, and if it answers
+anything but 2xx (or its status in EXPECTED_STATUSES): an error response
+usually skips the queries being checked. Fixtures are created in
+a transaction that is rolled back, and the cache gets a fresh key prefix for
+every size (with the per-worker cache, core/local_cache.py, turned off) so
+each request starts cold; run it against a development database.
+"""
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import URLResolver, get_resolver, resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import instrumentation
+from core.query_budgets import QUERY_BUDGETS
+
+DEFAULT_REPORT = Path(settings.BASE_DIR) / 'docs' / 'QUERY_BUDGETS.md'
+
+# URL kwarg -> fixture; 'pk' is looked up by the router basename instead
+KWARG_FIXTURES = {
+    'exam_id': 'exam',
+    'attempt_id': 'attempt',
+    'note_id': 'note',
+    'pyq_id': 'pyq',
+}
+
+# Endpoint -> non-2xx status it is expected to answer. The note and PYQ
+# fixtures point at files that don't exist; the views make all their
+# queries (the entitlement check) before looking for the file.
+EXPECTED_STATUSES = {
+    'serve_note': 404,
+    'serve_pyq': 404,
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _walk(patterns, prefix=''):
+    """(route template, URLPattern) of every pattern"""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern).lstrip('^').rstrip('$')
+        if isinstance(pattern, URLResolver):
+            # The Django admin has its own checks and isn't part of the API
+            if pattern.app_name != 'admin':
+                yield from _walk(pattern.url_patterns, route)
+        else:
+            yield route, pattern
+
+
+def _allows_get(callback):
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        return 'get' in actions
+    view_class = getattr(callback, 'view_class', None)
+    if view_class is not None:
+        return hasattr(view_class, 'get')
+    return True
+
+
+def discover_routes():
+    """{url name: (route template, [url kwarg names])} of every named GET API route"""
+    routes = {}
+    for route, pattern in _walk(get_resolver().url_patterns):
+        kwargs = list(pattern.pattern.regex.groupindex)
+        if not route.startswith('api/') or 'format' in kwargs or not pattern.name or pattern.name in routes:
+            continue
+        if _allows_get(pattern.callback):
+            routes[pattern.name] = ('/' + route, kwargs)
+    return routes
+
+
+def build_fixtures(size, tag):
+    """A staff PRO user and size of everything the endpoints list"""
+    from exams.models import PYQ, Announcement, Exam, Note, Question, Section, VideoSolution
+    from payments.models import Payment, Plan, Subscription
+    from results.models import Attempt, AttemptAnswer, QuestionIssue
+    from users.models import Notification, Profile, User, UserActivity
+
+    now = timezone.now()
+    user = User.objects.create(
+        username=f'qbudget_{tag}', email=f'qbudget_{tag}@example.invalid', is_staff=True, email_verified=True
+    )
+    Profile.objects.create(user=user)
+    plan = Plan.objects.create(key=f'qbudget_{tag}', name='PRO Plan', price_in_paisa=14900, duration_days=365)
+    payments = [
+        Payment.objects.create(user=user, provider_payment_id=f'pay_qbudget_{tag}_{i}', order_id=f'order_{i}',
+                               amount=14900, status='activated')
+        for i in range(size)
+    ]
+    Subscription.objects.create(user=user, plan=plan, payment=payments[0], start_date=now,
+                                end_date=now + timedelta(days=365))
+
+    exams, attempts = [], []
+    for i in range(size):
+        exam = Exam.objects.create(name=f'QBUDGET {tag}', year=2000 + i, total_marks=size * 2,
+                                   duration_minutes=180, is_published=True)
+        questions = []
+        for order in range(1, size + 1):
+            section = Section.objects.create(exam=exam, name=f'Section {order}', order=order, max_marks=2)
+            questions += [
+                Question.objects.create(section=section, question_number=number, question_text='q',
+                                        option_a='1', option_b='2', option_c='3', option_d='4', correct_option='A')
+                for number in (1, 2)
+            ]
+        attempt = Attempt.objects.create_next(user, exam, status='submitted', finished_at=now)
+        AttemptAnswer.objects.bulk_create([
+            AttemptAnswer(attempt=attempt, question=question, selected_option='AB'[n % 2])
+            for n, question in enumerate(questions)
+        ])
+        QuestionIssue.objects.create(user=user, question=questions[0], attempt=attempt, issue_type='wrong_answer')
+        exams.append(exam)
+        attempts.append(attempt)
+
+    for i in range(size):
+        Notification.objects.create(user=user, title=f'Notification {i}', message='m')
+        UserActivity.objects.create(user=user, activity=f'activity {i}')
+        Note.objects.create(subject='Mathematics', topic=f'Topic {i}', file_path='missing.pdf')
+        PYQ.objects.create(exam_name='DCET', year=2000 + i, file_path='missing.pdf')
+        VideoSolution.objects.create(topic='Mathematics', title=f'Video {i}', youtube_url='https://youtu.be/x')
+        Announcement.objects.create(title=f'Announcement {i}', message='m')
+
+    exam = exams[0]
+    section = exam.sections.first()
+    return {
+        'user': user,
+        'exam': exam,
+        'section': section,
+        'question': section.questions.first(),
+        'attempt': attempts[0],
+        'answer': attempts[0].answers.first(),
+        'notification': user.notifications.first(),
+        'activity': user.activities.first(),
+        'note': Note.objects.filter(topic='Topic 0').latest('id'),
+        'pyq': PYQ.objects.filter(year=2000).latest('id'),
+    }
+
+
+def route_path(name, kwarg_names, fixtures):
+    """URL of a route for the fixtures, or None if a kwarg has no fixture"""
+    kwargs = {}
+    for kwarg in kwarg_names:
+        key = name.split('-')[0] if kwarg == 'pk' else KWARG_FIXTURES.get(kwarg)
+        if key not in fixtures:
+            return None
+        kwargs[kwarg] = fixtures[key].pk
+    return reverse(name, kwargs=kwargs)
+
+
+class Command(BaseCommand):
+    help = 'Checks that GET API endpoints stay within their query budgets and make no N+1 queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[2, 8],
+                            help='Fixture sizes to compare (default: 2 8)')
+        parser.add_argument(
+            '--report', nargs='?', const=str(DEFAULT_REPORT), default=None,
+            help=f'Write a markdown report of budgets and measurements (default path: {DEFAULT_REPORT})'
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(set(options['sizes']))
+        if len(sizes) < 2:
+            raise CommandError('Give at least two --sizes to detect queries that grow with data')
+
+        instrumentation.install()
+        routes = discover_routes()
+        # Several URL names can resolve to one endpoint (e.g. api/exams/ is
+        # registered twice); the first route measured represents it
+        measured = {}
+        for size in sizes:
+            for endpoint, route, result in self.measure(routes, size):
+                data = measured.setdefault(endpoint, {'route': route, 'results': {}})
+                data['results'].setdefault(size, result)
+
+        rows, failures = [], []
+        for endpoint, data in sorted(measured.items()):
+            results = data['results']
+            queries = [results[size][1] if size in results else None for size in sizes]
+            redis = [results[size][2] if size in results else None for size in sizes]
+            statuses = sorted({results[size][0] for size in results})
+            budget = QUERY_BUDGETS.get(endpoint)
+
+            problems = []
+            if None in queries:
+                problems.append('not measured at every size')
+            elif queries[-1] > queries[0]:
+                problems.append(f'queries grow with data ({queries[0]} -> {queries[-1]})')
+            if budget is None:
+                problems.append('no budget')
+            elif max(q for q in queries if q is not None) > budget:
+                problems.append(f'over budget ({max(q for q in queries if q is not None)} > {budget})')
+            unexpected = [
+                code for code in statuses
+                if not 200 <= code < 300 and code != EXPECTED_STATUSES.get(endpoint)
+            ]
+            if unexpected:
+                problems.append(f"unexpected status {', '.join(map(str, unexpected))}")
+            if problems:
+                failures.append(f"{endpoint}: {', '.join(problems)}")
+            rows.append((endpoint, data['route'], budget, queries, redis, statuses, problems))
+
+        self.print_table(sizes, rows)
+        if options['report']:
+            self.write_report(options['report'], sizes, rows)
+        if failures:
+            raise CommandError(f'{len(failures)} endpoint(s) failed:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'All {len(rows)} endpoints within budget'))
+
+    def measure(self, routes, size):
+        """[(endpoint, route template, (status, queries, redis commands))] per route"""
+        tag = f'{size}_{uuid.uuid4().hex[:8]}'
+        caches = {**settings.CACHES, 'default': {**settings.CACHES['default'], 'KEY_PREFIX': f'qbudget_{tag}'}}
+        results = []
+        try:
+            # The test client's requests are for host 'testserver'
+            allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+            # The per-worker cache ignores KEY_PREFIX, so it would serve
+            # the previous size's entries
+            with override_settings(CACHES=caches, METRICS_ENABLED=False, LOCAL_CACHE_ENABLED=False,
+                                   ALLOWED_HOSTS=allowed_hosts), \
+                    transaction.atomic():
+                fixtures = build_fixtures(size, tag)
+                client = APIClient()
+                client.force_authenticate(fixtures['user'])
+                for name, (route, kwarg_names) in routes.items():
+                    path = route_path(name, kwarg_names, fixtures)
+                    if path is None:
+                        self.stderr.write(f'Skipping {name}: no fixture for {kwarg_names}')
+                        continue
+                    with instrumentation.track_request() as stats:
+                        response = client.get(path, REMOTE_ADDR='127.0.0.1')
+                    endpoint = resolve(path).view_name
+                    results.append((endpoint, route, (response.status_code, stats.db_queries, stats.redis_commands)))
+                raise _Rollback
+        except _Rollback:
+            pass
+        return results
+
+    def print_table(self, sizes, rows):
+        columns = ' '.join(f'{"q@" + str(size):>6}' for size in sizes)
+        self.stdout.write(f"{'endpoint':<36}{'budget':>7} {columns} {'redis':>9}  status")
+        for endpoint, route, budget, queries, redis, statuses, problems in rows:
+            counts = ' '.join(f"{'-' if q is None else q:>6}" for q in queries)
+            self.stdout.write(
+                f"{endpoint:<36}{'-' if budget is None else budget:>7} {counts} "
+                f"{'/'.join(str(r) for r in redis):>9}  {','.join(map(str, statuses))}"
+                + (f"  FAIL: {'; '.join(problems)}" if problems else '')
+            )
+
+    def write_report(self, path, sizes, rows):
+        lines = [
+            '# Query budgets',
+            '',
+            'Generated by `python manage.py check_query_budgets --report`; budgets are',
+            'declared in `core/query_budgets.py`. Queries and Redis commands are per',
+            f'request, for fixtures of size {" / ".join(map(str, sizes))} (see the command for what',
+            'a size means), as a staff PRO user with a cold cache.',
+            '',
+            '| Endpoint | Path | Budget | Queries | Redis commands | Status |',
+            '|---|---|---|---|---|---|',
+        ]
+        for endpoint, route, budget, queries, redis, statuses, problems in rows:
+            lines.append(
+                f"| `{endpoint}` | `{route}` | {'-' if budget is None else budget} "
+                f"| {' / '.join(str(q) for q in queries)} | {' / '.join(str(r) for r in redis)} "
+                f"| {', '.join(map(str, statuses))}{' - ' + '; '.join(problems) if problems else ''} |"
+            )
+        Path(path).write_text('\n'.join(lines) + '\n')
+        self.stdout.write(f'Report written to {path}')
@@ -0,0 +1,401 @@
+"""
+Django management command to generate a production-scale dataset for performance testing
+Usage:
+    python manage.py generate_scale_data                                   # 2,000 users, ~1M answers
+    python manage.py generate_scale_data --users 100000 --attempts-per-user 1 --workers 4   # ~10M answers
+    python manage.py generate_scale_data --reset                           # delete a previous run first
+
+Generates users (with profiles), PRO subscriptions and payments, exams with
+sections and questions, attempts with answers, notifications and activity.
+Rows are written with multi-row INSERT statements (not the ORM) and explicit
+primary keys, in chunks of --chunk-size users; --workers processes load
+chunks in parallel. The output depends only on --seed and the size options
+(including --chunk-size), not on --workers.
+
+Answers follow a simple model: each user has a skill, each question a
+difficulty; users skip ~2-15% of questions and answer correctly with a
+probability that grows with skill and falls with difficulty. Attempt counts
+per user are exponentially distributed around --attempts-per-user (capped at
+500), so most users have a few attempts and a long tail has hundreds.
+
+Meant for local / staging databases only. Generated usernames start with
+--prefix (password 'scale-pass') and exams are named SCALE; --reset removes
+exactly those.
+"""
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from exams.models import Exam, Question, Section
+from payments.models import Payment, Plan, Subscription
+from results.models import Attempt, AttemptAnswer
+from users.models import Notification, Profile, User, UserActivity
+from utils.cache import bump_cache_version
+
+EXAM_NAME = 'SCALE'
+SECTION_NAMES = ['Mathematics', 'Statistics', 'Analytical Skills', 'Computer Concepts', 'IT Skills']
+MAX_ATTEMPTS_PER_USER = 500
+OPTIONS = 'ABCD'
+WRONG_OPTIONS = {option: [other for other in OPTIONS if other != option] for option in OPTIONS}
+
+NOTIFICATIONS = [
+    ('New mock test available', 'A new DCET mock test has been published. Try it now!'),
+    ('Your results are ready', 'Your latest exam results are available on the dashboard.'),
+    ('PRO plan offer', 'Unlock all PYQs, mock tests and video solutions with PRO.'),
+    ('Exam reminder', 'DCET is coming up soon. Keep practising!'),
+]
+ACTIVITIES = ['login', 'view_dashboard', 'start_exam', 'submit_exam', 'view_results', 'view_notes', 'view_pyqs']
+USER_AGENTS = [
+    'Mozilla/5.0 (Linux; Android 13; SM-A515F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+]
+
+# Rows per INSERT are also capped so that one statement has at most this many
+# parameters (SQLite's limit is 32766)
+MAX_PARAMS_PER_STATEMENT = 30000
+
+
+def insert_rows(cursor, model, fields, rows, batch_size):
+    """Multi-row INSERT of rows (tuples ordered like fields) into model's table"""
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(model._meta.get_field(name).column) for name in fields)
+    row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    head = f'INSERT INTO {qn(model._meta.db_table)} ({columns}) VALUES '
+    per_statement = max(1, min(batch_size, MAX_PARAMS_PER_STATEMENT // len(fields)))
+
+    for start in range(0, len(rows), per_statement):
+        batch = rows[start:start + per_statement]
+        cursor.execute(head + ', '.join([row_sql] * len(batch)), [value for row in batch for value in row])
+
+
+# Insert order: every table only references tables before it
+TABLES = [
+    ('users', User, ['id', 'username', 'email', 'phone', 'password_hash', 'email_verified',
+                     'is_staff', 'created_at', 'updated_at']),
+    ('profiles', Profile, ['user']),
+    ('payments', Payment, ['id', 'user', 'provider', 'provider_payment_id', 'order_id', 'amount',
+                           'currency', 'status', 'metadata', 'created_at', 'updated_at']),
+    ('subscriptions', Subscription, ['user', 'plan', 'payment', 'status', 'start_date', 'end_date',
+                                     'auto_renew', 'cancelled_at', 'created_at', 'updated_at']),
+    ('attempts', Attempt, ['id', 'user', 'exam', 'attempt_number', 'started_at', 'finished_at',
+                           'score', 'status', 'randomized_order']),
+    ('answers', AttemptAnswer, ['attempt', 'question', 'selected_option']),
+    ('notifications', Notification, ['user', 'title', 'message', 'is_read', 'created_at']),
+    ('activity', UserActivity, ['user', 'activity', 'ip_address', 'user_agent', 'created_at']),
+]
+
+
+class Chunk:
+    """One chunk of users and everything they own, generated from its own RNG"""
+
+    def __init__(self, plan, index, first_user, attempt_counts, first_attempt_id):
+        self.plan = plan
+        self.index = index
+        self.first_user = first_user
+        self.attempt_counts = attempt_counts
+        self.next_attempt_id = first_attempt_id
+        self.rng = random.Random(f"{plan['seed']}:{index}")
+        self.rows = {name: [] for name, _, _ in TABLES}
+        self.counts = dict.fromkeys(self.rows, 0)
+
+    def when(self, start, end):
+        """Random datetime in [start, end), adapted for the database"""
+        moment = start + (end - start) * self.rng.random()
+        return connection.ops.adapt_datetimefield_value(moment)
+
+    def flush(self, cursor):
+        for name, model, fields in TABLES:
+            insert_rows(cursor, model, fields, self.rows[name], self.plan['batch_size'])
+            self.counts[name] += len(self.rows[name])
+            self.rows[name] = []
+
+    def write(self, cursor):
+        plan, rng, rows = self.plan, self.rng, self.rows
+        anchor = plan['anchor']
+        year_ago = anchor - timedelta(days=365)
+
+        for offset, attempt_count in enumerate(self.attempt_counts):
+            number = self.first_user + offset
+            user_id = plan['first_user_id'] + number
+            username = f"{plan['prefix']}{number:07d}"
+            joined = year_ago + (anchor - year_ago) * rng.random()
+            joined_db = connection.ops.adapt_datetimefield_value(joined)
+            rows['users'].append((user_id, username, f'{username}@scale.invalid', None, plan['password_hash'],
+                                  rng.random() < 0.9, False, joined_db, joined_db))
+            rows['profiles'].append((user_id,))
+
+            # PRO users have an activated payment; a few others a failed one
+            is_pro = rng.random() < plan['pro_fraction']
+            if is_pro or rng.random() < 0.03:
+                payment_id = plan['first_payment_id'] + number
+                paid_at = self.when(joined, anchor)
+                rows['payments'].append((
+                    payment_id, user_id, 'razorpay', f"pay_{plan['prefix']}{number:07d}",
+                    f"order_{plan['prefix']}{number:07d}", plan['plan_price'], 'INR',
+                    'activated' if is_pro else 'failed', '{}', paid_at, paid_at,
+                ))
+                if is_pro:
+                    start = joined + (anchor - joined) * rng.random()
+                    end = start + timedelta(days=plan['plan_days'])
+                    start_db = connection.ops.adapt_datetimefield_value(start)
+                    rows['subscriptions'].append((
+                        user_id, plan['plan_id'], payment_id, 'active' if end > anchor else 'expired',
+                        start_db, connection.ops.adapt_datetimefield_value(end), False, None, start_db, start_db,
+                    ))
+
+            self.write_attempts(user_id, joined, attempt_count)
+
+            notifications = int(rng.expovariate(1 / plan['notifications_per_user'])) if plan['notifications_per_user'] else 0
+            for _ in range(notifications):
+                title, message = rng.choice(NOTIFICATIONS)
+                rows['notifications'].append((user_id, title, message, rng.random() < 0.6, self.when(joined, anchor)))
+
+            activity = int(rng.expovariate(1 / plan['activity_per_user'])) if plan['activity_per_user'] else 0
+            for _ in range(activity):
+                rows['activity'].append((
+                    user_id, rng.choice(ACTIVITIES),
+                    f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}',
+                    rng.choice(USER_AGENTS), self.when(joined, anchor),
+                ))
+
+            # Keep memory bounded for users with hundreds of attempts
+            if len(rows['answers']) >= plan['answer_buffer']:
+                self.flush(cursor)
+
+        self.flush(cursor)
+        return self.counts
+
+    def write_attempts(self, user_id, joined, attempt_count):
+        """Append one user's attempts and their answers"""
+        rng, plan = self.rng, self.plan
+        attempts, answers = self.rows['attempts'], self.rows['answers']
+        skill = rng.betavariate(2.5, 2)
+        answer_rate = 0.85 + 0.13 * rng.random()
+        attempt_numbers = {}
+
+        for _ in range(attempt_count):
+            exam_id = rng.choice(plan['exam_ids'])
+            attempt_numbers[exam_id] = attempt_numbers.get(exam_id, 0) + 1
+            attempt_id = self.next_attempt_id
+            self.next_attempt_id += 1
+
+            score = 0
+            random_ = rng.random
+            for question_id, correct_option, difficulty in plan['questions'][exam_id]:
+                if random_() > answer_rate:
+                    answers.append((attempt_id, question_id, None))
+                elif random_() < 0.25 + 0.7 * skill * (1.2 - difficulty):
+                    answers.append((attempt_id, question_id, correct_option))
+                    score += 1
+                else:
+                    answers.append((attempt_id, question_id, rng.choice(WRONG_OPTIONS[correct_option])))
+
+            started = joined + (plan['anchor'] - joined) * rng.random()
+            timed_out = rng.random() < 0.07
+            minutes = plan['duration_minutes'] if timed_out else rng.randint(40, plan['duration_minutes'])
+            attempts.append((
+                attempt_id, user_id, exam_id, attempt_numbers[exam_id],
+                connection.ops.adapt_datetimefield_value(started),
+                connection.ops.adapt_datetimefield_value(started + timedelta(minutes=minutes)),
+                score, 'timeout' if timed_out else 'submitted', '[]',
+            ))
+
+
+def load_chunk(plan, index, first_user, attempt_counts, first_attempt_id):
+    """Write one chunk in its own transaction (runs in worker processes)"""
+    started = time.monotonic()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            # Generated keys are consistent; skip per-row checks while loading
+            cursor.execute('SET SESSION foreign_key_checks = 0, unique_checks = 0')
+        counts = Chunk(plan, index, first_user, attempt_counts, first_attempt_id).write(cursor)
+        if connection.vendor == 'mysql':
+            cursor.execute('SET SESSION foreign_key_checks = 1, unique_checks = 1')
+    return index, counts, time.monotonic() - started
+
+
+def _next_id(model):
+    return (model.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = 'Generates a production-scale synthetic dataset for performance testing (local/staging only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Number of users (default: 2000)')
+        parser.add_argument('--exams', type=int, default=20, help='Number of exams (default: 20)')
+        parser.add_argument('--questions', type=int, default=100, help='Questions per exam (default: 100)')
+        parser.add_argument('--attempts-per-user', type=float, default=5,
+                            help='Mean attempts per user (default: 5)')
+        parser.add_argument('--notifications-per-user', type=float, default=5,
+                            help='Mean notifications per user (default: 5)')
+        parser.add_argument('--activity-per-user', type=float, default=20,
+                            help='Mean activity rows per user (default: 20)')
+        parser.add_argument('--pro-fraction', type=float, default=0.15,
+                            help='Share of users with a PRO subscription (default: 0.15)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Users per chunk / transaction (default: 1000)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT (default: 5000)')
+        parser.add_argument('--workers', type=int, default=1, help='Loader processes (default: 1)')
+        parser.add_argument('--prefix', default='scale_', help='Username prefix (default: scale_)')
+        parser.add_argument('--reset', action='store_true', help='Delete previously generated data first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['reset']:
+            self.reset(prefix)
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f"Users with prefix '{prefix}' already exist; use --reset or another --prefix")
+
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows one writer at a time; using 1 worker'))
+            workers = 1
+
+        started = time.monotonic()
+        rng = random.Random(options['seed'])
+        plan = self.build_plan(options, rng)
+
+        # Attempt ids are handed out contiguously, so each chunk needs to know
+        # how many attempts come before it
+        attempt_counts = [
+            min(MAX_ATTEMPTS_PER_USER, int(rng.expovariate(1 / options['attempts_per_user'])))
+            if options['attempts_per_user'] else 0
+            for _ in range(options['users'])
+        ]
+        chunk_size = options['chunk_size']
+        jobs = []
+        next_attempt_id = plan['first_attempt_id']
+        for index, first_user in enumerate(range(0, options['users'], chunk_size)):
+            counts = attempt_counts[first_user:first_user + chunk_size]
+            jobs.append((plan, index, first_user, counts, next_attempt_id))
+            next_attempt_id += sum(counts)
+
+        self.stdout.write(
+            f"Loading {options['users']} users, ~{sum(attempt_counts)} attempts, "
+            f"~{sum(attempt_counts) * options['questions']} answers in {len(jobs)} chunks, {workers} worker(s)"
+        )
+
+        totals = {}
+        if workers > 1:
+            # Children must not share the parent's database connection
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=connections.close_all) as pool:
+                futures = [pool.submit(load_chunk, *job) for job in jobs]
+                for future in futures:
+                    self.report(future.result(), len(jobs), totals)
+        else:
+            for job in jobs:
+                self.report(load_chunk(*job), len(jobs), totals)
+
+        elapsed = time.monotonic() - started
+        summary = ', '.join(f'{count} {name}' for name, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(f'Done in {elapsed:.0f}s: {summary}'))
+
+    def report(self, result, chunks, totals):
+        index, counts, seconds = result
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+        self.stdout.write(f"  chunk {index + 1}/{chunks}: {counts['answers']} answers in {seconds:.1f}s")
+
+    @transaction.atomic
+    def build_plan(self, options, rng):
+        """Create plan and exams, and everything the chunks need to know"""
+        plan_row = Plan.objects.filter(is_active=True).order_by('price_in_paisa').first()
+        if plan_row is None:
+            plan_row = Plan.objects.create(key='pro_yearly', name='PRO Plan', price_in_paisa=14900, duration_days=365)
+
+        Exam.objects.bulk_create([
+            Exam(name=EXAM_NAME, year=2000 + n, total_marks=options['questions'], duration_minutes=180,
+                 access_tier='PRO' if n % 3 == 0 else 'FREE', is_published=True)
+            for n in range(1, options['exams'] + 1)
+        ])
+        exams = list(Exam.objects.filter(name=EXAM_NAME).order_by('year'))
+
+        per_section = -(-options['questions'] // len(SECTION_NAMES))
+        Section.objects.bulk_create([
+            Section(exam=exam, name=name, order=order, max_marks=per_section)
+            for exam in exams for order, name in enumerate(SECTION_NAMES, start=1)
+        ])
+        questions = []
+        for section in Section.objects.filter(exam__in=exams).order_by('exam__year', 'order'):
+            count = min(per_section, options['questions'] - (section.order - 1) * per_section)
+            for number in range(1, count + 1):
+                a, b = rng.randint(2, 99), rng.randint(2, 99)
+                questions.append(Question(
+                    section=section, question_number=number,
+                    question_text=f'What is ${a} \\times {b}$?', plain_text=f'What is {a} x {b}?',
+                    option_a=str(a * b), option_b=str(a * b + a), option_c=str(a * b - b), option_d=str(a + b),
+                    correct_option=rng.choice(OPTIONS), marks=1,
+                ))
+        Question.objects.bulk_create(questions, batch_size=options['batch_size'])
+        # bulk_create sends no post_save, so the exam list cache isn't bumped
+        bump_cache_version('exams')
+
+        question_map = {exam.id: [] for exam in exams}
+        for question_id, exam_id, correct_option in (
+            Question.objects.filter(section__exam__in=exams)
+            .order_by('section__order', 'question_number')
+            .values_list('id', 'section__exam_id', 'correct_option')
+        ):
+            question_map[exam_id].append((question_id, correct_option, rng.random()))
+
+        return {
+            'seed': options['seed'],
+            'prefix': options['prefix'],
+            'anchor': timezone.now().replace(hour=0, minute=0, second=0, microsecond=0),
+            'batch_size': options['batch_size'],
+            'answer_buffer': options['batch_size'] * 20,
+            'password_hash': make_password('scale-pass'),
+            'pro_fraction': options['pro_fraction'],
+            'notifications_per_user': options['notifications_per_user'],
+            'activity_per_user': options['activity_per_user'],
+            'plan_id': plan_row.id,
+            'plan_price': plan_row.price_in_paisa,
+            'plan_days': plan_row.duration_days,
+            'exam_ids': [exam.id for exam in exams],
+            'questions': question_map,
+            'duration_minutes': 180,
+            'first_user_id': _next_id(User),
+            'first_payment_id': _next_id(Payment),
+            'first_attempt_id': _next_id(Attempt),
+        }
+
+    def reset(self, prefix):
+        """Delete generated users, everything they own, and the SCALE exams"""
+        qn = connection.ops.quote_name
+        users_sql, params = User.objects.filter(username__startswith=prefix).values('id').query.sql_with_params()
+        attempts_sql = f'SELECT id FROM {qn(Attempt._meta.db_table)} WHERE user_id IN ({users_sql})'
+        started = time.monotonic()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {qn(AttemptAnswer._meta.db_table)} WHERE attempt_id IN ({attempts_sql})', params
+            )
+            answers = cursor.rowcount
+            for model in (Attempt, Subscription, Payment, Notification, UserActivity, Profile):
+                cursor.execute(f'DELETE FROM {qn(model._meta.db_table)} WHERE user_id IN ({users_sql})', params)
+            # MySQL can't delete from a table it selects from unless the
+            # subquery is materialised as a derived table
+            cursor.execute(
+                f'DELETE FROM {qn(User._meta.db_table)} WHERE id IN (SELECT id FROM ({users_sql}) AS generated)', params
+            )
+            users = cursor.rowcount
+
+        Exam.objects.filter(name=EXAM_NAME).delete()
+        self.stdout.write(
+            f'Deleted {users} generated users and {answers} answers in {time.monotonic() - started:.0f}s'
+        )
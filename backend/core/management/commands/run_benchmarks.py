@@ -0,0 +1,264 @@
+"""
+Django management command to run the CPU-bound micro-benchmarks
+Usage:
+    python manage.py run_benchmarks                     # run and print
+    python manage.py run_benchmarks --compare           # fail on regressions vs the committed baseline
+    python manage.py run_benchmarks --save --repeat 25  # record a new committed baseline
+    python manage.py run_benchmarks --filter scoring --repeat 15
+
+Benchmarks scoring (results.scoring), the results payload, question key
+renaming, cache key hashing and the exam / attempt serializers against
+seeded in-memory fixtures of realistic size (100-question exam, a user with
+500 attempts). No database or Redis access is needed.
+
+Each benchmark runs a fixed number of loops per round; the best round is
+reported. Timings are also divided by a fixed pure-Python calibration
+workload timed the same way, and the comparison uses that relative figure,
+so a baseline recorded on one machine is usable on another. Record baselines
+with more rounds than comparisons use; on a busy machine, re-run before
+trusting a single regression.
+"""
+import gc
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'loadtest' / 'baselines' / 'microbenchmarks.json'
+
+QUESTIONS = 100
+SECTIONS = ['Mathematics', 'Statistics', 'Analytical Skills', 'Computer Concepts', 'IT Skills']
+ATTEMPTS = 500
+EXAMS = 20
+
+
+def _prefetched(instance, name, model, objects):
+    """Attach objects to instance as if loaded with prefetch_related(name)"""
+    queryset = model.objects.all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance._prefetched_objects_cache = {name: queryset}
+
+
+def build_fixtures(seed):
+    """Seeded, unsaved model instances shaped like production data"""
+    from exams.models import Exam, Question, Section
+    from results.models import Attempt, AttemptAnswer
+    from users.models import User
+
+    rng = random.Random(seed)
+    started = datetime(2025, 6, 1, 9, 0, tzinfo=timezone.utc)
+    user = User(id=1, username='student0001', email='student0001@example.com')
+
+    exam = Exam(
+        id=1, name='DCET', year=2025, total_marks=QUESTIONS, duration_minutes=180,
+        access_tier='FREE', is_published=True, created_at=started, updated_at=started,
+        solution_video_url='https://www.youtube.com/watch?v=example',
+    )
+    sections, questions = [], []
+    per_section = QUESTIONS // len(SECTIONS)
+    for order, name in enumerate(SECTIONS, start=1):
+        section = Section(id=order, exam=exam, name=name, order=order, max_marks=per_section)
+        section_questions = []
+        for number in range(1, per_section + 1):
+            a, b = rng.randint(2, 99), rng.randint(2, 99)
+            section_questions.append(Question(
+                id=len(questions) + len(section_questions) + 1,
+                section=section,
+                question_number=number,
+                question_text=f'If $f(x) = {a}x^2 + {b}x$, find $\\frac{{d}}{{dx}} f(x)$ at $x = {number}$. ' * 3,
+                plain_text=f'If f(x) = {a}x^2 + {b}x, find df/dx at x = {number}.',
+                option_a=f'${2 * a * number + b}$', option_b=f'${a * number + b}$',
+                option_c=f'${2 * a + b}$', option_d=f'${a + b * number}$',
+                correct_option=rng.choice('ABCD'), marks=1, diagram_url=None,
+                created_at=started,
+            ))
+        _prefetched(section, 'questions', Question, section_questions)
+        sections.append(section)
+        questions.extend(section_questions)
+    _prefetched(exam, 'sections', Section, sections)
+
+    attempt = Attempt(
+        id=1, user=user, exam=exam, status='submitted', started_at=started,
+        finished_at=started + timedelta(minutes=rng.randint(60, 180)),
+    )
+    # ~10% unanswered, otherwise a random option
+    answers = [
+        AttemptAnswer(attempt=attempt, question=question,
+                      selected_option=None if rng.random() < 0.1 else rng.choice('ABCD'))
+        for question in questions
+    ]
+
+    question_rows = [
+        {
+            'id': q.id, 'question_text': q.question_text, 'option_a': q.option_a,
+            'option_b': q.option_b, 'option_c': q.option_c, 'option_d': q.option_d,
+            'marks': q.marks, 'question_number': q.question_number,
+            'section__name': q.section.name, 'section__order': q.section.order,
+            'diagram_url': q.diagram_url,
+        }
+        for q in questions
+    ]
+
+    exams = [
+        Exam(id=i, name=f'DCET Mock {i}', year=2020 + i % 6, total_marks=100, duration_minutes=180,
+             access_tier=rng.choice(['FREE', 'PRO']), is_published=True,
+             created_at=started, updated_at=started)
+        for i in range(1, EXAMS + 1)
+    ]
+    attempts = []
+    for i in range(1, ATTEMPTS + 1):
+        past = Attempt(
+            id=i, user=user, exam=rng.choice(exams), status=rng.choice(['submitted', 'timeout']),
+            started_at=started - timedelta(days=i), score=rng.randint(0, 100),
+        )
+        past.finished_at = past.started_at + timedelta(minutes=rng.randint(30, 180))
+        past._answers_count = rng.randint(50, QUESTIONS)
+        attempts.append(past)
+
+    return {
+        'user': user, 'exam': exam, 'sections': sections, 'attempt': attempt,
+        'answers': answers, 'question_rows': question_rows, 'exams': exams, 'attempts': attempts,
+    }
+
+
+def build_cases(fixtures):
+    """[(name, loops, make_args, func)]; make_args builds one loop's arguments"""
+    from api.views_exam_timer import normalize_question_keys
+    from exams.serializers import ExamDetailSerializer, ExamListSerializer
+    from results.scoring import build_results_payload, score_answers
+    from results.serializers import AttemptSerializer
+    from utils.cache import generate_cache_key
+
+    f = fixtures
+    answers_args = (f['answers'],)
+    results_args = (f['attempt'], f['exam'], f['answers'], f['sections'], f['user'].username)
+    rows = f['question_rows']
+    cache_key_args = ('exams:list', 7, False, {'page': '2', 'search': 'dcet'})
+
+    return [
+        ('scoring.score_answers[100]', 2000, lambda: answers_args, score_answers),
+        ('scoring.build_results_payload[100]', 200, lambda: results_args, build_results_payload),
+        ('exam_timer.normalize_question_keys[100]', 500,
+         lambda: ([dict(row) for row in rows],), normalize_question_keys),
+        ('exam_timer.normalize_question_keys[100, cached]', 10000,
+         lambda: (normalize_question_keys([dict(row) for row in rows]),), normalize_question_keys),
+        ('cache.generate_cache_key', 20000, lambda: cache_key_args, generate_cache_key),
+        ('serializers.ExamListSerializer[20]', 200,
+         lambda: (f['exams'],), lambda exams: ExamListSerializer(exams, many=True).data),
+        ('serializers.ExamDetailSerializer[100]', 20,
+         lambda: (f['exam'],), lambda exam: ExamDetailSerializer(exam).data),
+        ('serializers.AttemptSerializer[500]', 5,
+         lambda: (f['attempts'],), lambda attempts: AttemptSerializer(attempts, many=True).data),
+    ]
+
+
+def _calibration_workload():
+    """Fixed mix of dict, string and sort work to normalise machine speed"""
+    rows = [{'id': i, 'name': f'item-{i}', 'value': i * 7 % 13} for i in range(500)]
+    rows.sort(key=lambda row: (row['value'], row['name']))
+    return sum(len(row['name']) for row in rows)
+
+
+def time_case(loops, make_args, func, repeat):
+    """(best, median) seconds per loop over repeat rounds"""
+    rounds = []
+    for _ in range(repeat):
+        args = [make_args() for _ in range(loops)]
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for call_args in args:
+                func(*call_args)
+            rounds.append((time.perf_counter() - started) / loops)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    return min(rounds), statistics.median(rounds)
+
+
+class Command(BaseCommand):
+    help = 'Runs the scoring / serialisation / cache micro-benchmarks and compares them to a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=7, help='Rounds per benchmark (default: 7)')
+        parser.add_argument('--seed', type=int, default=42, help='Fixture seed (default: 42)')
+        parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+        parser.add_argument(
+            '--save', nargs='?', const=str(DEFAULT_BASELINE), default=None,
+            help=f'Write results as a baseline (default path: {DEFAULT_BASELINE})'
+        )
+        parser.add_argument(
+            '--compare', nargs='?', const=str(DEFAULT_BASELINE), default=None,
+            help='Compare with a baseline and fail on regressions (default: the committed baseline)'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed slowdown relative to the baseline (default: 0.25 = 25%%)'
+        )
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        calibration, _ = time_case(1000, tuple, _calibration_workload, repeat)
+        cases = [case for case in build_cases(build_fixtures(options['seed'])) if options['filter'] in case[0]]
+
+        results = {}
+        self.stdout.write(f"{'benchmark':<50}{'best us':>12}{'median us':>12}")
+        for name, loops, make_args, func in cases:
+            best, median = time_case(loops, make_args, func, repeat)
+            results[name] = {
+                'loops': loops,
+                'best_us': round(best * 1_000_000, 2),
+                'median_us': round(median * 1_000_000, 2),
+            }
+            self.stdout.write(f"{name:<50}{results[name]['best_us']:>12.1f}{results[name]['median_us']:>12.1f}")
+
+        # Timed again at the end: the faster of the two is the least disturbed
+        calibration = min(calibration, time_case(1000, tuple, _calibration_workload, repeat)[0])
+        for result in results.values():
+            result['relative'] = round(result['best_us'] / 1_000_000 / calibration, 5)
+
+        if options['save']:
+            self.save(options['save'], calibration, results)
+        if options['compare']:
+            self.compare(options['compare'], results, options['tolerance'])
+
+    def save(self, path, calibration, results):
+        baseline = {
+            'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'calibration_us': round(calibration * 1_000_000, 2),
+            'benchmarks': results,
+        }
+        Path(path).write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
+
+    def compare(self, path, results, tolerance):
+        try:
+            baseline = json.loads(Path(path).read_text())['benchmarks']
+        except FileNotFoundError:
+            raise CommandError(f'No baseline at {path}; record one with --save')
+
+        regressions = []
+        self.stdout.write(f"\nCompared with {path} (relative timings, tolerance {tolerance:.0%})")
+        for name, result in results.items():
+            if name not in baseline:
+                self.stdout.write(f'{name:<50} new')
+                continue
+            change = result['relative'] / baseline[name]['relative'] - 1
+            verdict = 'REGRESSED' if change > tolerance else 'ok'
+            if change > tolerance:
+                regressions.append(name)
+            self.stdout.write(f'{name:<50}{change:>+10.1%}  {verdict}')
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS('No regressions'))
@@ -0,0 +1,107 @@
+"""
+Django management command to run a local stand-in for an OpenTelemetry collector
+Usage:
+    python manage.py run_trace_collector
+    python manage.py run_trace_collector --port 4318 --output /tmp/traces.jsonl
+
+Accepts OTLP/HTTP JSON on POST /v1/traces (what core.tracing sends with
+TRACING_EXPORTER=otlp) and appends the spans to a JSON-lines file in the
+format of the 'jsonl' exporter, so `manage.py trace_summary` reads either.
+Only for development: no protobuf, no auth, one process.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# OTLP SpanKind, for spans not sent by core.tracing
+OTLP_KINDS = {1: 'internal', 2: 'server', 3: 'client', 4: 'producer', 5: 'consumer'}
+
+
+def _value(value):
+    for key in ('stringValue', 'boolValue', 'doubleValue'):
+        if key in value:
+            return value[key]
+    if 'intValue' in value:
+        return int(value['intValue'])
+    return json.dumps(value)
+
+
+def flatten(body):
+    """Spans of an OTLP ExportTraceServiceRequest in the 'jsonl' exporter format"""
+    for resource_spans in body.get('resourceSpans', []):
+        for scope_spans in resource_spans.get('scopeSpans', []):
+            for span in scope_spans.get('spans', []):
+                attributes = {a['key']: _value(a.get('value', {})) for a in span.get('attributes', [])}
+                start, end = int(span['startTimeUnixNano']), int(span['endTimeUnixNano'])
+                status = span.get('status', {})
+                yield {
+                    'trace_id': span['traceId'],
+                    'span_id': span['spanId'],
+                    'parent_id': span.get('parentSpanId') or None,
+                    'name': span['name'],
+                    'kind': attributes.pop('span.kind', OTLP_KINDS.get(span.get('kind'), 'internal')),
+                    'start_unix_nano': start,
+                    'duration_ms': round((end - start) / 1_000_000, 3),
+                    'error': status.get('message', 'error') if status.get('code') == 2 else None,
+                    'attributes': attributes,
+                }
+
+
+class Command(BaseCommand):
+    help = 'Runs a local OTLP/HTTP JSON trace collector that writes spans to a JSON-lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=4318, help='Port to listen on (default: 4318)')
+        parser.add_argument('--output', default=settings.TRACING_JSONL_PATH,
+                            help=f'JSON-lines file to append spans to (default: {settings.TRACING_JSONL_PATH})')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        lock = threading.Lock()
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != '/v1/traces':
+                    return self._reply(404, {'error': 'not found'})
+                if not self.headers.get('Content-Type', '').startswith('application/json'):
+                    return self._reply(415, {'error': 'only OTLP/HTTP JSON is supported'})
+                try:
+                    body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    spans = list(flatten(body))
+                except (ValueError, KeyError) as e:
+                    return self._reply(400, {'error': str(e)})
+
+                with lock:
+                    with open(output, 'a') as f:
+                        f.write(''.join(json.dumps(span) + '\n' for span in spans))
+                    for span in spans:
+                        if span['kind'] == 'server':
+                            stdout.write(f"{span['trace_id']}  {span['duration_ms']:>9.1f} ms  {span['name']}")
+                self._reply(200, {})
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Collecting traces on http://{options['host']}:{options['port']}/v1/traces into {output}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
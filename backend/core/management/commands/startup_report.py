@@ -0,0 +1,209 @@
+"""
+Django management command to report what a worker's boot costs
+Usage:
+    python manage.py startup_report
+    python manage.py startup_report --top 40
+    python manage.py startup_report --json > startup.json
+
+Boots the project in a fresh interpreter (python -X importtime), the way
+gunicorn's master does with preload_app: settings, django.setup() (timing
+each app's ready()), the ASGI application (middleware) and the URLconf.
+Reports the time of each phase and each ready(), the packages and modules
+that cost most to import and which package pulled each heavy package in,
+and anything opened during boot (sockets, database connections, requests
+sessions). Those would be inherited by every forked worker, so there should
+be none.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MARKER = 'STARTUP_REPORT '
+
+# Runs in the child interpreter; prints one MARKER line of JSON
+BOOTSTRAP = r'''
+import gc, importlib, json, socket, sys, time
+
+connects = []
+_connect = socket.socket.connect
+def _recording_connect(self, address):
+    connects.append(repr(address))
+    return _connect(self, address)
+socket.socket.connect = _recording_connect
+
+phases = {}
+started = time.perf_counter()
+
+def phase(name, since):
+    now = time.perf_counter()
+    phases[name] = round((now - since) * 1000, 1)
+    return now
+
+from django.conf import settings
+settings.INSTALLED_APPS
+t = phase('settings', started)
+
+from django.apps.config import AppConfig
+ready_ms = {}
+_create = AppConfig.create.__func__
+def _timed_create(cls, entry):
+    app_config = _create(cls, entry)
+    ready = app_config.ready
+    def timed_ready():
+        began = time.perf_counter()
+        ready()
+        ready_ms[app_config.label] = round((time.perf_counter() - began) * 1000, 1)
+    app_config.ready = timed_ready
+    return app_config
+AppConfig.create = classmethod(_timed_create)
+
+import django
+django.setup()
+t = phase('django.setup', t)
+
+module, _, name = APPLICATION.rpartition('.')
+getattr(importlib.import_module(module), name)
+t = phase('application', t)
+
+from django.urls import get_resolver
+get_resolver().reverse_dict
+t = phase('urlconf', t)
+phases['total'] = round((t - started) * 1000, 1)
+
+from django.db import connections
+open_connections = [alias for alias in connections if connections[alias].connection is not None]
+sessions = 0
+if 'requests' in sys.modules:
+    Session = sys.modules['requests'].Session
+    sessions = sum(1 for obj in gc.get_objects() if isinstance(obj, Session))
+
+print(MARKER + json.dumps({
+    'phases': phases,
+    'ready_ms': ready_ms,
+    'connects': connects,
+    'db_connections': open_connections,
+    'requests_sessions': sessions,
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """[(depth, module, self us, cumulative us)] in the order Python printed them"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def package_costs(rows):
+    """{top-level package: {self_ms, modules, imported_by}}"""
+    packages = defaultdict(lambda: {'self_ms': 0.0, 'modules': 0, 'imported_by': None})
+    for index, (depth, module, self_us, _) in enumerate(rows):
+        package = module.split('.')[0]
+        data = packages[package]
+        data['self_ms'] += self_us / 1000
+        data['modules'] += 1
+        if data['imported_by'] is None:
+            data['imported_by'] = _importer(rows, index, package)
+    return packages
+
+
+def _importer(rows, index, package):
+    """
+    Module of another package that imported rows[index], or '(run time)' when
+    it was imported by a function (e.g. a ready() or install()) rather than
+    by another module's top level
+    """
+    depth = rows[index][0]
+    # Nested imports are printed before their importer, so the importer is
+    # the next line that is less indented
+    for parent_depth, parent, _, _ in rows[index + 1:]:
+        if parent_depth < depth:
+            depth = parent_depth
+            if parent.split('.')[0] != package:
+                return parent
+            if depth == 0:
+                break
+    return '(run time)'
+
+
+class Command(BaseCommand):
+    help = 'Reports import and initialisation cost of booting the project, and anything opened during boot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20, help='Packages and modules to list (default: 20)')
+        parser.add_argument(
+            '--application', default=getattr(settings, 'ASGI_APPLICATION', None) or 'config.asgi.application',
+            help='Application gunicorn loads (default: config.asgi.application)'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+
+    def handle(self, *args, **options):
+        code = f'MARKER = {MARKER!r}\nAPPLICATION = {options["application"]!r}\n' + BOOTSTRAP
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        report_line = next((line for line in result.stdout.splitlines() if line.startswith(MARKER)), None)
+        if result.returncode != 0 or report_line is None:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError('Boot failed:\n' + '\n'.join(errors[-20:]))
+
+        report = json.loads(report_line[len(MARKER):])
+        rows = parse_importtime(result.stderr)
+        packages = package_costs(rows)
+        report['import_ms'] = round(sum(row[2] for row in rows) / 1000, 1)
+        report['packages'] = sorted(
+            ({'package': name, **data, 'self_ms': round(data['self_ms'], 1)} for name, data in packages.items()),
+            key=lambda data: -data['self_ms'],
+        )
+        report['modules'] = [
+            {'module': module, 'self_ms': round(self_us / 1000, 1), 'cumulative_ms': round(cumulative_us / 1000, 1)}
+            for _, module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])
+        ]
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.print_report(report, options['top'])
+
+    def print_report(self, report, top):
+        self.stdout.write('Boot phases (ms)')
+        for phase, ms in report['phases'].items():
+            self.stdout.write(f'  {phase:<28}{ms:>10.1f}')
+        self.stdout.write(f"  {'(of which imports)':<28}{report['import_ms']:>10.1f}")
+
+        self.stdout.write('\nAppConfig.ready() (ms)')
+        for label, ms in sorted(report['ready_ms'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f'  {label:<28}{ms:>10.1f}')
+
+        self.stdout.write(f"\nImports by package (self time)\n  {'package':<28}{'ms':>8}{'modules':>9}  first imported by")
+        for data in report['packages'][:top]:
+            self.stdout.write(
+                f"  {data['package']:<28}{data['self_ms']:>8.1f}{data['modules']:>9}  {data['imported_by'] or '-'}"
+            )
+
+        self.stdout.write(f"\nSlowest modules\n  {'module':<50}{'self ms':>9}{'cumul. ms':>11}")
+        for data in report['modules'][:top]:
+            self.stdout.write(f"  {data['module']:<50}{data['self_ms']:>9.1f}{data['cumulative_ms']:>11.1f}")
+
+        opened = [f'socket connect to {address}' for address in report['connects']]
+        opened += [f'database connection {alias!r}' for alias in report['db_connections']]
+        if report['requests_sessions']:
+            opened.append(f"{report['requests_sessions']} requests session(s)")
+        if opened:
+            self.stdout.write(self.style.WARNING(
+                '\nOpened during boot (inherited by every forked worker):\n  ' + '\n  '.join(opened)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nNothing opened during boot'))
@@ -0,0 +1,102 @@
+"""
+Django management command to summarise exported request traces
+Usage:
+    python manage.py trace_summary
+    python manage.py trace_summary --file /tmp/traces.jsonl --percentile 95
+    python manage.py trace_summary --endpoint exam_submit --slowest 5
+
+Reads spans written by core.tracing's 'jsonl' exporter (or
+run_trace_collector) and prints, per endpoint, latency percentiles and where
+the time of the requests at or above the chosen percentile went: SQL, Redis,
+outbound HTTP, and the rest (Python in views, serializers and middleware).
+"""
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+KINDS = ('db', 'redis', 'http')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    return values[max(math.ceil(pct / 100 * len(values)) - 1, 0)]
+
+
+def load_traces(path):
+    """{trace id: [span dict]}"""
+    traces = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span['trace_id']].append(span)
+    return traces
+
+
+def breakdown(spans):
+    """(server span, {kind: (ms, count)}) of one trace"""
+    server = next((s for s in spans if s['kind'] == 'server'), None)
+    totals = {kind: [0.0, 0] for kind in KINDS}
+    for span in spans:
+        if span['kind'] in totals:
+            totals[span['kind']][0] += span['duration_ms']
+            totals[span['kind']][1] += 1
+    return server, totals
+
+
+class Command(BaseCommand):
+    help = 'Summarises traced requests: latency percentiles and the time spent in SQL, Redis and HTTP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.TRACING_JSONL_PATH,
+                            help=f'JSON-lines span file (default: {settings.TRACING_JSONL_PATH})')
+        parser.add_argument('--percentile', type=float, default=99,
+                            help='Break down requests at or above this latency percentile (default: 99)')
+        parser.add_argument('--endpoint', default='', help='Only endpoints whose name contains this')
+        parser.add_argument('--min-count', type=int, default=1,
+                            help='Skip endpoints with fewer traced requests (default: 1)')
+        parser.add_argument('--slowest', type=int, default=0,
+                            help='Also list the N slowest traces per endpoint with their slowest spans')
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f'No spans at {path}; set TRACING_ENABLED=True or pass --file')
+
+        by_endpoint = defaultdict(list)
+        for spans in load_traces(path).values():
+            server, totals = breakdown(spans)
+            if server is not None and options['endpoint'] in server['name']:
+                by_endpoint[server['name']].append((server['duration_ms'], totals, spans))
+
+        pct = options['percentile']
+        self.stdout.write(f'Latencies in ms; sql / redis / http / other are means over requests at or above p{pct:g}')
+        self.stdout.write(
+            f"{'endpoint':<45}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}  |{'sql':>8}{'redis':>8}{'http':>8}{'other':>8}"
+        )
+        for endpoint, requests in sorted(by_endpoint.items(), key=lambda item: -len(item[1])):
+            if len(requests) < options['min_count']:
+                continue
+            requests.sort(key=lambda request: request[0])
+            durations = [duration for duration, _, _ in requests]
+            threshold = percentile(durations, pct)
+            tail = [request for request in requests if request[0] >= threshold]
+
+            means = {kind: sum(totals[kind][0] for _, totals, _ in tail) / len(tail) for kind in KINDS}
+            other = sum(duration for duration, _, _ in tail) / len(tail) - sum(means.values())
+            self.stdout.write(
+                f"{endpoint:<45}{len(requests):>6}{percentile(durations, 50):>9.1f}"
+                f"{percentile(durations, 95):>9.1f}{percentile(durations, 99):>9.1f}  |"
+                f"{means['db']:>8.1f}{means['redis']:>8.1f}{means['http']:>8.1f}{max(other, 0):>8.1f}"
+            )
+            for duration, totals, spans in reversed(requests[-options['slowest']:] if options['slowest'] else []):
+                counts = ', '.join(f"{totals[kind][1]} {kind}" for kind in KINDS)
+                self.stdout.write(f"    {spans[0]['trace_id']}  {duration:.1f} ms  ({counts})")
+                children = sorted((s for s in spans if s['kind'] != 'server'), key=lambda s: -s['duration_ms'])
+                for span in children[:5]:
+                    statement = span['attributes'].get('db.statement') or span['attributes'].get('http.url', '')
+                    self.stdout.write(f"        {span['duration_ms']:>8.1f} ms  {span['name']}  {statement[:100]}")
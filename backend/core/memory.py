@@ -0,0 +1,229 @@
+"""
+Worker memory-growth diagnostics.
+
+Gunicorn recycles workers every max_requests requests in case something
+leaks. This shows whether memory actually grows, and where, so the limit can
+be raised without guessing.
+
+- RSS per endpoint: MemoryDiagnosticsMiddleware reads the worker's resident
+  set size before and after each request and adds any growth to the
+  endpoint (memory_growth_bytes_total in /metrics, and the worker report).
+  Concurrent requests in one worker share its RSS, so a single request's
+  figure is approximate; a leaking endpoint keeps accumulating growth over
+  thousands of requests while the others level off once caches are warm.
+- Allocation sites: with MEMORY_TRACEMALLOC_FRAMES > 0, tracemalloc runs in
+  every worker and each snapshot is compared with the worker's first
+  snapshot and with the previous one; the sites that grew most are reported
+  with their tracebacks. tracemalloc slows allocation-heavy code and costs
+  memory itself, so enable it on one instance or for a limited time.
+
+Every MEMORY_SNAPSHOT_INTERVAL_SECONDS a background thread per worker takes
+the snapshot and publishes the worker's report to Redis, where
+GET /api/admin/memory/ reads every worker's report. `kill -USR2 <worker pid>`
+makes a worker log its report straight away (the handler is installed by
+gunicorn.conf.py's post_worker_init).
+"""
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .metrics import format_labels, metrics
+from .profiling import short_path
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = 'memory:workers'
+
+TOP_SITES = 20
+TOP_ENDPOINTS = 20
+RSS_SAMPLES = 48
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def rss_bytes():
+    """Resident set size of this process"""
+    try:
+        # Opened each time: /proc/self is resolved at open, and workers are forked
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # Not Linux: the stdlib only has the peak (KiB, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _sites(stats):
+    return [
+        {
+            'size_diff_bytes': stat.size_diff,
+            'size_bytes': stat.size,
+            'count_diff': stat.count_diff,
+            'traceback': [f"{short_path(frame.filename)}:{frame.lineno}" for frame in reversed(stat.traceback)],
+        }
+        for stat in stats[:TOP_SITES]
+        if stat.size_diff > 0
+    ]
+
+
+class MemoryTracker:
+    """Memory growth of this worker; state is reset in each forked worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._wake = threading.Event()
+        self._dump_requested = False
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    def ensure_started(self):
+        """Start tracking in this process (cheap once started)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.started_at = timezone.now()
+            self.start_rss = rss_bytes()
+            self.requests = 0
+            # endpoint -> [requests, requests that grew RSS, bytes grown]
+            self.endpoints = {}
+            self.rss_samples = deque(maxlen=RSS_SAMPLES)
+            self.first_snapshot = None
+            self.previous_snapshot = None
+            self.sites_since_start = []
+            self.sites_since_previous = []
+            if settings.MEMORY_TRACEMALLOC_FRAMES > 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(settings.MEMORY_TRACEMALLOC_FRAMES)
+            threading.Thread(target=self._run, name='memory-diagnostics', daemon=True).start()
+            self._pid = os.getpid()
+
+    def record(self, endpoint, before, after):
+        """Count one request and the RSS growth seen while it was served"""
+        growth = after - before
+        with self._lock:
+            self.requests += 1
+            counts = self.endpoints.setdefault(endpoint, [0, 0, 0])
+            counts[0] += 1
+            if growth > 0:
+                counts[1] += 1
+                counts[2] += growth
+        if growth > 0 and settings.METRICS_ENABLED:
+            metrics.inc('memory_growth_bytes_total', format_labels(endpoint=endpoint), growth)
+
+    def request_dump(self, signum=None, frame=None):
+        """Log the report from the background thread; safe in a signal handler"""
+        self._dump_requested = True
+        self._wake.set()
+
+    def _run(self):
+        self._take_snapshot()
+        while True:
+            self._wake.wait(settings.MEMORY_SNAPSHOT_INTERVAL_SECONDS)
+            self._wake.clear()
+            try:
+                self._take_snapshot()
+                report = self.report()
+                self.publish(report)
+                if self._dump_requested:
+                    self._dump_requested = False
+                    logger.warning(f"Memory report: {json.dumps(report)}")
+            except Exception as e:
+                logger.warning(f"Failed to take memory snapshot: {str(e)}")
+
+    def _take_snapshot(self):
+        self.rss_samples.append((timezone.now().isoformat(timespec='seconds'), rss_bytes()))
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        if self.first_snapshot is None:
+            self.first_snapshot = snapshot
+        else:
+            self.sites_since_start = _sites(snapshot.compare_to(self.first_snapshot, 'traceback'))
+            self.sites_since_previous = _sites(snapshot.compare_to(self.previous_snapshot, 'traceback'))
+        self.previous_snapshot = snapshot
+
+    def report(self):
+        """This worker's memory growth so far"""
+        rss = rss_bytes()
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda item: -item[1][2])[:TOP_ENDPOINTS]
+            requests = self.requests
+        traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+        return {
+            'pid': os.getpid(),
+            'started_at': self.started_at.isoformat(),
+            'updated_at': timezone.now().isoformat(),
+            'requests': requests,
+            'rss_bytes': rss,
+            'rss_growth_bytes': rss - self.start_rss,
+            'rss_growth_per_1000_requests': round((rss - self.start_rss) / requests * 1000) if requests else None,
+            'rss_samples': list(self.rss_samples),
+            'endpoints': [
+                {'endpoint': endpoint, 'requests': count, 'requests_grown': grown, 'growth_bytes': growth}
+                for endpoint, (count, grown, growth) in endpoints
+            ],
+            'tracemalloc': {
+                'frames': tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+                'traced_bytes': traced,
+                'traced_peak_bytes': traced_peak,
+                'sites_since_start': self.sites_since_start,
+                'sites_since_previous': self.sites_since_previous,
+            },
+        }
+
+    def publish(self, report):
+        ttl = settings.MEMORY_SNAPSHOT_INTERVAL_SECONDS * 3
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(f"memory:worker:{report['pid']}", json.dumps(report), ex=ttl)
+        pipe.zadd(INDEX_KEY, {report['pid']: now})
+        pipe.zremrangebyscore(INDEX_KEY, 0, now - ttl)
+        pipe.expire(INDEX_KEY, ttl)
+        pipe.execute()
+
+    def worker_reports(self):
+        """Latest published report of every live worker, most grown first"""
+        pids = [pid.decode() for pid in self.redis.zrangebyscore(
+            INDEX_KEY, time.time() - settings.MEMORY_SNAPSHOT_INTERVAL_SECONDS * 3, '+inf'
+        )]
+        if not pids:
+            return []
+        reports = [json.loads(r) for r in self.redis.mget([f"memory:worker:{pid}" for pid in pids]) if r]
+        return sorted(reports, key=lambda report: -report['rss_growth_bytes'])
+
+
+memory_tracker = MemoryTracker()
+
+
+def install_signal_handler():
+    """Log this worker's report on SIGUSR2; call from the worker's main thread"""
+    memory_tracker.ensure_started()
+    signal.signal(signal.SIGUSR2, memory_tracker.request_dump)
@@ -0,0 +1,146 @@
+"""
+Prometheus-compatible metrics aggregated across gunicorn workers.
+
+Each worker adds to local counters while serving requests (cheap, no I/O)
+and flushes them to Redis at most every METRICS_FLUSH_INTERVAL_SECONDS with
+one pipelined round trip. Redis holds one hash per metric whose fields are
+the Prometheus label strings, so the scrape endpoint renders the sum over
+all workers without talking to them.
+
+Only counters and histograms are supported; both are monotonic, so adding
+up per-worker deltas is exact. Prometheus' rate() handles resets if Redis
+is flushed.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'metrics:'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by endpoint', LATENCY_BUCKETS),
+    'http_response_size_bytes_total': ('counter', 'Response body bytes by endpoint', None),
+    'db_queries_per_request': ('histogram', 'Database queries per request by endpoint', QUERY_COUNT_BUCKETS),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries by endpoint', None),
+    'redis_commands_total': ('counter', 'Redis commands by endpoint', None),
+    'redis_command_duration_seconds_total': ('counter', 'Time spent in Redis commands by endpoint', None),
+    'cache_requests_total': ('counter', 'Django cache lookups by namespace and result (hit/miss)', None),
+    'local_cache_requests_total': ('counter', 'Per-worker cache lookups by namespace and result (core/local_cache.py)', None),
+    'local_cache_evictions_total': ('counter', 'Per-worker cache evictions by reason (size/ttl/invalidated)', None),
+    'memory_growth_bytes_total': ('counter', 'Worker RSS growth seen while serving requests, by endpoint', None),
+    'worker_warmup_duration_seconds': ('histogram', 'Worker warm-up time by step (core/warmup.py)', LATENCY_BUCKETS),
+}
+
+
+def format_labels(**labels):
+    """Prometheus label string, e.g. 'endpoint="exam-list",method="GET"'"""
+    parts = []
+    for name, value in sorted(labels.items()):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return ','.join(parts)
+
+
+class MetricsRegistry:
+    """Per-worker pending increments, flushed to Redis"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self._last_flush = time.monotonic()
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    def inc(self, name, labels, value=1):
+        """Add value to a counter; labels is a format_labels() string"""
+        with self._lock:
+            self._pending[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        """Record one histogram observation"""
+        buckets = METRICS[name][2]
+        bucket = next((str(b) for b in buckets if value <= b), '+Inf')
+        with self._lock:
+            self._pending[(name, f"{labels}|{bucket}")] += 1
+            self._pending[(name, f"{labels}|sum")] += value
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL_SECONDS:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for (name, field), value in pending.items():
+                pipe.hincrbyfloat(KEY_PREFIX + name, field, value)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to flush {len(pending)} metric samples: {str(e)}")
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        self.flush()
+        pipe = self.redis.pipeline(transaction=False)
+        for name in METRICS:
+            pipe.hgetall(KEY_PREFIX + name)
+        stored = pipe.execute()
+
+        lines = []
+        for (name, (metric_type, help_text, buckets)), fields in zip(METRICS.items(), stored):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            fields = {field.decode(): float(value) for field, value in fields.items()}
+            if metric_type == 'counter':
+                for labels, value in sorted(fields.items()):
+                    lines.append(f"{name}{{{labels}}} {_number(value)}")
+            else:
+                lines.extend(_render_histogram(name, buckets, fields))
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _render_histogram(name, buckets, fields):
+    """Cumulative _bucket, _sum and _count lines from per-bucket counts"""
+    series = defaultdict(dict)
+    for field, value in fields.items():
+        labels, _, part = field.rpartition('|')
+        series[labels][part] = value
+
+    lines = []
+    for labels, parts in sorted(series.items()):
+        sep = ',' if labels else ''
+        cumulative = 0
+        for bucket in [str(b) for b in buckets] + ['+Inf']:
+            cumulative += parts.get(bucket, 0)
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bucket}"}} {_number(cumulative)}')
+        lines.append(f"{name}_sum{{{labels}}} {_number(parts.get('sum', 0))}")
+        lines.append(f"{name}_count{{{labels}}} {_number(cumulative)}")
+    return lines
+
+
+metrics = MetricsRegistry()
@@ -1,10 +1,21 @@
 """
-Custom middleware for subscription management and security
+Custom middleware for subscription management, security, load shedding,
+request metrics, profiling, tracing and memory diagnostics
 """
 import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils import timezone
 from django.http import JsonResponse
 
+from .instrumentation import endpoint_name, record_request, track_request
+from .load_shedding import CRITICAL, classify, load_shedder, queue_delay_ms
+from .memory import memory_tracker, rss_bytes
+from .profiling import profile_request, profiling_trigger
+from .tracing import TRACE_ID_HEADER, trace_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -120,3 +131,143 @@ class ActiveExamSessionMiddleware:
             return request_session_token == stored_session_token
         
         return False
+
+
+class LoadSheddingMiddleware:
+    """
+    Shed low-priority requests with 503 when this worker is overloaded
+    (see core/load_shedding.py)
+    
+    Async-capable so that under ASGI it counts requests still waiting for
+    Django's sync thread, which is where the queue builds up.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        
+        tier, rejection = self.enter(request)
+        if rejection:
+            return rejection
+        try:
+            return self.get_response(request)
+        finally:
+            load_shedder.exit(tier)
+    
+    async def __acall__(self, request):
+        tier, rejection = self.enter(request)
+        if rejection:
+            return rejection
+        try:
+            return await self.get_response(request)
+        finally:
+            load_shedder.exit(tier)
+    
+    @staticmethod
+    def enter(request):
+        tier = classify(request.path)
+        if not settings.LOAD_SHEDDING_ENABLED:
+            tier = CRITICAL
+        
+        reason = load_shedder.enter(tier, queue_delay_ms(request))
+        if not reason:
+            return tier, None
+        
+        logger.info(f"Shed {tier} request {request.method} {request.path} ({reason})")
+        retry_after = settings.LOAD_SHEDDING_RETRY_AFTER_SECONDS
+        response = JsonResponse({
+            'success': False,
+            'error': 'The server is busy right now. Please try again in a few seconds.',
+            'retry_after': retry_after,
+        }, status=503)
+        response['Retry-After'] = str(retry_after)
+        return tier, response
+
+
+class RequestTracingMiddleware:
+    """
+    Trace a sampled fraction of requests across the view, SQL, Redis and
+    outbound HTTP (see core/tracing.py)
+    """
+    
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        with trace_request(request) as root:
+            response = self.get_response(request)
+            if root is not None:
+                root.attributes['http.status_code'] = response.status_code
+                response[TRACE_ID_HEADER] = root.trace.trace_id
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, response size and DB/Redis work per endpoint
+    (see core/instrumentation.py and core/metrics.py)
+    """
+    
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        with track_request() as stats:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - started
+        
+        try:
+            record_request(request, response, duration, stats)
+        except Exception as e:
+            logger.warning(f"Failed to record request metrics: {str(e)}")
+        return response
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile requests a staff user asks for with X-Profile: 1, and a sampled
+    fraction of all requests (see core/profiling.py)
+    """
+    
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        trigger = profiling_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return profile_request(request, self.get_response, trigger)
+
+
+class MemoryDiagnosticsMiddleware:
+    """
+    Attribute worker RSS growth to endpoints (see core/memory.py)
+    """
+    
+    def __init__(self, get_response):
+        if not settings.MEMORY_DIAGNOSTICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        memory_tracker.ensure_started()
+        before = rss_bytes()
+        response = self.get_response(request)
+        memory_tracker.record(endpoint_name(request), before, rss_bytes())
+        return response
@@ -0,0 +1,41 @@
+"""
+Keyset (cursor) pagination for per-user and admin history endpoints.
+
+Pages are selected with WHERE <ordering field> < <cursor position> on an
+indexed (user_id, created_at) style ordering instead of OFFSET, so fetching
+page 100 costs the same as page 1 and memory use is bounded by page size.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Newest-first cursor pagination.
+
+    Query params:
+    - cursor: Opaque cursor from the previous response's next/previous link
+    - page_size: Items per page (default: 20, max: 100)
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    ordering = ('-created_at', '-id')
+
+
+class AttemptKeysetPagination(KeysetPagination):
+    """Attempts are ordered by start time"""
+
+    ordering = ('-started_at', '-id')
+
+
+def paginate(request, queryset, view=None, pagination_class=KeysetPagination):
+    """
+    Paginate a queryset inside a function-based view.
+
+    Returns:
+        tuple: (page items, {'next': url, 'previous': url})
+    """
+    paginator = pagination_class()
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    return page, {'next': paginator.get_next_link(), 'previous': paginator.get_previous_link()}
@@ -0,0 +1,129 @@
+"""
+Route-aware middleware pipelines.
+
+The JSON API authenticates with JWT inside DRF, so sessions, CSRF, messages,
+session auth and clickjacking headers do nothing for it but cost time on
+every request. RoutedMiddleware sits in settings.MIDDLEWARE and runs a
+different chain per URL prefix, taken from settings.MIDDLEWARE_PIPELINES:
+
+    MIDDLEWARE_PIPELINES = {
+        '': [...full stack...],          # default, e.g. /admin/
+        '/api/': [...lean stack...],
+    }
+
+The longest matching prefix wins. A key ending in '$' matches only that
+exact path ('/metrics$' matches /metrics but not /metricsX). Each chain is built the way Django builds
+MIDDLEWARE, and the chain's process_view / process_exception /
+process_template_response hooks are called for requests routed to it, so
+middleware like CsrfViewMiddleware behaves exactly as if it were listed in
+MIDDLEWARE directly.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.module_loading import import_string
+
+
+class _Pipeline:
+    """One middleware chain and its hooks"""
+
+    def __init__(self, middleware_paths, get_response):
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        for middleware_path in reversed(middleware_paths):
+            middleware = import_string(middleware_path)
+            if not getattr(middleware, 'sync_capable', True):
+                raise ImproperlyConfigured(f"{middleware_path} can't run inside RoutedMiddleware (async only).")
+            try:
+                instance = middleware(handler)
+            except MiddlewareNotUsed:
+                continue
+            if instance is None:
+                raise ImproperlyConfigured(f"Middleware factory {middleware_path} returned None.")
+
+            if hasattr(instance, 'process_view'):
+                self.view_hooks.insert(0, instance.process_view)
+            if hasattr(instance, 'process_template_response'):
+                self.template_response_hooks.append(instance.process_template_response)
+            if hasattr(instance, 'process_exception'):
+                self.exception_hooks.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+
+        self.chain = handler
+
+
+class RoutedMiddleware:
+    """Dispatch each request to the middleware pipeline of its URL prefix"""
+
+    def __init__(self, get_response):
+        pipelines = settings.MIDDLEWARE_PIPELINES
+        if '' not in pipelines:
+            raise ImproperlyConfigured("MIDDLEWARE_PIPELINES needs a default ('') pipeline.")
+
+        # Longest prefix first
+        self.pipelines = [
+            (prefix, _Pipeline(paths, get_response))
+            for prefix, paths in sorted(pipelines.items(), key=lambda item: len(item[0]), reverse=True)
+        ]
+
+    def select(self, path):
+        for prefix, pipeline in self.pipelines:
+            if prefix.endswith('$'):
+                if path == prefix[:-1]:
+                    return pipeline
+            elif path.startswith(prefix):
+                return pipeline
+
+    def __call__(self, request):
+        pipeline = self.select(request.path_info)
+        request._middleware_pipeline = pipeline
+        return pipeline.chain(request)
+
+    @staticmethod
+    def _pipeline(request):
+        return getattr(request, '_middleware_pipeline', None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        pipeline = self._pipeline(request)
+        for hook in pipeline.view_hooks if pipeline else ():
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response:
+                return response
+
+    def process_template_response(self, request, response):
+        pipeline = self._pipeline(request)
+        for hook in pipeline.template_response_hooks if pipeline else ():
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        pipeline = self._pipeline(request)
+        for hook in pipeline.exception_hooks if pipeline else ():
+            response = hook(request, exception)
+            if response:
+                return response
+
+
+ADMIN_MIDDLEWARE = (
+    ('admin.E410', 'django.contrib.sessions.middleware.SessionMiddleware'),
+    ('admin.E408', 'django.contrib.auth.middleware.AuthenticationMiddleware'),
+    ('admin.E409', 'django.contrib.messages.middleware.MessageMiddleware'),
+)
+
+
+def check_admin_pipeline(app_configs, **kwargs):
+    """
+    The admin's own checks only look at MIDDLEWARE (and are silenced in
+    settings); check the default pipeline, which serves /admin/, instead.
+    """
+    from django.core.checks import Error
+
+    default = getattr(settings, 'MIDDLEWARE_PIPELINES', {}).get('', [])
+    return [
+        Error(f"'{path}' must be in MIDDLEWARE_PIPELINES[''] for the admin application.", id=f"core.{check_id}")
+        for check_id, path in ADMIN_MIDDLEWARE
+        if path not in default
+    ]
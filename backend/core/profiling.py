@@ -0,0 +1,249 @@
+"""
+Opt-in sampling profiler for single requests.
+
+A request is profiled when a staff user sends `X-Profile: 1` (authenticated
+with their usual JWT), or at random with probability PROFILING_SAMPLE_RATE.
+While it is served, a background thread samples the serving thread's stack
+every PROFILING_INTERVAL_MS through sys._current_frames(), so the code being
+profiled runs unmodified.
+
+The result is stored in Redis for PROFILING_TTL_SECONDS (newest
+PROFILING_MAX_STORED kept): the samples as collapsed stacks (one
+`frame;frame;frame count` line per distinct stack, the input of
+flamegraph.pl and speedscope.app), the functions with the most samples, and
+every SQL statement (without parameters) and Redis command (name and key)
+the request ran, from core.instrumentation. Profiled responses carry an
+X-Profile-Id header; staff list and download profiles at
+/api/admin/profiles/.
+
+A request that isn't profiled costs one header lookup, plus one random()
+call when sampling is on; with PROFILING_ENABLED off the middleware isn't
+loaded at all.
+"""
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from .instrumentation import current_stats, endpoint_name, track_request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+INDEX_KEY = 'profiles:index'
+
+# Per profile, so one pathological request can't fill Redis
+MAX_LOG_ENTRIES = 2000
+TOP_FUNCTIONS = 30
+
+# Frame labels are cached per code object; the set of code objects is bounded
+_labels = {}
+
+
+def short_path(filename):
+    """Source path relative to the backend or to site-packages"""
+    path = Path(filename)
+    try:
+        return path.relative_to(settings.BASE_DIR).as_posix()
+    except ValueError:
+        parts = path.parts
+        return '/'.join(parts[parts.index('site-packages') + 1:]) if 'site-packages' in parts else path.name
+
+
+def _frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        name = getattr(code, 'co_qualname', code.co_name)
+        # ';' separates frames in collapsed stacks
+        label = f"{short_path(code.co_filename)}:{name}".replace(';', ':')
+        _labels[code] = label
+    return label
+
+
+class StackSampler:
+    """Samples one thread's stack from a background thread"""
+
+    def __init__(self, thread_id, root_frame, interval):
+        self.thread_id = thread_id
+        # Frames below this one (the server and the middleware above us)
+        # are the same in every sample, so they are left out
+        self.root_frame = root_frame
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root_frame:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            del frame
+            if stack:
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        """Stacks in the collapsed format, most frequent first"""
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        """Functions by samples in the function itself (self) and including callees (total)"""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [
+            {
+                'function': label,
+                'self_samples': own[label],
+                'total_samples': count,
+                'total_percent': round(count / self.samples * 100, 1) if self.samples else 0,
+            }
+            for label, count in total.most_common(limit)
+        ]
+
+
+def _is_staff(request):
+    """Authenticate the request's JWT; only done when profiling is asked for"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except Exception:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def profiling_trigger(request):
+    """Why this request should be profiled ('header' or 'sampled'), or None"""
+    if request.headers.get(PROFILE_HEADER) == '1' and _is_staff(request):
+        return 'header'
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate > 0 and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+def profile_request(request, get_response, trigger):
+    """Serve the request under the sampler and store the profile"""
+    # Use the metrics middleware's stats when it runs; a second
+    # track_request() would hide this request's work from the metrics
+    stats = current_stats()
+    with (nullcontext(stats) if stats is not None else track_request()) as stats:
+        stats.log = []
+        sampler = StackSampler(threading.get_ident(), sys._getframe(), settings.PROFILING_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        with sampler:
+            response = get_response(request)
+        duration = time.perf_counter() - started
+        log, stats.log = stats.log, None
+
+    try:
+        profile_id = profile_store.save(request, response, trigger, duration, stats, log, sampler)
+        response[PROFILE_ID_HEADER] = profile_id
+    except Exception as e:
+        logger.warning(f"Failed to store request profile: {str(e)}")
+    return response
+
+
+class ProfileStore:
+    """Request profiles in Redis, listed newest first"""
+
+    def __init__(self):
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @staticmethod
+    def _key(profile_id):
+        return f'profiles:{profile_id}'
+
+    def save(self, request, response, trigger, duration, stats, log, sampler):
+        """Store a profile; returns its id"""
+        profile_id = uuid.uuid4().hex[:16]
+        user = getattr(request, 'user', None)
+        summary = {
+            'id': profile_id,
+            'created_at': timezone.now().isoformat(),
+            'trigger': trigger,
+            'method': request.method,
+            'path': request.path,
+            'endpoint': endpoint_name(request),
+            'status': response.status_code,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'duration_ms': round(duration * 1000, 1),
+            'interval_ms': settings.PROFILING_INTERVAL_MS,
+            'samples': sampler.samples,
+            'db_queries': stats.db_queries,
+            'db_ms': round(stats.db_seconds * 1000, 1),
+            'redis_commands': stats.redis_commands,
+            'redis_ms': round(stats.redis_seconds * 1000, 1),
+        }
+        profile = {
+            **summary,
+            'top_functions': sampler.top_functions(),
+            'collapsed': sampler.collapsed(),
+            'log': [
+                {'kind': kind, 'statement': statement, 'ms': round(seconds * 1000, 2)}
+                for kind, statement, seconds in log[:MAX_LOG_ENTRIES]
+            ],
+            'log_truncated': max(len(log) - MAX_LOG_ENTRIES, 0),
+        }
+
+        ttl = settings.PROFILING_TTL_SECONDS
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self._key(profile_id), json.dumps(profile), ex=ttl)
+        pipe.set(self._key(profile_id) + ':summary', json.dumps(summary), ex=ttl)
+        pipe.zadd(INDEX_KEY, {profile_id: now})
+        pipe.zremrangebyscore(INDEX_KEY, 0, now - ttl)
+        pipe.zremrangebyrank(INDEX_KEY, 0, -settings.PROFILING_MAX_STORED - 1)
+        pipe.expire(INDEX_KEY, ttl)
+        pipe.execute()
+        return profile_id
+
+    def recent(self, limit=50):
+        """Summaries of the newest profiles"""
+        profile_ids = [profile_id.decode() for profile_id in self.redis.zrevrange(INDEX_KEY, 0, limit - 1)]
+        if not profile_ids:
+            return []
+        summaries = self.redis.mget([self._key(profile_id) + ':summary' for profile_id in profile_ids])
+        return [json.loads(summary) for summary in summaries if summary is not None]
+
+    def get(self, profile_id):
+        """A full profile, or None once it has expired"""
+        profile = self.redis.get(self._key(profile_id))
+        return json.loads(profile) if profile is not None else None
+
+
+profile_store = ProfileStore()
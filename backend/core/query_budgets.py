@@ -0,0 +1,62 @@
+"""
+Query budgets for GET API endpoints, checked by manage.py check_query_budgets.
+
+Each endpoint (URL name, as in the metrics endpoint label) declares the most
+database queries one request may make. The checker also fails an endpoint
+whose query count grows with the amount of data behind it (N+1 queries),
+whatever its budget. Endpoints without a budget fail too, so new routes get
+one when they're added.
+
+Budgets are for a staff user with a PRO subscription and a cold cache, the
+most expensive path of most views. When a change legitimately needs more
+queries, raise the budget in the same change and regenerate
+docs/QUERY_BUDGETS.md with `check_query_budgets --report`.
+"""
+
+QUERY_BUDGETS = {
+    'activity-detail': 1,
+    'activity-list': 1,
+    'answer-detail': 1,
+    'answer-list': 1,
+    'api-root': 0,
+    'attempt-completed': 1,
+    'attempt-detail': 4,
+    'attempt-in-progress': 1,
+    'attempt-list': 1,
+    'attempt-my-attempts': 1,
+    'attempt-result': 1,
+    'attempt_results': 7,
+    'auth-me': 0,
+    'dashboard_stats': 13,
+    'exam-attempts': 3,
+    'exam-detail': 9,
+    'exam-list': 2,
+    'exam-questions': 6,
+    'exam-sections': 3,
+    'exam_issues': 1,
+    'exam_questions_timer': 4,
+    'list_announcements': 1,
+    'list_notes': 2,
+    'list_plans': 1,
+    'list_pyqs': 2,
+    'list_videos': 2,
+    'load_shedding_stats': 0,
+    'memory_diagnostics': 0,
+    'notification-detail': 1,
+    'notification-list': 1,
+    'notification-unread': 1,
+    'payment_failures': 1,
+    'payment_history': 1,
+    'profile': 0,
+    'question-detail': 1,
+    'question-list': 1,
+    'remaining_time': 2,
+    'request_profiles': 0,
+    'section-detail': 1,
+    'section-list': 1,
+    'section-questions': 2,
+    'serve_note': 2,
+    'serve_pyq': 2,
+    'subscription_status': 3,
+    'user_dashboard': 8,
+}
@@ -1,40 +1,150 @@
 """
 Custom rate limiting/throttling classes for API endpoints
+
+All throttles share a Redis GCRA (generic cell rate algorithm) limiter.
+Instead of DRF's cached list of request timestamps, each client/scope pair
+is a single Redis key holding a "theoretical arrival time", and the whole
+check-and-update runs in one Lua call. That makes every check O(1), one
+round trip, and race-free across gunicorn workers.
+
+Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] and accept a
+multiplier on the period, e.g. '3/5min' or '100/2hour'. Anonymous clients
+are identified by IP as DRF does, with REST_FRAMEWORK['NUM_PROXIES'] so only
+the X-Forwarded-For entry added by our own proxy is trusted.
 """
+import logging
+import re
+
+from django_redis import get_redis_connection
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = limiter key
+# ARGV[1] = emission interval (ms between requests at the sustained rate)
+# ARGV[2] = burst window (ms), i.e. the whole period
+# Returns {allowed, retry_after_ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval
+local allow_at = new_tat - window
+if now < allow_at then
+    return {0, allow_at - now}
+end
+
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+_RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])', re.IGNORECASE)
+_PERIOD_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+_script = None
+
+
+def parse_rate(rate):
+    """
+    Parse a rate string into (num_requests, duration_seconds).
+
+    Accepts DRF's format ('5/min', '100/hour') plus a period multiplier
+    ('3/5min', '50/12h').
+    """
+    if rate is None:
+        return (None, None)
+    match = _RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid throttle rate: {rate!r}")
+    num, multiplier, unit = match.groups()
+    duration = int(multiplier or 1) * _PERIOD_SECONDS[unit.lower()]
+    return (int(num), duration)
+
+
+class RedisRateThrottleMixin:
+    """
+    Replace SimpleRateThrottle's cache-backed history with the GCRA script.
+
+    Subclasses keep DRF's get_cache_key(), so identification (user id or
+    client IP) is unchanged. If Redis is unreachable the request is allowed
+    rather than failing the API.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def parse_rate(self, rate):
+        return parse_rate(rate)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        global _script
+        try:
+            if _script is None:
+                _script = get_redis_connection("default").register_script(GCRA_SCRIPT)
+            window_ms = self.duration * 1000
+            allowed, retry_after_ms = _script(
+                keys=[self.key],
+                args=[window_ms // self.num_requests, window_ms],
+            )
+        except Exception as e:
+            logger.warning(f"Throttle backend unavailable, allowing request: {str(e)}")
+            return True
+
+        self._retry_after = int(retry_after_ms) / 1000
+        return bool(int(allowed))
+
+    def wait(self):
+        return getattr(self, '_retry_after', None) or None
+
+
+class RedisAnonRateThrottle(RedisRateThrottleMixin, AnonRateThrottle):
+    """Default throttle for anonymous requests (scope 'anon')"""
+
+
+class RedisUserRateThrottle(RedisRateThrottleMixin, UserRateThrottle):
+    """Default throttle for authenticated requests (scope 'user')"""
+
 
-class LoginRateThrottle(AnonRateThrottle):
+class LoginRateThrottle(RedisRateThrottleMixin, AnonRateThrottle):
     """
     Rate limit for login attempts
-    5 attempts per minute for anonymous users
+    Default 5 attempts per minute per client IP
     """
-    rate = '5/min'
     scope = 'login'
 
 
-class OTPRateThrottle(AnonRateThrottle):
+class OTPRateThrottle(RedisRateThrottleMixin, AnonRateThrottle):
     """
     Rate limit for OTP generation
-    3 requests per 5 minutes
+    Default 3 requests per 5 minutes per client IP
     """
-    rate = '3/5min'
     scope = 'otp'
 
 
-class PaymentRateThrottle(UserRateThrottle):
+class PaymentRateThrottle(RedisRateThrottleMixin, UserRateThrottle):
     """
-    Rate limit for payment verification
-    10 requests per minute for authenticated users
+    Rate limit for payment order creation and verification
+    Default 10 requests per minute per user
     """
-    rate = '10/min'
     scope = 'payment'
 
 
-class ExamStartRateThrottle(UserRateThrottle):
+class ExamStartRateThrottle(RedisRateThrottleMixin, UserRateThrottle):
     """
     Rate limit for starting exams
     Prevents rapid exam attempt creation
     """
-    rate = '5/min'
     scope = 'exam_start'
@@ -0,0 +1,391 @@
+"""
+Lightweight span tracing of requests across views, the database, Redis and
+outbound HTTP.
+
+A traced request gets a trace of spans:
+
+- server: the whole request from RequestTracingMiddleware on, named
+  "<method> <url name>"
+- view:   the view call itself (BaseHandler.make_view_atomic is wrapped)
+- db:     every SQL statement (a connection execute_wrapper, without params)
+- redis:  every Redis command or pipeline, from any client (redis-py's
+  Redis.execute_command and Pipeline.execute are wrapped, as in
+  core.instrumentation)
+- http:   outbound calls through requests, which Razorpay and Anymail use
+
+Requests are traced at random with probability TRACING_SAMPLE_RATE, or when
+they carry a sampled W3C traceparent header, whose trace id is kept. Traced
+responses carry X-Trace-Id, and TraceContextFilter puts trace_id / span_id
+on every log record (see LOGGING in settings), so log lines can be matched to
+spans.
+
+Finished traces are queued and exported by a background thread per worker,
+in batches, to TRACING_EXPORTER:
+
+- 'jsonl': one JSON span per line appended to TRACING_JSONL_PATH
+- 'otlp':  OTLP/HTTP JSON posted to TRACING_OTLP_ENDPOINT (an OpenTelemetry
+  collector, or `manage.py run_trace_collector` locally)
+- a dotted path to a class with export(spans)
+
+When the queue is full, traces are dropped rather than slowing requests.
+Code outside a traced request only pays a context variable lookup per Redis
+command or HTTP call; `manage.py trace_summary` breaks slow requests down by
+span kind.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from .instrumentation import describe_command, describe_pipeline, endpoint_name
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = 'X-Trace-Id'
+
+# Spans kept per trace; a request running thousands of queries keeps the first ones
+MAX_SPANS_PER_TRACE = 1000
+MAX_STATEMENT_LENGTH = 1000
+
+_TRACEPARENT = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = ContextVar('trace_span', default=None)
+_installed = False
+
+
+class Trace:
+    """Spans of one request"""
+
+    __slots__ = ('trace_id', 'spans', 'dropped')
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, trace, name, kind, parent_id=None, attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def finish(self):
+        self.end_ns = time.time_ns()
+        if len(self.trace.spans) < MAX_SPANS_PER_TRACE:
+            self.trace.spans.append(self)
+        else:
+            self.trace.dropped += 1
+
+    def as_dict(self):
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_unix_nano': self.start_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1_000_000, 3),
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+def current_span():
+    """Span being recorded in this context, or None outside a traced request"""
+    return _current.get()
+
+
+@contextmanager
+def span(name, kind='internal', **attributes):
+    """Record the block as a child of the current span; a no-op outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, kind, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def _incoming_context(request):
+    """(trace id, parent span id) from a sampled traceparent header, or None"""
+    match = _TRACEPARENT.match(request.headers.get('traceparent', ''))
+    if match is None or not int(match.group(3), 16) & 1:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _db_span(execute, sql, params, many, context):
+    with span('db.query', 'db', **{
+        'db.system': context['connection'].vendor,
+        'db.operation': sql.split(None, 1)[0].upper() if sql else '',
+        'db.statement': sql[:MAX_STATEMENT_LENGTH],
+    }):
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def trace_request(request):
+    """Trace the request if it is sampled; yields the server span or None"""
+    incoming = _incoming_context(request)
+    if incoming is None and random.random() >= settings.TRACING_SAMPLE_RATE:
+        yield None
+        return
+
+    trace_id, parent_id = incoming or (os.urandom(16).hex(), None)
+    root = Span(Trace(trace_id), request.method, 'server', parent_id, {
+        'http.method': request.method,
+        'http.target': request.path,
+    })
+    token = _current.set(root)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_db_span))
+            yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        root.name = f"{request.method} {endpoint_name(request)}"
+        if root.trace.dropped:
+            root.attributes['tracing.dropped_spans'] = root.trace.dropped
+        root.finish()
+        span_processor.submit(root.trace.spans)
+
+
+class TraceContextFilter(logging.Filter):
+    """Adds trace_id and span_id ('-' outside a trace) to log records"""
+
+    def filter(self, record):
+        current = _current.get()
+        record.trace_id = current.trace.trace_id if current is not None else '-'
+        record.span_id = current.span_id if current is not None else '-'
+        return True
+
+
+# Exporters
+
+class JsonLinesExporter:
+    """Appends one JSON object per span to a file"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.TRACING_JSONL_PATH
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(s.as_dict(), default=str) + '\n' for s in spans)
+        with open(self.path, 'a') as f:
+            f.write(lines)
+
+
+class OTLPHttpExporter:
+    """Posts spans as OTLP/HTTP JSON (ExportTraceServiceRequest)"""
+
+    # OTLP SpanKind
+    KINDS = {'server': 2, 'http': 3, 'db': 3, 'redis': 3}
+
+    def __init__(self, endpoint=None, timeout=5):
+        self.endpoint = endpoint or settings.TRACING_OTLP_ENDPOINT
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+    def _span(self, s):
+        otlp = {
+            'traceId': s.trace.trace_id,
+            'spanId': s.span_id,
+            'name': s.name,
+            'kind': self.KINDS.get(s.kind, 1),
+            'startTimeUnixNano': str(s.start_ns),
+            'endTimeUnixNano': str(s.end_ns),
+            'attributes': [
+                {'key': key, 'value': self._value(value)}
+                for key, value in {**s.attributes, 'span.kind': s.kind}.items()
+            ],
+            'status': {'code': 2, 'message': s.error} if s.error else {'code': 1},
+        }
+        if s.parent_id:
+            otlp['parentSpanId'] = s.parent_id
+        return otlp
+
+    def export(self, spans):
+        body = {
+            'resourceSpans': [{
+                'resource': {'attributes': [
+                    {'key': 'service.name', 'value': {'stringValue': settings.TRACING_SERVICE_NAME}},
+                ]},
+                'scopeSpans': [{
+                    'scope': {'name': 'core.tracing'},
+                    'spans': [self._span(s) for s in spans],
+                }],
+            }],
+        }
+        # Imported here: urllib.request (http.client, ssl, email) is a
+        # noticeable part of boot, and only this exporter needs it
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), method='POST',
+            headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+EXPORTERS = {
+    'jsonl': JsonLinesExporter,
+    'otlp': OTLPHttpExporter,
+}
+
+
+class SpanProcessor:
+    """Queues finished traces and exports them in batches from a background thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+        self._exporter = None
+        self.dropped_traces = 0
+
+    def _ensure_started(self):
+        # Started lazily, and again in each forked worker: threads don't survive fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            name = settings.TRACING_EXPORTER
+            self._exporter = EXPORTERS[name]() if name in EXPORTERS else import_string(name)()
+            self._queue = queue.Queue(maxsize=settings.TRACING_QUEUE_SIZE)
+            threading.Thread(target=self._run, name='trace-exporter', daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, spans):
+        try:
+            self._ensure_started()
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped_traces += 1
+        except Exception as e:
+            logger.warning(f"Failed to queue trace: {str(e)}")
+
+    def _run(self):
+        while True:
+            batch = list(self._queue.get())
+            # Gather whatever else is already waiting, up to a batch
+            deadline = time.monotonic() + 1
+            while len(batch) < settings.TRACING_BATCH_SIZE and time.monotonic() < deadline:
+                try:
+                    batch.extend(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._exporter.export(batch)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(batch)} spans: {str(e)}")
+
+
+span_processor = SpanProcessor()
+
+
+# Instrumented libraries
+
+def _traced_redis(method, describe):
+    def wrapper(self, *args, **kwargs):
+        if _current.get() is None:
+            return method(self, *args, **kwargs)
+        description = describe(self, args)
+        with span(f"redis {description.split(' ', 1)[0]}", 'redis', **{
+            'db.system': 'redis',
+            'db.statement': description,
+        }):
+            return method(self, *args, **kwargs)
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def _traced_send(method):
+    def send(self, request, **kwargs):
+        if _current.get() is None:
+            return method(self, request, **kwargs)
+        url = request.url.split('?', 1)[0]
+        with span(f"HTTP {request.method}", 'http', **{
+            'http.method': request.method,
+            'http.url': url,
+        }) as current:
+            response = method(self, request, **kwargs)
+            current.attributes['http.status_code'] = response.status_code
+            return response
+    send.__wrapped__ = method
+    return send
+
+
+def _traced_make_view_atomic(method):
+    def make_view_atomic(self, view):
+        view = method(self, view)
+        if iscoroutinefunction(view):
+            return view
+
+        def traced_view(request, *args, **kwargs):
+            if _current.get() is None:
+                return view(request, *args, **kwargs)
+            with span(f"view {endpoint_name(request)}", 'view'):
+                return view(request, *args, **kwargs)
+        return traced_view
+    make_view_atomic.__wrapped__ = method
+    return make_view_atomic
+
+
+def install():
+    """Wrap redis-py, requests and Django's view call; safe to call more than once"""
+    global _installed
+    if _installed:
+        return
+    import requests
+    from django.core.handlers.base import BaseHandler
+    from redis.client import Pipeline, Redis
+
+    Redis.execute_command = _traced_redis(Redis.execute_command, describe_command)
+    Pipeline.execute = _traced_redis(Pipeline.execute, describe_pipeline)
+    Pipeline.immediate_execute_command = _traced_redis(Pipeline.immediate_execute_command, describe_command)
+    requests.Session.send = _traced_send(requests.Session.send)
+    BaseHandler.make_view_atomic = _traced_make_view_atomic(BaseHandler.make_view_atomic)
+    _installed = True
+
@@ -1,3 +1,43 @@
-from django.shortcuts import render
+"""
+Prometheus scrape endpoint
+"""
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from .load_shedding import load_shedder
+from .metrics import format_labels, metrics
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _authorized(request):
+    """Bearer METRICS_TOKEN if configured, otherwise only scrapes from this host"""
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        return hmac.compare_digest(supplied, settings.METRICS_TOKEN)
+    return request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+
+
+def metrics_view(request):
+    """
+    All workers' metrics in Prometheus text format
+    
+    GET /metrics
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not _authorized(request):
+        return HttpResponseForbidden()
+
+    lines = [
+        '# HELP load_shedding_shed_total Requests shed by tier and reason',
+        '# TYPE load_shedding_shed_total counter',
+    ]
+    for field, count in sorted(load_shedder.shed_totals().items()):
+        tier, _, reason = field.partition(':')
+        lines.append(f"load_shedding_shed_total{{{format_labels(tier=tier, reason=reason)}}} {count}")
+
+    body = metrics.render() + '\n'.join(lines) + '\n'
+    return HttpResponse(body, content_type=PROMETHEUS_CONTENT_TYPE)
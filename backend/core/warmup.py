@@ -0,0 +1,130 @@
+"""
+Warm-up of a freshly forked gunicorn worker, before it accepts requests.
+
+gunicorn.conf.py's post_worker_init calls warm_up(), which runs the steps
+named in WARMUP_STEPS in order. Without it a new or recycled worker's first
+requests pay for the work instead, which shows as a latency spike under
+load whenever max_requests recycles a worker:
+
+- database: open a connection, which checks the database is reachable and
+  pays the driver's one-time set-up. Under ASGI every request runs in a
+  thread of its own with its own connection, so this one is closed again.
+- redis: create the connection pool (shared by every thread of the worker)
+  and its first connection, and subscribe the in-memory cache's
+  invalidation listener (core/local_cache.py).
+- django: populate the URL resolver and load the translation catalogues
+  (used by DRF's error messages).
+- catalogues: the notes, PYQ, video and announcement catalogues
+  (api/catalogue.py).
+- exams: questions and answer keys of every open exam
+  (exams/exam_cache.py).
+
+The catalogues and exam data live in Redis, so usually only the first
+worker after a deploy or a Redis flush builds them; other workers load
+them from there into their own memory. Database connections the steps
+opened are closed at the end, since requests never use this thread's. A
+step that fails is logged and skipped: the worker then serves as it would
+without warm-up. Each step's duration is logged and, with
+METRICS_ENABLED, recorded in worker_warmup_duration_seconds.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import format_labels, metrics
+
+logger = logging.getLogger(__name__)
+
+
+def warm_database():
+    for alias in connections:
+        connections[alias].ensure_connection()
+        connections[alias].close()
+
+
+def warm_redis():
+    from django_redis import get_redis_connection
+
+    from .local_cache import local_cache
+
+    get_redis_connection("default").ping()
+    # The in-memory tier is only used once its invalidation listener is
+    # subscribed; wait for it so the steps below fill it
+    if settings.LOCAL_CACHE_ENABLED:
+        local_cache.ensure_started(timeout=2)
+
+
+def warm_django():
+    from django.urls import get_resolver
+    from django.utils import translation
+
+    get_resolver().reverse_dict
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('This field is required.')
+
+
+def warm_catalogues():
+    from api.catalogue import CATALOGUES, get_catalogue
+
+    for name in CATALOGUES:
+        get_catalogue(name)
+
+
+def warm_exams():
+    from exams.exam_cache import get_answer_key, get_exam_questions, open_exam_ids
+
+    for exam_id in open_exam_ids():
+        get_exam_questions(exam_id)
+        get_answer_key(exam_id)
+
+
+# Step name -> function, in the order they run
+WARMUP_STEPS = {
+    'database': warm_database,
+    'redis': warm_redis,
+    'django': warm_django,
+    'catalogues': warm_catalogues,
+    'exams': warm_exams,
+}
+
+
+def warm_up(steps=None):
+    """
+    Run warm-up steps (default: settings.WARMUP_STEPS).
+
+    Returns:
+        dict: {step: duration in ms, or None if it failed}
+    """
+    if steps is None:
+        steps = settings.WARMUP_STEPS
+    durations = {}
+    started = time.perf_counter()
+    for name in steps:
+        step = WARMUP_STEPS.get(name)
+        if step is None:
+            logger.warning(f"Unknown worker warm-up step: {name}")
+            continue
+        step_started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            durations[name] = None
+            logger.warning(f"Worker warm-up step {name} failed: {str(e)}")
+            continue
+        seconds = time.perf_counter() - step_started
+        durations[name] = round(seconds * 1000, 1)
+        if settings.METRICS_ENABLED:
+            metrics.observe('worker_warmup_duration_seconds', format_labels(step=name), seconds)
+
+    # Opened again by the catalogue and exam steps
+    connections.close_all()
+
+    total_ms = (time.perf_counter() - started) * 1000
+    logger.info(
+        f"Worker warm-up finished in {total_ms:.1f} ms ("
+        + ', '.join(f"{name} {'failed' if ms is None else f'{ms} ms'}" for name, ms in durations.items())
+        + ")"
+    )
+    return durations
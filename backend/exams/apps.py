@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ExamsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "exams"
+
+    def ready(self):
+        from .signals import connect_catalogue_invalidation, connect_exam_invalidation
+        connect_catalogue_invalidation()
+        connect_exam_invalidation()
@@ -0,0 +1,70 @@
+"""
+Per-exam data cached for the exam-taking endpoints: the questions served
+during an attempt and the answer key used to check submitted answers. Both
+are kept in Redis and in each worker's memory (core/local_cache.py).
+
+Keys carry the exam's version stamp (see exams/signals.py), so editing the
+exam or one of its sections or questions makes the next request rebuild
+them. core.warmup fills both for open exams before a new worker serves.
+"""
+from django.db.models import Q
+from django.utils import timezone
+
+from core.local_cache import local_cache
+from utils.cache import get_cache_version
+from .models import Exam, Question
+from .signals import exam_namespace
+
+EXAM_CACHE_TIMEOUT = 3600
+
+
+def _cache_key(exam_id, name):
+    return f"apollo11:exam:{exam_id}:{name}:v{get_cache_version(exam_namespace(exam_id))}"
+
+
+def get_exam_questions(exam_id):
+    """
+    Questions of an exam without the correct options, in section and
+    question order, as Question.values() rows (keys not yet renamed for
+    the frontend, see api.views_exam_timer.normalize_question_keys)
+    """
+    cache_key = _cache_key(exam_id, 'attempt_questions')
+    questions = local_cache.get(cache_key)
+    if questions is None:
+        questions = list(
+            Question.objects.filter(section__exam_id=exam_id)
+            .values(
+                'id', 'question_text', 'option_a', 'option_b',
+                'option_c', 'option_d', 'marks', 'question_number',
+                'section__name', 'section__order', 'diagram_url'
+            )
+            .order_by('section__order', 'question_number')
+        )
+        local_cache.set(cache_key, questions, EXAM_CACHE_TIMEOUT)
+    return questions
+
+
+def get_answer_key(exam_id):
+    """{question id: (correct option, marks)} for every question of an exam"""
+    cache_key = _cache_key(exam_id, 'answer_key')
+    answer_key = local_cache.get(cache_key)
+    if answer_key is None:
+        answer_key = {
+            question_id: (correct_option, marks)
+            for question_id, correct_option, marks in Question.objects.filter(
+                section__exam_id=exam_id
+            ).values_list('id', 'correct_option', 'marks')
+        }
+        local_cache.set(cache_key, answer_key, EXAM_CACHE_TIMEOUT)
+    return answer_key
+
+
+def open_exam_ids():
+    """Published exams inside their availability window (see Exam.is_available)"""
+    now = timezone.now()
+    return list(
+        Exam.objects.filter(is_published=True)
+        .filter(Q(available_from__isnull=True) | Q(available_from__lte=now))
+        .filter(Q(available_until__isnull=True) | Q(available_until__gte=now))
+        .values_list('id', flat=True)
+    )
@@ -0,0 +1,106 @@
+"""
+Django management command to create the data the load-test suite expects
+Usage:
+    python manage.py seed_loadtest                       # 500 users, one 100-question exam
+    python manage.py seed_loadtest --users 2000 --questions 180
+    python manage.py seed_loadtest --reset               # also clear earlier load-test attempts
+
+Creates users loadtest_00001 ... loadtest_NNNNN (password: --password) and a
+published FREE exam named LOADTEST. Content is generated from --seed, so the
+same arguments always produce the same exam. Safe to re-run: existing users
+are kept and the exam is rebuilt.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exams.models import Exam, Section, Question
+from results.models import Attempt
+from users.models import User, Profile
+
+EXAM_NAME = 'LOADTEST'
+EXAM_YEAR = 2099
+SECTION_NAMES = ['Mathematics', 'Statistics', 'Analytical Skills', 'Computer Concepts', 'IT Skills']
+
+
+class Command(BaseCommand):
+    help = 'Creates load-test users and a load-test exam (see loadtest/README.md)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help='Number of users (default: 500)')
+        parser.add_argument('--questions', type=int, default=100, help='Questions in the exam (default: 100)')
+        parser.add_argument('--prefix', default='loadtest_', help='Username prefix (default: loadtest_)')
+        parser.add_argument('--password', default='loadtest-pass', help='Password of every user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for exam content (default: 42)')
+        parser.add_argument('--reset', action='store_true', help='Delete attempts made by load-test users')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        created = self.create_users(prefix, options['users'], options['password'])
+        self.stdout.write(f"Users: {options['users']} ({created} new), password '{options['password']}'")
+
+        exam = self.create_exam(options['questions'], random.Random(options['seed']))
+        self.stdout.write(f'Exam: {exam} (id {exam.id}, {options["questions"]} questions)')
+
+        if options['reset']:
+            deleted, _ = Attempt.objects.filter(user__username__startswith=prefix).delete()
+            self.stdout.write(f'Deleted {deleted} load-test attempt rows')
+
+        self.stdout.write(self.style.SUCCESS(f'Ready. export LOADTEST_EXAM_ID={exam.id}'))
+
+    def create_users(self, prefix, count, password):
+        # Hashing is deliberately slow; every user shares one hash
+        password_hash = make_password(password)
+        usernames = [f'{prefix}{i:05d}' for i in range(1, count + 1)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        new_users = [
+            User(username=username, email=f'{username}@loadtest.invalid',
+                 password_hash=password_hash, email_verified=True)
+            for username in usernames if username not in existing
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(new_users, batch_size=1000)
+            users = User.objects.filter(username__in=[u.username for u in new_users])
+            Profile.objects.bulk_create([Profile(user=user) for user in users], batch_size=1000)
+        return len(new_users)
+
+    @transaction.atomic
+    def create_exam(self, question_count, rng):
+        Exam.objects.filter(name=EXAM_NAME, year=EXAM_YEAR).delete()
+        exam = Exam.objects.create(
+            name=EXAM_NAME,
+            year=EXAM_YEAR,
+            total_marks=question_count,
+            duration_minutes=180,
+            access_tier='FREE',
+            is_published=True,
+        )
+
+        per_section = -(-question_count // len(SECTION_NAMES))
+        questions = []
+        for order, name in enumerate(SECTION_NAMES, start=1):
+            count = min(per_section, question_count - len(questions))
+            if count <= 0:
+                break
+            section = Section.objects.create(exam=exam, name=name, order=order, max_marks=count)
+            for number in range(1, count + 1):
+                a, b = rng.randint(2, 99), rng.randint(2, 99)
+                options = [a + b, a * b, abs(a - b), a + b + 1]
+                rng.shuffle(options)
+                questions.append(Question(
+                    section=section,
+                    question_number=number,
+                    question_text=f'What is ${a} + {b}$?',
+                    plain_text=f'What is {a} + {b}?',
+                    option_a=str(options[0]),
+                    option_b=str(options[1]),
+                    option_c=str(options[2]),
+                    option_d=str(options[3]),
+                    correct_option='ABCD'[options.index(a + b)],
+                    marks=1,
+                ))
+        Question.objects.bulk_create(questions)
+        return exam
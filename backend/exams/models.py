@@ -179,6 +179,11 @@ class Note(models.Model):
     def is_premium(self):
         """Check if note requires PRO tier"""
         return self.access_tier == 'PRO'
+    
+    @property
+    def download_filename(self):
+        """Filename shown to the user when viewing the PDF"""
+        return f"{self.topic}.pdf"
         
     def __str__(self):
         return f"{self.subject} - {self.topic}"
@@ -214,6 +219,11 @@ class PYQ(models.Model):
     def is_premium(self):
         """Check if PYQ requires PRO tier"""
         return self.access_tier == 'PRO'
+    
+    @property
+    def download_filename(self):
+        """Filename shown to the user when viewing the PDF"""
+        return f"{self.exam_name}_{self.year}.pdf"
         
     def __str__(self):
         return f"{self.exam_name} {self.year}"
@@ -45,7 +45,8 @@ class SectionSerializer(serializers.ModelSerializer):
     
     def get_question_count(self, obj):
         # Use annotated value if available, otherwise fallback to query
-        return getattr(obj, '_question_count', obj.questions.count())
+        count = getattr(obj, '_question_count', None)
+        return obj.questions.count() if count is None else count
 
 
 class SectionWithQuestionsSerializer(serializers.ModelSerializer):
@@ -76,11 +77,13 @@ class ExamSerializer(serializers.ModelSerializer):
     
     def get_section_count(self, obj):
         # Use annotated value if available, otherwise fallback to query
-        return getattr(obj, '_section_count', obj.sections.count())
+        count = getattr(obj, '_section_count', None)
+        return obj.sections.count() if count is None else count
     
     def get_question_count(self, obj):
         # Use annotated value if available, otherwise fallback to query
-        return getattr(obj, '_question_count', Question.objects.filter(section__exam=obj).count())
+        count = getattr(obj, '_question_count', None)
+        return Question.objects.filter(section__exam=obj).count() if count is None else count
 
 
 class ExamListSerializer(serializers.ModelSerializer):
@@ -0,0 +1,65 @@
+"""
+Bump cache versions when exam content or catalogue rows change.
+
+Versions key both cached payloads and response ETags, so a bump makes the
+next request rebuild the data and clients' If-None-Match stop matching.
+Bumps wait for the transaction to commit: bumped earlier, a concurrent
+request could cache the old rows under the new version. Connected in
+ExamsConfig.ready().
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from utils.cache import bump_cache_version
+
+
+def exam_namespace(exam_id):
+    """Version namespace for one exam's detail/questions"""
+    return f"exam:{exam_id}"
+
+
+def _bump_exam_versions(exam_id):
+    def bump():
+        bump_cache_version('exams')
+        if exam_id:
+            bump_cache_version(exam_namespace(exam_id))
+
+    transaction.on_commit(bump)
+
+
+def _exam_changed(sender, instance, **kwargs):
+    _bump_exam_versions(instance.pk)
+
+
+def _section_changed(sender, instance, **kwargs):
+    _bump_exam_versions(instance.exam_id)
+
+
+def _question_changed(sender, instance, **kwargs):
+    from .models import Section
+
+    exam_id = Section.objects.filter(pk=instance.section_id).values_list('exam_id', flat=True).first()
+    _bump_exam_versions(exam_id)
+
+
+def connect_exam_invalidation():
+    """Bump the exam list version and the exam's own version on content changes"""
+    from .models import Exam, Section, Question
+
+    for model, handler in ((Exam, _exam_changed), (Section, _section_changed), (Question, _question_changed)):
+        post_save.connect(handler, sender=model, dispatch_uid=f"exam_version:save:{model.__name__}")
+        post_delete.connect(handler, sender=model, dispatch_uid=f"exam_version:delete:{model.__name__}")
+
+
+def connect_catalogue_invalidation():
+    """Bump a catalogue's version whenever one of its models is saved or deleted"""
+    from api.catalogue import CATALOGUES, catalogue_namespace
+
+    for name, (_, models) in CATALOGUES.items():
+        def invalidate(sender, name=name, **kwargs):
+            namespace = catalogue_namespace(name)
+            transaction.on_commit(lambda: bump_cache_version(namespace))
+
+        for model in models:
+            post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=f"catalogue:{name}:save:{model.__name__}")
+            post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f"catalogue:{name}:delete:{model.__name__}")
@@ -3,9 +3,6 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db.models import Count
-from django.core.cache import cache
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 
 from .models import Exam, Section, Question
 from .serializers import (
@@ -13,8 +10,39 @@ from .serializers import (
     SectionSerializer, SectionWithQuestionsSerializer,
     QuestionSerializer, QuestionListSerializer
 )
-from utils.cache import cache_response, get_cached_exam, cache_exam_data
+from utils.cache import cache_response, get_cached_exam, cache_exam_data, generate_cache_key, get_cache_version
+from core.conditional import conditional_response, make_etag
+from core.local_cache import local_cache
 from .permissions import can_access_exam
+from .signals import exam_namespace
+
+
+def _exam_list_etag(view, request, *args, **kwargs):
+    """Exam list changes with any exam edit; staff also see unpublished exams"""
+    return make_etag(
+        'exams',
+        get_cache_version('exams'),
+        'staff' if request.user.is_staff else 'public',
+        request.META.get('QUERY_STRING', ''),
+    )
+
+
+def _exam_detail_etag(view, request, *args, **kwargs):
+    """
+    Version of a single exam's content, or None when the request would be
+    refused, so 404/403 are still produced by the view.
+    """
+    exams = Exam.objects.filter(pk=kwargs.get('pk'))
+    if not request.user.is_staff:
+        exams = exams.filter(is_published=True)
+    exam = exams.only('id', 'access_tier').first()
+    if exam is None:
+        return None
+    # Same check as the view, so a 304 is only sent where it would answer 200
+    can_access, _ = can_access_exam(request.user, exam)
+    if not can_access:
+        return None
+    return make_etag('exam', kwargs.get('pk'), get_cache_version(exam_namespace(kwargs.get('pk'))))
 
 
 class ExamViewSet(viewsets.ModelViewSet):
@@ -32,16 +60,33 @@ class ExamViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Optimize with select_related for better performance
         queryset = Exam.objects.all().prefetch_related('sections')
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('sections__questions')
         # Non-admin users only see published exams
         if not self.request.user.is_staff:
             queryset = queryset.filter(is_published=True)
         return queryset.order_by('-year', 'name')
     
-    @method_decorator(cache_page(3600))  # Cache for 1 hour
+    @conditional_response(etag_func=_exam_list_etag)
     def list(self, request, *args, **kwargs):
-        """Cached exam list"""
-        return super().list(request, *args, **kwargs)
+        """Cached exam list (invalidated when any exam changes)"""
+        cache_key = generate_cache_key(
+            'exams:list',
+            get_cache_version('exams'),
+            request.user.is_staff,
+            request.query_params.dict(),
+        )
+        
+        cached_data = local_cache.get(cache_key)
+        if cached_data is not None:
+            return Response(cached_data)
+        
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            local_cache.set(cache_key, response.data, 3600)
+        return response
     
+    @conditional_response(etag_func=_exam_detail_etag)
     def retrieve(self, request, *args, **kwargs):
         """Cached exam detail with questions - with access control"""
         exam = self.get_object()
@@ -58,10 +103,11 @@ class ExamViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_403_FORBIDDEN)
         
         exam_id = kwargs.get('pk')
-        cache_key = f"apollo11:exam:{exam_id}:detail"
+        version = get_cache_version(exam_namespace(exam_id))
+        cache_key = f"apollo11:exam:{exam_id}:detail:v{version}"
         
         # Try cache first
-        cached_data = cache.get(cache_key)
+        cached_data = local_cache.get(cache_key)
         if cached_data:
             return Response(cached_data)
         
@@ -70,7 +116,7 @@ class ExamViewSet(viewsets.ModelViewSet):
         
         # Cache successful response for 1 hour
         if response.status_code == 200:
-            cache.set(cache_key, response.data, 3600)
+            local_cache.set(cache_key, response.data, 3600)
         
         return response
     
@@ -78,11 +124,12 @@ class ExamViewSet(viewsets.ModelViewSet):
     def sections(self, request, pk=None):
         """Get all sections for an exam"""
         exam = self.get_object()
-        sections = exam.sections.all()
+        sections = exam.sections.annotate(_question_count=Count('questions'))
         serializer = SectionSerializer(sections, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @conditional_response(etag_func=_exam_detail_etag)
     def questions(self, request, pk=None):
         """Get all questions for an exam (cached) - with access control"""
         exam = self.get_object()
@@ -96,10 +143,11 @@ class ExamViewSet(viewsets.ModelViewSet):
                 'requires_pro': exam.is_premium
             }, status=status.HTTP_403_FORBIDDEN)
         
-        cache_key = f"apollo11:exam:{pk}:questions"
+        version = get_cache_version(exam_namespace(pk))
+        cache_key = f"apollo11:exam:{pk}:questions:v{version}"
         
         # Try cache first
-        cached_data = cache.get(cache_key)
+        cached_data = local_cache.get(cache_key)
         if cached_data:
             return Response(cached_data)
         
@@ -108,7 +156,7 @@ class ExamViewSet(viewsets.ModelViewSet):
         serializer = QuestionListSerializer(questions, many=True)
         
         # Cache for 1 hour
-        cache.set(cache_key, serializer.data, 3600)
+        local_cache.set(cache_key, serializer.data, 3600)
         
         return Response(serializer.data)
     
@@ -151,7 +199,7 @@ class SectionViewSet(viewsets.ModelViewSet):
     serializer_class = SectionSerializer
     
     def get_queryset(self):
-        queryset = Section.objects.all()
+        queryset = Section.objects.annotate(_question_count=Count('questions'))
         exam_id = self.request.query_params.get('exam', None)
         if exam_id:
             queryset = queryset.filter(exam_id=exam_id)
@@ -2,6 +2,7 @@
 # Usage: gunicorn -c gunicorn.conf.py config.asgi:application
 
 import multiprocessing
+import os
 
 # Server socket
 bind = "0.0.0.0:8000"
@@ -11,7 +12,9 @@ backlog = 2048
 workers = 4  # 2x CPU cores (optimal for ASGI workers)
 worker_class = "uvicorn.workers.UvicornWorker"  # ASGI worker with async I/O
 worker_connections = 100  # Concurrent connections per worker (400 total)
-max_requests = 1000  # Restart workers after 1000 requests (prevent memory leaks)
+# Restart workers after this many requests in case memory leaks. Check
+# GET /api/admin/memory/ (core/memory.py) before raising it
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
 max_requests_jitter = 50  # Add randomness to prevent all workers restarting at once
 
 # Timeouts
@@ -64,6 +67,18 @@ def post_fork(server, worker):
     """Called just after a worker has been forked."""
     print(f"Worker spawned (pid: {worker.pid})")
 
+def post_worker_init(worker):
+    """Called just after a worker has initialized the application."""
+    from django.conf import settings
+    if settings.MEMORY_DIAGNOSTICS_ENABLED:
+        # `kill -USR2 <worker pid>` logs the worker's memory report
+        from core.memory import install_signal_handler
+        install_signal_handler()
+    if settings.WARMUP_ENABLED:
+        # Connections and caches, so the worker's first requests don't pay for them
+        from core.warmup import warm_up
+        warm_up()
+
 def worker_exit(server, worker):
     """Called just after a worker has been exited."""
     print(f"Worker exited (pid: {worker.pid})")
@@ -0,0 +1,138 @@
+"""
+Record and compare load-test baselines
+
+Reads the <prefix>_stats.csv written by `locust --csv <prefix>` and either
+stores it as a baseline or compares a new run against one.
+
+Usage:
+    python loadtest/compare.py record results/run_stats.csv loadtest/baselines/burst-100.json --note "main @ abc123"
+    python loadtest/compare.py compare results/run_stats.csv loadtest/baselines/burst-100.json
+
+compare prints a per-endpoint table and exits with status 1 when any endpoint
+regressed beyond the tolerances:
+    - p95 latency grew by more than --p95-tolerance (default: 20%)
+    - throughput dropped by more than --rps-tolerance (default: 10%)
+    - failure rate grew by more than --failure-tolerance (default: 1 point)
+Small absolute p95 changes (under --min-p95-delta-ms, default 10ms) are
+ignored, since they are noise at low latencies.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime, timezone
+
+AGGREGATED = 'Aggregated'
+
+
+def read_stats(path):
+    """{endpoint: {requests, failures, failure_rate, p50_ms, p95_ms, p99_ms, rps}} from a locust stats CSV"""
+    endpoints = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            name = row['Name'] if row['Name'] == AGGREGATED else f"{row['Type']} {row['Name']}"
+            requests = int(row['Request Count'])
+            failures = int(row['Failure Count'])
+            endpoints[name] = {
+                'requests': requests,
+                'failures': failures,
+                'failure_rate': round(failures / requests, 4) if requests else 0.0,
+                'p50_ms': _float(row['50%']),
+                'p95_ms': _float(row['95%']),
+                'p99_ms': _float(row['99%']),
+                'rps': round(_float(row['Requests/s']), 3),
+            }
+    return endpoints
+
+
+def _float(value):
+    # locust writes "N/A" for endpoints without samples
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+
+def record(args):
+    baseline = {
+        'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'note': args.note,
+        'endpoints': read_stats(args.stats),
+    }
+    with open(args.baseline, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"Recorded {len(baseline['endpoints'])} endpoints to {args.baseline}")
+    return 0
+
+
+def find_regressions(name, base, current, args):
+    """Human-readable reasons an endpoint regressed (empty if it didn't)"""
+    reasons = []
+    p95_delta = current['p95_ms'] - base['p95_ms']
+    if base['p95_ms'] and p95_delta >= args.min_p95_delta_ms and p95_delta / base['p95_ms'] > args.p95_tolerance:
+        reasons.append(f"p95 {base['p95_ms']:.0f}ms -> {current['p95_ms']:.0f}ms")
+    # Only the whole run's throughput is meaningful; per-endpoint rps follows
+    # from the cohort model
+    if name == AGGREGATED and base['rps'] and (base['rps'] - current['rps']) / base['rps'] > args.rps_tolerance:
+        reasons.append(f"rps {base['rps']:.1f} -> {current['rps']:.1f}")
+    if current['failure_rate'] - base['failure_rate'] > args.failure_tolerance:
+        reasons.append(f"failures {base['failure_rate']:.1%} -> {current['failure_rate']:.1%}")
+    return reasons
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    current = read_stats(args.stats)
+
+    print(f"Baseline: {args.baseline} (recorded {baseline['recorded_at']}; {baseline.get('note') or 'no note'})")
+    print(f"{'endpoint':<55} {'p95 base':>9} {'p95 now':>9} {'rps base':>9} {'rps now':>9}  result")
+
+    regressed = 0
+    for name, base in sorted(baseline['endpoints'].items()):
+        now = current.get(name)
+        if now is None:
+            print(f"{name:<55} {base['p95_ms']:>9.0f} {'-':>9} {base['rps']:>9.1f} {'-':>9}  MISSING")
+            regressed += 1
+            continue
+        reasons = find_regressions(name, base, now, args)
+        regressed += bool(reasons)
+        result = 'REGRESSED: ' + ', '.join(reasons) if reasons else 'ok'
+        print(f"{name:<55} {base['p95_ms']:>9.0f} {now['p95_ms']:>9.0f} {base['rps']:>9.1f} {now['rps']:>9.1f}  {result}")
+
+    for name in sorted(set(current) - set(baseline['endpoints'])):
+        print(f"{name:<55} {'-':>9} {current[name]['p95_ms']:>9.0f} {'-':>9} {current[name]['rps']:>9.1f}  new")
+
+    if regressed:
+        print(f"\n{regressed} endpoint(s) regressed")
+        return 1
+    print('\nNo regressions')
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record and compare load-test baselines')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Store a run as a baseline')
+    record_parser.add_argument('stats', help='locust <prefix>_stats.csv')
+    record_parser.add_argument('baseline', help='Baseline JSON file to write')
+    record_parser.add_argument('--note', default='', help='e.g. commit, machine, cohort size')
+    record_parser.set_defaults(func=record)
+
+    compare_parser = commands.add_parser('compare', help='Compare a run against a baseline')
+    compare_parser.add_argument('stats', help='locust <prefix>_stats.csv')
+    compare_parser.add_argument('baseline', help='Baseline JSON file')
+    compare_parser.add_argument('--p95-tolerance', type=float, default=0.2, help='Allowed p95 growth (default: 0.2)')
+    compare_parser.add_argument('--min-p95-delta-ms', type=float, default=10, help='Ignore smaller p95 changes (default: 10)')
+    compare_parser.add_argument('--rps-tolerance', type=float, default=0.1, help='Allowed throughput drop (default: 0.1)')
+    compare_parser.add_argument('--failure-tolerance', type=float, default=0.01, help='Allowed failure rate growth (default: 0.01)')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
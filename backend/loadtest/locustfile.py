@@ -0,0 +1,186 @@
+"""
+End-to-end exam lifecycle load test for Apollo11 DCET Platform
+
+Every simulated user is one student sitting one exam, start to finish:
+
+    login -> dashboard -> exam list -> start exam (waits in the waiting room
+    if queued) -> questions -> answer saves with think time, polling the
+    timer -> submit -> results
+
+A run is one cohort: LOADTEST_COHORT_SIZE students arriving either all at
+once (LOADTEST_ARRIVAL=burst, an exam that opens at a fixed time) or evenly
+over LOADTEST_RAMP_SECONDS (LOADTEST_ARRIVAL=ramp). The run stops when the
+whole cohort has submitted. See loadtest/README.md for setup and for
+recording / comparing baselines.
+
+Environment variables:
+    LOADTEST_COHORT_SIZE        students in the cohort (default: 100)
+    LOADTEST_ARRIVAL            burst | ramp (default: burst)
+    LOADTEST_RAMP_SECONDS       ramp length (default: 60)
+    LOADTEST_EXAM_ID            exam to sit (default: the exam named LOADTEST)
+    LOADTEST_ANSWERS            answers saved per student (default: 30)
+    LOADTEST_THINK_MIN/MAX      seconds between answers (default: 2 / 8)
+    LOADTEST_TIMER_POLL_SECONDS timer poll interval (default: 10)
+    LOADTEST_USER_PREFIX        username prefix (default: loadtest_)
+    LOADTEST_PASSWORD           password (default: loadtest-pass)
+    LOADTEST_SEED               seed for answers and think time (default: 42)
+    LOADTEST_MAX_SECONDS        hard stop (default: 1800)
+"""
+import itertools
+import os
+import random
+import time
+import uuid
+
+import gevent
+from locust import HttpUser, LoadTestShape, constant, task
+
+COHORT_SIZE = int(os.getenv('LOADTEST_COHORT_SIZE', '100'))
+ARRIVAL = os.getenv('LOADTEST_ARRIVAL', 'burst')
+RAMP_SECONDS = float(os.getenv('LOADTEST_RAMP_SECONDS', '60'))
+EXAM_ID = os.getenv('LOADTEST_EXAM_ID')
+ANSWERS = int(os.getenv('LOADTEST_ANSWERS', '30'))
+THINK_MIN = float(os.getenv('LOADTEST_THINK_MIN', '2'))
+THINK_MAX = float(os.getenv('LOADTEST_THINK_MAX', '8'))
+TIMER_POLL_SECONDS = float(os.getenv('LOADTEST_TIMER_POLL_SECONDS', '10'))
+USER_PREFIX = os.getenv('LOADTEST_USER_PREFIX', 'loadtest_')
+PASSWORD = os.getenv('LOADTEST_PASSWORD', 'loadtest-pass')
+SEED = int(os.getenv('LOADTEST_SEED', '42'))
+MAX_SECONDS = float(os.getenv('LOADTEST_MAX_SECONDS', '1800'))
+
+# Attempts to join the waiting room before giving up
+MAX_START_ATTEMPTS = 100
+
+_user_numbers = itertools.count(1)
+# Users are greenlets in one process, so a plain counter is enough
+finished_sessions = 0
+
+
+def _session_done():
+    global finished_sessions
+    finished_sessions += 1
+
+
+class ExamCandidate(HttpUser):
+    """One student sitting the load-test exam once"""
+
+    wait_time = constant(1)
+
+    def on_start(self):
+        self.number = next(_user_numbers)
+        self.username = f'{USER_PREFIX}{self.number:05d}'
+        self.rng = random.Random(SEED + self.number)
+        self.headers = {}
+        self.done = False
+
+    @task
+    def sit_exam(self):
+        if self.done:
+            return
+        try:
+            self.run_session()
+        finally:
+            self.done = True
+            _session_done()
+
+    def run_session(self):
+        if not self.login():
+            return
+        self.get('/api/dashboard/', 'dashboard')
+        exams = self.get('/api/exams/', 'exam list')
+        exam_id = EXAM_ID or self.find_exam(exams)
+        if not exam_id:
+            return
+
+        attempt = self.start_exam(exam_id)
+        if not attempt:
+            return
+        attempt_id = attempt['attempt_id']
+
+        questions = self.get(
+            f'/api/exam/timer/questions/{attempt_id}/', '/api/exam/timer/questions/[attempt_id]/'
+        )
+        if not questions:
+            return
+        self.answer_questions(attempt_id, questions['questions'])
+
+        self.post(
+            f'/api/exam/timer/submit/{attempt_id}/', '/api/exam/timer/submit/[attempt_id]/',
+            {}, idempotency_key=True
+        )
+        self.get(f'/api/results/{attempt_id}/', '/api/results/[attempt_id]/')
+
+    def login(self):
+        data = self.post('/api/auth/login/', 'login', {'username': self.username, 'password': PASSWORD})
+        if not data:
+            return False
+        self.headers['Authorization'] = f"Bearer {data['access']}"
+        return True
+
+    def find_exam(self, exams):
+        for exam in exams or []:
+            if exam.get('name') == 'LOADTEST':
+                return exam['id']
+        return None
+
+    def start_exam(self, exam_id):
+        """Start the exam, waiting in the queue while the server says 202"""
+        key = str(uuid.uuid4())
+        for _ in range(MAX_START_ATTEMPTS):
+            with self.client.post(
+                f'/api/exam/timer/start/{exam_id}/', json={},
+                headers={**self.headers, 'Idempotency-Key': key},
+                name='/api/exam/timer/start/[exam_id]/', catch_response=True
+            ) as response:
+                if response.status_code in (200, 201):
+                    return response.json()
+                if response.status_code != 202:
+                    response.failure(f'Unexpected status: {response.status_code}')
+                    return None
+                # Queued in the waiting room: not a failure, poll again
+                response.success()
+                retry_after = response.json().get('retry_after', 2)
+            gevent.sleep(retry_after)
+        return None
+
+    def answer_questions(self, attempt_id, questions):
+        last_poll = time.monotonic()
+        for question in self.rng.sample(questions, min(ANSWERS, len(questions))):
+            gevent.sleep(self.rng.uniform(THINK_MIN, THINK_MAX))
+            self.post('/api/exam/timer/submit-answer/', '/api/exam/timer/submit-answer/', {
+                'attempt_id': attempt_id,
+                'question_id': question['id'],
+                'selected_option': self.rng.choice('ABCD'),
+            })
+            if time.monotonic() - last_poll >= TIMER_POLL_SECONDS:
+                self.get(f'/api/exam/timer/remaining/{attempt_id}/', '/api/exam/timer/remaining/[attempt_id]/')
+                last_poll = time.monotonic()
+
+    def get(self, path, name):
+        with self.client.get(path, headers=self.headers, name=name, catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f'Unexpected status: {response.status_code}')
+                return None
+            return response.json()
+
+    def post(self, path, name, payload, idempotency_key=False):
+        headers = self.headers
+        if idempotency_key:
+            headers = {**headers, 'Idempotency-Key': str(uuid.uuid4())}
+        with self.client.post(path, json=payload, headers=headers, name=name, catch_response=True) as response:
+            if response.status_code not in (200, 201):
+                response.failure(f'Unexpected status: {response.status_code}')
+                return None
+            return response.json()
+
+
+class CohortArrival(LoadTestShape):
+    """Spawn the cohort as a burst or a ramp and stop once everyone submitted"""
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if finished_sessions >= COHORT_SIZE or run_time > MAX_SECONDS:
+            return None
+        if ARRIVAL == 'ramp':
+            return COHORT_SIZE, max(COHORT_SIZE / max(RAMP_SECONDS, 1), 0.1)
+        return COHORT_SIZE, COHORT_SIZE
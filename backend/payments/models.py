@@ -55,6 +55,8 @@ class Payment(models.Model):
         indexes = [
             models.Index(fields=['user', 'status']),
             models.Index(fields=['provider_payment_id']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['status', 'created_at']),
         ]
     
     def __str__(self):
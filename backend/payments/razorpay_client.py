@@ -12,14 +12,23 @@ class RazorpayClient:
     """Wrapper for Razorpay API client"""
     
     def __init__(self):
-        """Initialize Razorpay client with API credentials"""
-        self.client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-        self.client.set_app_details({
-            "title": "DCET Platform",
-            "version": "1.0.0"
-        })
+        # Created on first use: razorpay.Client opens a requests session,
+        # which shouldn't be made in the gunicorn master and shared by workers
+        self._client = None
+    
+    @property
+    def client(self):
+        """Razorpay API client with the configured credentials"""
+        if self._client is None:
+            client = razorpay.Client(
+                auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+            )
+            client.set_app_details({
+                "title": "DCET Platform",
+                "version": "1.0.0"
+            })
+            self._client = client
+        return self._client
     
     def create_order(self, amount_in_paisa, currency='INR', receipt=None, notes=None):
         """
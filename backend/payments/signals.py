@@ -0,0 +1,21 @@
+"""
+Bump the plans cache version when a plan is saved or deleted, once the
+transaction commits (see exams/signals.py).
+
+Connected in PaymentsConfig.ready().
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from utils.cache import bump_cache_version
+
+
+def _plans_changed(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version('plans'))
+
+
+def connect_plan_invalidation():
+    from .models import Plan
+
+    post_save.connect(_plans_changed, sender=Plan, dispatch_uid='plans_version:save')
+    post_delete.connect(_plans_changed, sender=Plan, dispatch_uid='plans_version:delete')
@@ -2,7 +2,7 @@
 Payment API views
 """
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
@@ -24,11 +24,16 @@ from .serializers import (
 from .razorpay_client import razorpay_client
 from .webhook_handler import WebhookHandler
 from users.models import User
+from core.throttling import PaymentRateThrottle
+from core.conditional import conditional_response, make_etag
+from core.pagination import paginate
+from utils.cache import get_cache_version
 
 logger = logging.getLogger(__name__)
 
 
 @api_view(['GET'])
+@conditional_response(etag_func=lambda request: make_etag('plans', get_cache_version('plans')))
 def list_plans(request):
     """
     List all active subscription plans
@@ -45,6 +50,7 @@ def list_plans(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([PaymentRateThrottle])
 def create_order(request):
     """
     Create a Razorpay order for a plan
@@ -124,6 +130,7 @@ def create_order(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([PaymentRateThrottle])
 def verify_payment(request):
     """
     Verify payment and activate subscription
@@ -222,13 +229,17 @@ def payment_history(request):
     Get user's payment history
     
     GET /api/payments/history/
+    Query params:
+    - cursor: From the previous page's next/previous link
+    - page_size: Number of records (default: 20, max: 100)
     """
-    payments = Payment.objects.filter(user=request.user).order_by('-created_at')
+    payments, links = paginate(request, Payment.objects.filter(user=request.user).select_related('user'))
     serializer = PaymentSerializer(payments, many=True)
     
     return Response({
         'success': True,
-        'payments': serializer.data
+        'payments': serializer.data,
+        **links,
     })
 
 
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("exams", "0008_announcement"),
+        ("results", "0003_remove_attemptanswer_is_correct_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attempt",
+            index=models.Index(
+                fields=["user", "started_at"], name="attempts_user_id_2755af_idx"
+            ),
+        ),
+    ]
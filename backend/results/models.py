@@ -1,10 +1,64 @@
 from django.db import models
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from exams.models import Exam, Question
 
 # Create your models here.
 
 
+class AttemptQuerySet(models.QuerySet):
+    """Read helpers for attempt listings"""
+    
+    def with_answer_counts(self):
+        """
+        Annotate answer statistics so serializers don't query per attempt.
+        
+        Adds _answers_count, _answered_count, _correct_count and
+        _total_questions (questions in the attempt's exam).
+        """
+        exam_questions = (
+            Question.objects.filter(section__exam=OuterRef('exam'))
+            .order_by()
+            .values('section__exam')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return self.annotate(
+            _answers_count=Count('answers'),
+            _answered_count=Count('answers', filter=Q(answers__selected_option__isnull=False)),
+            _correct_count=Count(
+                'answers', filter=Q(answers__selected_option=F('answers__question__correct_option'))
+            ),
+            _total_questions=Coalesce(Subquery(exam_questions), 0),
+        )
+    
+    def lock_user(self, user):
+        """
+        Serialise attempt changes for user until the transaction ends.
+        
+        Takes SELECT ... FOR UPDATE on the user's row, so concurrent starts
+        by the same user (double taps, retries) run one after another and
+        each sees the attempts created by the previous one. Must be called
+        inside transaction.atomic().
+        
+        Returns:
+            QuerySet of the user's attempts
+        """
+        from django.contrib.auth import get_user_model
+        
+        get_user_model().objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True).first()
+        return self.filter(user=user)
+    
+    def create_next(self, user, exam, **fields):
+        """
+        Create the user's next attempt at exam with a race-free attempt_number.
+        Must be called inside transaction.atomic().
+        """
+        max_attempt = self.lock_user(user).filter(exam=exam).aggregate(Max('attempt_number'))['attempt_number__max']
+        return self.create(user=user, exam=exam, attempt_number=(max_attempt or 0) + 1, **fields)
+
+
 class Attempt(models.Model):
     """Track when a user starts/completes an exam"""
     
@@ -25,6 +79,8 @@ class Attempt(models.Model):
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='in_progress', db_index=True)
     randomized_order = models.JSONField(default=list, blank=True, help_text="Array of question IDs in randomized order")
     
+    objects = AttemptQuerySet.as_manager()
+    
     class Meta:
         db_table = 'attempts'
         ordering = ['-started_at']
@@ -33,6 +89,7 @@ class Attempt(models.Model):
             models.Index(fields=['user', 'exam']),
             models.Index(fields=['status']),
             models.Index(fields=['user', 'exam', 'attempt_number']),
+            models.Index(fields=['user', 'started_at']),
         ]
     
     def __str__(self):
@@ -0,0 +1,115 @@
+"""
+Scoring and results payloads, kept free of database access so the same code
+serves the views and the micro-benchmarks (manage.py run_benchmarks).
+"""
+from collections import defaultdict
+
+
+def score_answers(answers):
+    """
+    Score a list of AttemptAnswers (with question loaded).
+
+    Returns:
+        tuple: (score, correct_count)
+    """
+    score = 0
+    correct_count = 0
+    for answer in answers:
+        if answer.is_correct:
+            score += answer.question.marks
+            correct_count += 1
+    return score, correct_count
+
+
+def _time_spent(attempt):
+    if not (attempt.finished_at and attempt.started_at):
+        return None
+    time_diff = attempt.finished_at - attempt.started_at
+    hours = time_diff.seconds // 3600
+    minutes = (time_diff.seconds % 3600) // 60
+    return f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+
+
+def build_results_payload(attempt, exam, answers, sections, username):
+    """
+    Detailed results of a finished attempt.
+
+    Args:
+        answers: the attempt's AttemptAnswers with question and
+            question.section loaded, in section / question number order
+        sections: the exam's Sections with questions prefetched
+        username: shown as 'user'
+    """
+    total_score, correct_answers = score_answers(answers)
+    total_marks = exam.total_marks
+    percentage = (total_score / total_marks * 100) if total_marks > 0 else 0
+
+    answers_by_section = defaultdict(list)
+    for answer in answers:
+        answers_by_section[answer.question.section_id].append(answer)
+
+    # Section-wise performance
+    section_performance = []
+    for section in sections:
+        section_questions = section.questions.all()
+        section_answers = answers_by_section.get(section.id, [])
+
+        section_score, _ = score_answers(section_answers)
+        section_total = sum(q.marks for q in section_questions)
+        section_accuracy = (section_score / section_total * 100) if section_total > 0 else 0
+
+        section_performance.append({
+            'section_name': section.name,
+            'score': section_score,
+            'total_marks': section_total,
+            'accuracy': round(section_accuracy, 1),
+            'answered': sum(1 for ans in section_answers if ans.selected_option is not None),
+            'total_questions': len(section_questions),
+        })
+
+    # Question-by-question review
+    questions_review = []
+    for answer in answers:
+        question = answer.question
+        questions_review.append({
+            'question_id': question.id,
+            'question_number': question.question_number,
+            'section_name': question.section.name,
+            'question_text': question.question_text,
+            'option_a': question.option_a,
+            'option_b': question.option_b,
+            'option_c': question.option_c,
+            'option_d': question.option_d,
+            'user_answer': answer.selected_option,
+            'correct_answer': question.correct_option,
+            'is_correct': answer.is_correct,
+            'marks': question.marks,
+        })
+
+    # Performance insights
+    strengths = [s['section_name'] for s in section_performance if s['accuracy'] >= 80]
+    improvements = [s['section_name'] for s in section_performance if s['accuracy'] < 60]
+
+    return {
+        'attempt_id': attempt.id,
+        'exam_name': f"{exam.name} {exam.year}",
+        'user': username,
+        'started_at': attempt.started_at.isoformat(),
+        'finished_at': attempt.finished_at.isoformat() if attempt.finished_at else None,
+        'time_spent': _time_spent(attempt),
+        'status': attempt.status,
+        'total_score': total_score,
+        'total_marks': total_marks,
+        'percentage': round(percentage, 2),
+        'correct_answers': correct_answers,
+        'total_questions': len(answers),
+        'section_performance': section_performance,
+        'questions': questions_review,
+        'insights': {
+            'strengths': strengths,
+            'improvements': improvements,
+            'overall_performance': 'Excellent' if percentage >= 80 else 'Good' if percentage >= 60 else 'Needs Improvement',
+        },
+        # Video solution (only for completed exams)
+        'solution_video_url': exam.solution_video_url if exam.solution_video_url else None,
+    }
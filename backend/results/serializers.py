@@ -1,9 +1,34 @@
 from rest_framework import serializers
+from django.db.models import F, Q
 from .models import Attempt, AttemptAnswer
 from exams.models import Question, Exam
 from users.models import User
 
 
+def _annotated(obj, name, fallback):
+    """
+    Use a value from Attempt.objects.with_answer_counts() if present,
+    otherwise compute it (one query)
+    """
+    value = getattr(obj, name, None)
+    return fallback() if value is None else value
+
+
+def _total_questions(obj):
+    return _annotated(obj, '_total_questions', lambda: Question.objects.filter(section__exam_id=obj.exam_id).count())
+
+
+def _answered_count(obj):
+    return _annotated(obj, '_answered_count', lambda: obj.answers.filter(selected_option__isnull=False).count())
+
+
+def _correct_count(obj):
+    return _annotated(
+        obj, '_correct_count',
+        lambda: obj.answers.filter(selected_option=F('question__correct_option')).count()
+    )
+
+
 class AttemptAnswerSerializer(serializers.ModelSerializer):
     """Serializer for individual question answers"""
     
@@ -68,7 +93,7 @@ class AttemptSerializer(serializers.ModelSerializer):
         return f"{obj.exam.name} {obj.exam.year}"
     
     def get_answers_count(self, obj):
-        return obj.answers.count()
+        return _annotated(obj, '_answers_count', lambda: obj.answers.count())
 
 
 class AttemptDetailSerializer(serializers.ModelSerializer):
@@ -95,15 +120,14 @@ class AttemptDetailSerializer(serializers.ModelSerializer):
         return f"{obj.exam.name} {obj.exam.year}"
     
     def get_total_questions(self, obj):
-        return Question.objects.filter(section__exam=obj.exam).count()
+        return _total_questions(obj)
     
     def get_answered_questions(self, obj):
-        return obj.answers.filter(selected_option__isnull=False).count()
+        return _answered_count(obj)
     
     def get_correct_answers(self, obj):
         # Count answers where selected_option matches correct_option
-        from django.db.models import F
-        return obj.answers.filter(selected_option=F('question__correct_option')).count()
+        return _correct_count(obj)
 
 
 class AttemptStartSerializer(serializers.Serializer):
@@ -162,20 +186,22 @@ class ExamResultSerializer(serializers.ModelSerializer):
         return f"{obj.exam.name} {obj.exam.year}"
     
     def get_total_questions(self, obj):
-        return Question.objects.filter(section__exam=obj.exam).count()
+        return _total_questions(obj)
     
     def get_correct_answers(self, obj):
-        from django.db.models import F
-        return obj.answers.filter(selected_option=F('question__correct_option')).count()
+        return _correct_count(obj)
     
     def get_wrong_answers(self, obj):
-        from django.db.models import F, Q
+        if hasattr(obj, '_answered_count') and hasattr(obj, '_correct_count'):
+            return obj._answered_count - obj._correct_count
         return obj.answers.filter(
             ~Q(selected_option=F('question__correct_option')),
             selected_option__isnull=False
         ).count()
     
     def get_unanswered(self, obj):
+        if hasattr(obj, '_answers_count') and hasattr(obj, '_answered_count'):
+            return obj._answers_count - obj._answered_count
         return obj.answers.filter(selected_option__isnull=True).count()
     
     def get_percentage(self, obj):
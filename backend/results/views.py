@@ -3,10 +3,15 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from core.idempotency import idempotent
+from core.pagination import AttemptKeysetPagination
 
 from .models import Attempt, AttemptAnswer
 from exams.models import Exam, Question
+from api.admission import admission_required
 from .serializers import (
     AttemptSerializer, AttemptDetailSerializer,
     AttemptStartSerializer, AttemptSubmitSerializer,
@@ -20,14 +25,21 @@ class AttemptViewSet(viewsets.ModelViewSet):
     
     serializer_class = AttemptSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AttemptKeysetPagination
     
     def get_queryset(self):
-        """Return attempts for current user with optimized queries"""
-        return Attempt.objects.filter(user=self.request.user).select_related(
+        """
+        Return attempts for current user with optimized queries
+        
+        Answer counts come from annotations; per-answer rows are only
+        prefetched for actions that serialise them.
+        """
+        queryset = Attempt.objects.filter(user=self.request.user).select_related(
             'user', 'exam'
-        ).prefetch_related(
-            'answers__question__section'
-        )
+        ).with_answer_counts()
+        if self.action in ('retrieve', 'in_progress'):
+            queryset = queryset.prefetch_related('answers__question__section')
+        return queryset
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -39,7 +51,10 @@ class AttemptViewSet(viewsets.ModelViewSet):
             return AttemptSubmitSerializer
         return AttemptSerializer
     
-    @action(detail=False, methods=['post'])
+    # ExamStartRateThrottle is applied by @admission_required once admitted
+    @action(detail=False, methods=['post'], throttle_classes=[])
+    @admission_required
+    @idempotent('attempt_start')
     def start_exam(self, request):
         """
         Start a new exam attempt
@@ -51,33 +66,36 @@ class AttemptViewSet(viewsets.ModelViewSet):
             exam_id = serializer.validated_data['exam_id']
             exam = Exam.objects.get(id=exam_id)
             
-            # Check if user has an ongoing attempt
-            ongoing_attempt = Attempt.objects.filter(
-                user=request.user,
-                exam=exam,
-                status='in_progress'
-            ).first()
-            
-            if ongoing_attempt:
-                return Response({
-                    'message': 'You have an ongoing attempt for this exam',
-                    'attempt': AttemptDetailSerializer(ongoing_attempt).data
-                }, status=status.HTTP_200_OK)
-            
-            # Create new attempt
-            attempt = Attempt.objects.create(
-                user=request.user,
-                exam=exam,
-                status='in_progress'
-            )
-            
-            # Create empty answers for all questions (optimized bulk create)
-            questions = Question.objects.filter(section__exam=exam).select_related('section')
-            answers_to_create = [
-                AttemptAnswer(attempt=attempt, question=question)
-                for question in questions
-            ]
-            AttemptAnswer.objects.bulk_create(answers_to_create)
+            with transaction.atomic():
+                # Lock the user's attempts so concurrent starts can't race
+                user_attempts = Attempt.objects.lock_user(request.user)
+                
+                # Check if user has an ongoing attempt
+                ongoing_attempt = user_attempts.filter(
+                    exam=exam,
+                    status='in_progress'
+                ).first()
+                
+                if ongoing_attempt:
+                    return Response({
+                        'message': 'You have an ongoing attempt for this exam',
+                        'attempt': AttemptDetailSerializer(ongoing_attempt).data
+                    }, status=status.HTTP_200_OK)
+                
+                # Create new attempt with the next attempt number
+                attempt = Attempt.objects.create_next(
+                    request.user,
+                    exam,
+                    status='in_progress'
+                )
+                
+                # Create empty answers for all questions (optimized bulk create)
+                questions = Question.objects.filter(section__exam=exam).select_related('section')
+                answers_to_create = [
+                    AttemptAnswer(attempt=attempt, question=question)
+                    for question in questions
+                ]
+                AttemptAnswer.objects.bulk_create(answers_to_create)
             
             return Response({
                 'message': 'Exam started successfully',
@@ -87,6 +105,7 @@ class AttemptViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
+    @idempotent('attempt_answer')
     def submit_answer(self, request, pk=None):
         """
         Submit answer for a question
@@ -134,6 +153,7 @@ class AttemptViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_404_NOT_FOUND)
     
     @action(detail=True, methods=['post'])
+    @idempotent('attempt_submit')
     def submit_exam(self, request, pk=None):
         """
         Submit the entire exam
@@ -146,22 +166,26 @@ class AttemptViewSet(viewsets.ModelViewSet):
                 'error': 'This attempt does not belong to you'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        if attempt.status != 'in_progress':
-            return Response({
-                'error': 'This attempt is already completed'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Calculate score by comparing selected_option with correct_option
-        correct_answers = attempt.answers.filter(
-            selected_option=models.F('question__correct_option')
-        ).select_related('question')
-        total_marks = sum(answer.question.marks for answer in correct_answers)
-        
-        # Update attempt
-        attempt.finished_at = timezone.now()
-        attempt.score = total_marks
-        attempt.status = 'submitted'
-        attempt.save()
+        with transaction.atomic():
+            # Lock the attempt so a concurrent submit sees it completed
+            attempt = Attempt.objects.select_for_update().select_related('exam').get(pk=attempt.pk)
+            
+            if attempt.status != 'in_progress':
+                return Response({
+                    'error': 'This attempt is already completed'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Calculate score by comparing selected_option with correct_option
+            correct_answers = attempt.answers.filter(
+                selected_option=F('question__correct_option')
+            ).select_related('question')
+            total_marks = sum(answer.question.marks for answer in correct_answers)
+            
+            # Update attempt
+            attempt.finished_at = timezone.now()
+            attempt.score = total_marks
+            attempt.status = 'submitted'
+            attempt.save()
         
         return Response({
             'message': 'Exam submitted successfully',
@@ -174,9 +198,9 @@ class AttemptViewSet(viewsets.ModelViewSet):
         Get all attempts for current user
         GET /api/attempts/my_attempts/
         """
-        attempts = self.get_queryset()
+        attempts = self.paginate_queryset(self.get_queryset())
         serializer = self.get_serializer(attempts, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def in_progress(self, request):
@@ -194,9 +218,9 @@ class AttemptViewSet(viewsets.ModelViewSet):
         Get completed attempts for current user
         GET /api/attempts/completed/
         """
-        attempts = self.get_queryset().filter(status__in=['submitted', 'timeout'])
+        attempts = self.paginate_queryset(self.get_queryset().filter(status__in=['submitted', 'timeout']))
         serializer = self.get_serializer(attempts, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def result(self, request, pk=None):
@@ -0,0 +1,181 @@
+"""
+Buffered user activity logging.
+
+Request handlers call log_activity(), which pushes a small JSON event onto a
+Redis list instead of inserting into user_activity inside the request.
+The flush_user_activity management command drains the list and writes the
+events to MySQL with bulk_create in large batches.
+
+If Redis is unavailable the event is written synchronously, so activity is
+never silently dropped on the request path.
+"""
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_QUEUE_KEY = 'activity:events'
+ACTIVITY_FLUSH_LOCK_KEY = 'activity:flush_lock'
+ACTIVITY_FLUSH_LOCK_SECONDS = 60
+
+# KEYS[1] = lock key, ARGV[1] = owner token
+# ARGV[2] = seconds to extend the lock by, or '0' to release it
+# Returns 1 if the lock was still ours
+FLUSH_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '0' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+
+def _client_ip(request):
+    """
+    The client address nginx saw (X-Real-IP, which it overwrites), else the
+    socket peer. X-Forwarded-For starts with whatever the client sent.
+    """
+    return request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR')
+
+
+def build_activity_event(user, activity, request=None):
+    """
+    Build a serialisable activity event.
+
+    Args:
+        user: User instance the activity belongs to
+        activity (str): Human readable activity label
+        request: Optional request to take IP and user agent from
+
+    Returns:
+        dict: Event ready to be queued
+    """
+    return {
+        'user_id': user.id,
+        'activity': activity[:255],
+        'ip_address': _client_ip(request) if request is not None else None,
+        'user_agent': request.META.get('HTTP_USER_AGENT') if request is not None else None,
+        'created_at': timezone.now().isoformat(),
+    }
+
+
+def log_activity(user, activity, request=None):
+    """
+    Queue a user activity event for asynchronous insertion.
+
+    Falls back to a direct INSERT when Redis cannot be reached.
+    """
+    event = build_activity_event(user, activity, request)
+
+    try:
+        get_redis_connection("default").rpush(ACTIVITY_QUEUE_KEY, json.dumps(event))
+    except Exception as e:
+        logger.warning(f"Activity queue unavailable, writing synchronously: {str(e)}")
+        from .models import UserActivity
+        UserActivity.objects.create(
+            user=user,
+            activity=event['activity'],
+            ip_address=event['ip_address'],
+            user_agent=event['user_agent'],
+        )
+
+
+def _events_to_rows(raw_events):
+    """Decode queued events into unsaved UserActivity rows, skipping bad data."""
+    from .models import User, UserActivity
+
+    events = []
+    for raw in raw_events:
+        try:
+            events.append(json.loads(raw))
+        except (TypeError, ValueError):
+            logger.error(f"Dropping malformed activity event: {raw!r}")
+
+    # Users may have been deleted between enqueue and flush
+    user_ids = {event.get('user_id') for event in events}
+    existing_ids = set(
+        User.objects.filter(id__in=user_ids).values_list('id', flat=True)
+    )
+
+    rows = []
+    for event in events:
+        if event.get('user_id') not in existing_ids:
+            continue
+        rows.append(UserActivity(
+            user_id=event['user_id'],
+            activity=event.get('activity', ''),
+            ip_address=event.get('ip_address'),
+            user_agent=event.get('user_agent'),
+            created_at=parse_datetime(event.get('created_at') or '') or timezone.now(),
+        ))
+    return rows
+
+
+def flush_activity_events(batch_size=None, max_batches=None):
+    """
+    Drain queued activity events into MySQL.
+
+    Events are read with LRANGE and only trimmed from the queue after the
+    batch has been inserted, so a crash mid-flush re-delivers rather than
+    loses events. A short Redis lock keeps concurrent flushers from
+    inserting the same batch twice; a flusher that finds its lock expired
+    and taken over stops.
+
+    Args:
+        batch_size (int): Events per bulk_create (default: USER_ACTIVITY_BATCH_SIZE)
+        max_batches (int): Stop after this many batches (default: drain queue)
+
+    Returns:
+        int: Number of rows written
+    """
+    from .models import UserActivity
+
+    batch_size = batch_size or settings.USER_ACTIVITY_BATCH_SIZE
+    redis = get_redis_connection("default")
+
+    token = uuid.uuid4().hex
+    if not redis.set(ACTIVITY_FLUSH_LOCK_KEY, token, nx=True, ex=ACTIVITY_FLUSH_LOCK_SECONDS):
+        logger.info("Another activity flusher is running, skipping")
+        return 0
+    lock = redis.register_script(FLUSH_LOCK_SCRIPT)
+
+    written = 0
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            raw_events = redis.lrange(ACTIVITY_QUEUE_KEY, 0, batch_size - 1)
+            if not raw_events:
+                break
+
+            rows = _events_to_rows(raw_events)
+            if rows:
+                UserActivity.objects.bulk_create(rows, batch_size=batch_size)
+
+            redis.ltrim(ACTIVITY_QUEUE_KEY, len(raw_events), -1)
+
+            written += len(rows)
+            batches += 1
+            if not lock(keys=[ACTIVITY_FLUSH_LOCK_KEY], args=[token, ACTIVITY_FLUSH_LOCK_SECONDS]):
+                logger.warning("Activity flush lock expired and was taken by another flusher, stopping")
+                break
+    finally:
+        lock(keys=[ACTIVITY_FLUSH_LOCK_KEY], args=[token, 0])
+
+    if written:
+        logger.info(f"Flushed {written} activity events in {batches} batch(es)")
+    return written
+
+
+def pending_activity_events():
+    """Return the number of events waiting to be flushed."""
+    return get_redis_connection("default").llen(ACTIVITY_QUEUE_KEY)
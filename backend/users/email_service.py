@@ -1,27 +1,28 @@
 """
 Email service for sending OTP verification emails via Brevo
 """
-import random
-from django.core.mail import send_mail
+import secrets
+from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 
 
 def generate_otp():
     """Generate a 6-digit OTP code"""
-    return str(random.randint(100000, 999999))
+    return str(100000 + secrets.randbelow(900000))
 
 
-def send_otp_email(email, otp, purpose='signup'):
+def build_otp_message(email, otp, purpose='signup', connection=None):
     """
-    Send OTP verification email via Brevo
+    Build the OTP verification email without sending it
     
     Args:
         email (str): Recipient email address
         otp (str): 6-digit OTP code
         purpose (str): 'signup' or 'password_reset'
+        connection: Optional open email backend connection to reuse
     
     Returns:
-        bool: True if email sent successfully, False otherwise
+        EmailMultiAlternatives: Message with plain text and HTML bodies
     """
     if purpose == 'signup':
         subject = 'Verify Your Email - Apollo11 DCET Platform'
@@ -100,15 +101,34 @@ def send_otp_email(email, otp, purpose='signup'):
         Preparing you for success in DCET exams
         """
     
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=plain_message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+        connection=connection,
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+
+def send_otp_email(email, otp, purpose='signup'):
+    """
+    Send OTP verification email via Brevo (synchronously)
+    
+    Request handlers should use users.mail_queue.enqueue_otp_email instead;
+    this is what the mail worker and the queue fallback call.
+    
+    Args:
+        email (str): Recipient email address
+        otp (str): 6-digit OTP code
+        purpose (str): 'signup' or 'password_reset'
+    
+    Returns:
+        bool: True if email sent successfully, False otherwise
+    """
     try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        build_otp_message(email, otp, purpose).send(fail_silently=False)
         return True
     except Exception as e:
         print(f"Error sending email to {email}: {str(e)}")
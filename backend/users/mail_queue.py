@@ -0,0 +1,239 @@
+"""
+Redis-backed outbound mail queue.
+
+Request handlers enqueue a small job and return immediately; the
+run_mail_worker management command claims jobs in batches, sends them over
+one reused email backend connection per batch, and retries failures with
+exponential backoff.
+
+Keys:
+- mail:queue       LIST of ready jobs (JSON)
+- mail:processing  ZSET of claimed jobs, scored by lease expiry
+- mail:retry       ZSET of failed jobs, scored by next attempt time
+- mail:dead        LIST of jobs that exhausted their retries, newest
+                   MAIL_DEAD_LETTER_MAX only, kept for
+                   MAIL_DEAD_LETTER_TTL_SECONDS after the last one
+
+A job stays in mail:processing until it is acknowledged, so a worker that
+dies mid-send has its jobs re-queued once the lease expires. Dead jobs are
+kept for inspection only, so secrets (OTP codes) are removed from them.
+"""
+import json
+import logging
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'mail:queue'
+PROCESSING_KEY = 'mail:processing'
+RETRY_KEY = 'mail:retry'
+DEAD_KEY = 'mail:dead'
+
+# Job kind -> payload fields removed before a job is dead-lettered
+SECRET_FIELDS = {
+    'otp': ('otp',),
+}
+
+# Pop up to ARGV[1] jobs and lease them until ARGV[2]
+CLAIM_SCRIPT = """
+local jobs = redis.call('LPOP', KEYS[1], tonumber(ARGV[1]))
+if not jobs then
+    return {}
+end
+for _, job in ipairs(jobs) do
+    redis.call('ZADD', KEYS[2], tonumber(ARGV[2]), job)
+end
+return jobs
+"""
+
+# Move every member of KEYS[1] scored <= ARGV[1] back onto the ready list
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, job in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job)
+    redis.call('RPUSH', KEYS[2], job)
+end
+return #due
+"""
+
+
+class MailQueue:
+    """Enqueue, claim and acknowledge outbound mail jobs."""
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    def enqueue(self, kind, payload):
+        """
+        Add a job to the ready queue.
+
+        Args:
+            kind (str): Job type, e.g. 'otp'
+            payload (dict): Parameters for the job's message builder
+
+        Returns:
+            str: Job ID
+        """
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'payload': payload,
+            'attempts': 0,
+            'enqueued_at': time.time(),
+        }
+        self.redis.rpush(QUEUE_KEY, json.dumps(job))
+        return job['id']
+
+    def claim(self, batch_size, lease_seconds=60):
+        """Lease up to batch_size ready jobs. Returns a list of (raw, job) tuples."""
+        script = self.redis.register_script(CLAIM_SCRIPT)
+        raw_jobs = script(
+            keys=[QUEUE_KEY, PROCESSING_KEY],
+            args=[batch_size, time.time() + lease_seconds],
+        )
+        return [(raw, json.loads(raw)) for raw in raw_jobs]
+
+    def ack(self, raw):
+        """Remove a successfully sent job from the processing set."""
+        self.redis.zrem(PROCESSING_KEY, raw)
+
+    def fail(self, raw, job, error):
+        """
+        Schedule a failed job for retry with exponential backoff, or move it
+        to the dead-letter list once MAIL_QUEUE_MAX_ATTEMPTS is reached.
+        """
+        job['attempts'] += 1
+        job['last_error'] = str(error)[:500]
+
+        pipe = self.redis.pipeline()
+        pipe.zrem(PROCESSING_KEY, raw)
+        if job['attempts'] >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+            for field in SECRET_FIELDS.get(job['kind'], ()):
+                if field in job['payload']:
+                    job['payload'][field] = '[redacted]'
+            pipe.rpush(DEAD_KEY, json.dumps(job))
+            pipe.ltrim(DEAD_KEY, -settings.MAIL_DEAD_LETTER_MAX, -1)
+            pipe.expire(DEAD_KEY, settings.MAIL_DEAD_LETTER_TTL_SECONDS)
+            logger.error(f"Mail job {job['id']} dead after {job['attempts']} attempts: {error}")
+        else:
+            delay = settings.MAIL_QUEUE_BACKOFF_SECONDS * (2 ** (job['attempts'] - 1))
+            delay += random.uniform(0, delay / 2)  # jitter so retries don't stampede Brevo
+            pipe.zadd(RETRY_KEY, {json.dumps(job): time.time() + delay})
+            logger.warning(f"Mail job {job['id']} failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {error}")
+        pipe.execute()
+
+    def promote_due(self, limit=500):
+        """Re-queue retries that are due and jobs whose lease has expired."""
+        script = self.redis.register_script(PROMOTE_SCRIPT)
+        now = time.time()
+        retried = script(keys=[RETRY_KEY, QUEUE_KEY], args=[now, limit])
+        reclaimed = script(keys=[PROCESSING_KEY, QUEUE_KEY], args=[now, limit])
+        if reclaimed:
+            logger.warning(f"Re-queued {reclaimed} mail job(s) with expired leases")
+        return retried + reclaimed
+
+    def stats(self):
+        """Return queue depths for monitoring."""
+        pipe = self.redis.pipeline()
+        pipe.llen(QUEUE_KEY)
+        pipe.zcard(PROCESSING_KEY)
+        pipe.zcard(RETRY_KEY)
+        pipe.llen(DEAD_KEY)
+        ready, processing, retry, dead = pipe.execute()
+        return {'ready': ready, 'processing': processing, 'retry': retry, 'dead': dead}
+
+
+mail_queue = MailQueue()
+
+
+def build_job_message(job, connection):
+    """Turn a queued job into an EmailMessage bound to connection."""
+    from .email_service import build_otp_message
+
+    if job['kind'] == 'otp':
+        payload = job['payload']
+        return build_otp_message(
+            payload['email'], payload['otp'], payload['purpose'], connection=connection
+        )
+    raise ValueError(f"Unknown mail job kind: {job['kind']}")
+
+
+def record_otp_audit(jobs):
+    """Write delivered OTP jobs to the email_otps table when OTP_AUDIT_ENABLED."""
+    if not settings.OTP_AUDIT_ENABLED:
+        return
+    from .models import EmailOTP
+
+    rows = [
+        EmailOTP(email=job['payload']['email'], otp=job['payload']['otp'], purpose=job['payload']['purpose'])
+        for job in jobs if job['kind'] == 'otp'
+    ]
+    if rows:
+        EmailOTP.objects.bulk_create(rows)
+
+
+def send_batch(claimed, queue=None):
+    """
+    Send a batch of claimed jobs over a single backend connection.
+
+    Each message is sent individually so one bad address does not fail the
+    rest of the batch, but the HTTP session to the provider is reused.
+
+    Returns:
+        int: Number of messages sent
+    """
+    queue = queue or mail_queue
+    delivered = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for raw, job in claimed:
+            try:
+                build_job_message(job, connection).send(fail_silently=False)
+                queue.ack(raw)
+                delivered.append(job)
+            except Exception as e:
+                queue.fail(raw, job, e)
+    except Exception as e:
+        # Could not even open the connection: retry everything
+        for raw, job in claimed:
+            queue.fail(raw, job, e)
+    finally:
+        connection.close()
+
+    try:
+        record_otp_audit(delivered)
+    except Exception as e:
+        logger.error(f"Failed to write OTP audit rows: {str(e)}")
+    return len(delivered)
+
+
+def enqueue_otp_email(email, otp, purpose='signup'):
+    """
+    Queue an OTP email for the mail worker.
+
+    Falls back to sending inline if Redis is unavailable, so OTP delivery
+    degrades to the old behaviour rather than failing.
+
+    Returns:
+        bool: True if the email was queued (or sent by the fallback)
+    """
+    try:
+        mail_queue.enqueue('otp', {'email': email, 'otp': otp, 'purpose': purpose})
+        return True
+    except Exception as e:
+        logger.warning(f"Mail queue unavailable, sending OTP inline: {str(e)}")
+        from .email_service import send_otp_email
+        return send_otp_email(email, otp, purpose=purpose)
@@ -0,0 +1,54 @@
+"""
+Django management command to write queued user activity events to MySQL
+Usage:
+    python manage.py flush_user_activity            # drain once
+    python manage.py flush_user_activity --loop     # run as a worker
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.activity import flush_activity_events, pending_activity_events
+
+
+class Command(BaseCommand):
+    help = 'Flushes queued user activity events into the user_activity table with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Events per bulk insert (default: USER_ACTIVITY_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and flush every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to sleep between flushes in --loop mode (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        if not options['loop']:
+            written = flush_activity_events(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Flushed {written} activity events'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Activity flusher started ({pending_activity_events()} events pending)'
+        ))
+        try:
+            while True:
+                flush_activity_events(batch_size=batch_size)
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            # Final drain so a clean shutdown leaves nothing behind
+            written = flush_activity_events(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Stopped. Flushed {written} remaining events'))
@@ -0,0 +1,67 @@
+"""
+Django management command to enforce the user activity retention window
+Usage:
+    python manage.py purge_user_activity              # use USER_ACTIVITY_RETENTION_DAYS
+    python manage.py purge_user_activity --days 30 --dry-run
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import UserActivity
+
+
+class Command(BaseCommand):
+    help = 'Deletes user activity rows older than the retention window, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Keep this many days of activity (default: USER_ACTIVITY_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per statement (default: 5000)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Pause between batches to limit replication lag (default: 0.1s)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] or settings.USER_ACTIVITY_RETENTION_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+        expired = UserActivity.objects.filter(created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} activity rows older than {days} days would be deleted')
+            return
+
+        # Delete by primary key in bounded batches so InnoDB never holds
+        # a long lock over the whole table
+        deleted_total = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted, _ = UserActivity.objects.filter(id__in=ids).delete()
+            deleted_total += deleted
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted_total} activity rows older than {cutoff:%Y-%m-%d}'
+        ))
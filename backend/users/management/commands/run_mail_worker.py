@@ -0,0 +1,90 @@
+"""
+Django management command to deliver queued outbound email
+Usage:
+    python manage.py run_mail_worker
+    python manage.py run_mail_worker --concurrency 8 --batch-size 20
+    python manage.py run_mail_worker --once        # drain and exit (useful in tests)
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.mail_queue import mail_queue, send_batch
+
+
+def _send_batch_in_thread(claimed):
+    try:
+        return send_batch(claimed)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Sends queued emails in batches with bounded concurrency and retry/backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.MAIL_WORKER_CONCURRENCY,
+            help='Batches sent in parallel (default: MAIL_WORKER_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Jobs sent per connection (default: 10)'
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=120,
+            help='Seconds a claimed batch may take before it is re-queued (default: 120)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.5,
+            help='Seconds to sleep when the queue is empty (default: 0.5)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the ready queue is empty'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Mail worker started (concurrency={concurrency}, queue={mail_queue.stats()})"
+        ))
+
+        sent_total = 0
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    mail_queue.promote_due()
+
+                    while len(in_flight) < concurrency:
+                        claimed = mail_queue.claim(options['batch_size'], lease_seconds=options['lease'])
+                        if not claimed:
+                            break
+                        in_flight.add(pool.submit(_send_batch_in_thread, claimed))
+
+                    if not in_flight:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    done, in_flight = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                    sent_total += sum(future.result() for future in done)
+            except KeyboardInterrupt:
+                self.stdout.write('Stopping, waiting for in-flight batches...')
+                sent_total += sum(future.result() for future in in_flight)
+
+        self.stdout.write(self.style.SUCCESS(f'Mail worker stopped. Sent {sent_total} emails'))
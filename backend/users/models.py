@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.hashers import make_password, check_password
 
 # Create your models here.
@@ -164,24 +165,41 @@ class PasswordResetRequest(models.Model):
 
 
 class UserActivity(models.Model):
-    """Log user activities"""
+    """
+    Log user activities (append-only audit trail)
+    
+    Rows are written in batches by users.activity.flush_activity_events and
+    pruned by the purge_user_activity command. created_at uses a default
+    rather than auto_now_add so the flusher keeps the original event time.
+    """
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities', db_index=True)
     activity = models.CharField(max_length=255)
     ip_address = models.CharField(max_length=50, blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'user_activity'
         verbose_name_plural = 'User Activities'
+        indexes = [
+            # Active-user counts and retention purges scan by time
+            models.Index(fields=['created_at', 'user'], name='user_activity_created_idx'),
+            # Per-user history pages (keyset pagination)
+            models.Index(fields=['user', 'created_at'], name='user_activity_user_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.activity}"
 
 
 class EmailOTP(models.Model):
-    """Email OTP verification codes for signup and password reset"""
+    """
+    Audit record of OTP emails sent for signup and password reset
+    
+    Live OTPs are kept in Redis (users.otp_store); rows are only written by
+    the mail worker when OTP_AUDIT_ENABLED is set.
+    """
     
     email = models.EmailField(db_index=True)
     otp = models.CharField(max_length=6)
@@ -227,6 +245,9 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='notification_user_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
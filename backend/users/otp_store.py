@@ -0,0 +1,125 @@
+"""
+Redis-backed OTP store with native expiry.
+
+Each (purpose, email) pair has at most one live OTP, stored as a Redis hash
+that expires after OTP_TTL_SECONDS:
+
+    otp:{purpose}:{email} -> {code: <hmac of otp>, attempts: <int>}
+
+Verification runs in a single Lua script that checks the code, counts a
+wrong guess and (optionally) consumes the OTP atomically, so two concurrent
+requests can never both redeem the same code. After OTP_MAX_ATTEMPTS wrong
+guesses the OTP is deleted and a new one must be requested; correct codes
+checked without consuming (verify_password_reset_otp) are not counted.
+"""
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# Verification results
+OTP_VALID = 'valid'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+OTP_LOCKED = 'locked'
+
+# KEYS[1] = otp key
+# ARGV[1] = code digest, ARGV[2] = max attempts, ARGV[3] = '1' to consume on success
+VERIFY_SCRIPT = """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return -1
+end
+if code == ARGV[1] then
+    if ARGV[3] == '1' then
+        redis.call('DEL', KEYS[1])
+    end
+    return 1
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+return 0
+"""
+
+_RESULTS = {1: OTP_VALID, 0: OTP_INVALID, -1: OTP_EXPIRED, -2: OTP_LOCKED}
+
+
+class OTPStore:
+    """Issue and verify one-time passwords in Redis."""
+
+    def __init__(self, redis=None):
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection("default")
+        return self._redis
+
+    @staticmethod
+    def _get_key(email: str, purpose: str) -> str:
+        return f"otp:{purpose}:{email.strip().lower()}"
+
+    @staticmethod
+    def _digest(otp: str) -> str:
+        """Keep only a keyed hash of the code in Redis."""
+        return hmac.new(
+            settings.SECRET_KEY.encode(), str(otp).strip().encode(), hashlib.sha256
+        ).hexdigest()
+
+    def issue(self, email: str, otp: str, purpose: str) -> bool:
+        """
+        Store a new OTP, replacing any previous one for this email and purpose.
+
+        Args:
+            email: Recipient email address
+            otp: Code that was generated for the user
+            purpose: 'signup' or 'password_reset'
+
+        Returns:
+            bool: False if Redis is unavailable; the code can't be verified
+            later, so it must not be sent
+        """
+        key = self._get_key(email, purpose)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(key)
+            pipe.hset(key, mapping={'code': self._digest(otp), 'attempts': 0})
+            pipe.expire(key, settings.OTP_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to store OTP for {email} ({purpose}): {str(e)}")
+            return False
+        return True
+
+    def verify(self, email: str, otp: str, purpose: str, consume: bool = True) -> str:
+        """
+        Check an OTP and count it if wrong.
+
+        Args:
+            email: Email the OTP was issued for
+            otp: Code supplied by the user
+            purpose: 'signup' or 'password_reset'
+            consume: Delete the OTP on success so it cannot be reused
+
+        Returns:
+            One of OTP_VALID, OTP_INVALID, OTP_EXPIRED, OTP_LOCKED
+        """
+        script = self.redis.register_script(VERIFY_SCRIPT)
+        result = script(
+            keys=[self._get_key(email, purpose)],
+            args=[self._digest(otp), settings.OTP_MAX_ATTEMPTS, '1' if consume else '0'],
+        )
+        if result == -2:
+            logger.warning(f"OTP for {email} ({purpose}) locked after too many attempts")
+        return _RESULTS[int(result)]
+
+
+otp_store = OTPStore()
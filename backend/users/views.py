@@ -1,13 +1,17 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from django.contrib.auth.hashers import check_password
 from django.utils import timezone
 
+from core.pagination import KeysetPagination
+from core.throttling import LoginRateThrottle, OTPRateThrottle
+
 from .models import User, Notification, UserActivity, Query
 from .tokens import RefreshToken
+from .activity import log_activity
 from .serializers import (
     SignupSerializer, LoginSerializer, UserSerializer,
     NotificationSerializer, UserActivitySerializer, QuerySerializer
@@ -31,13 +35,8 @@ class AuthViewSet(viewsets.ViewSet):
         if serializer.is_valid():
             user = serializer.save()
             
-            # Log activity
-            UserActivity.objects.create(
-                user=user,
-                activity='User registered',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT')
-            )
+            # Log activity (queued, flushed in batches)
+            log_activity(user, 'User registered', request)
             
             # Generate JWT tokens
             refresh = RefreshToken.for_user(user)
@@ -51,7 +50,7 @@ class AuthViewSet(viewsets.ViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LoginRateThrottle])
     def login(self, request):
         """
         User login endpoint
@@ -92,13 +91,8 @@ class AuthViewSet(viewsets.ViewSet):
         # Step 6: Generate JWT tokens
         refresh = RefreshToken.for_user(user)
         
-        # Log activity
-        UserActivity.objects.create(
-            user=user,
-            activity='User logged in',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
-        )
+        # Log activity (queued, flushed in batches)
+        log_activity(user, 'User logged in', request)
         
         # Step 7: Return response
         return Response({
@@ -127,6 +121,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Return notifications for current user only"""
@@ -135,9 +130,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get unread notifications"""
-        notifications = self.get_queryset().filter(is_read=False)
+        notifications = self.paginate_queryset(self.get_queryset().filter(is_read=False))
         serializer = self.get_serializer(notifications, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
@@ -159,22 +154,53 @@ class UserActivityViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = UserActivitySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        """Return activity logs for current user only"""
-        return UserActivity.objects.filter(user=self.request.user)
+        """Return activity logs for current user only (ordered by the paginator)"""
+        return UserActivity.objects.filter(user=self.request.user).select_related('user')
 
 
 # OTP Verification Views
+def _otp_error_response(result):
+    """Map a failed OTP verification result to an error response"""
+    from .otp_store import OTP_EXPIRED, OTP_LOCKED
+    
+    if result == OTP_EXPIRED:
+        return Response(
+            {'error': 'OTP has expired. Please request a new one.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if result == OTP_LOCKED:
+        return Response(
+            {'error': 'Too many incorrect attempts. Please request a new OTP.'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    return Response(
+        {'error': 'Invalid OTP'},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _otp_unavailable_response():
+    """OTPs can't be stored (Redis is down), so none is sent"""
+    return Response(
+        {'error': 'Verification codes are temporarily unavailable. Please try again in a few minutes.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
 @api_view(['POST'])
+@throttle_classes([OTPRateThrottle])
 def send_signup_otp(request):
     """
     Send OTP for email verification during signup
     POST /api/users/send-signup-otp/
     Body: {email}
     """
-    from .models import EmailOTP
-    from .email_service import generate_otp, send_otp_email
+    from .email_service import generate_otp
+    from .mail_queue import enqueue_otp_email
+    from .otp_store import otp_store
     from .disposable_emails import is_allowed_email
     
     email = request.data.get('email')
@@ -202,15 +228,12 @@ def send_signup_otp(request):
     # Generate OTP
     otp = generate_otp()
     
-    # Save to database
-    EmailOTP.objects.create(
-        email=email,
-        otp=otp,
-        purpose='signup'
-    )
+    # Store in Redis (expires automatically after OTP_TTL_SECONDS)
+    if not otp_store.issue(email, otp, purpose='signup'):
+        return _otp_unavailable_response()
     
-    # Send email
-    if send_otp_email(email, otp, purpose='signup'):
+    # Queue email (delivered by the mail worker)
+    if enqueue_otp_email(email, otp, purpose='signup'):
         return Response({
             'message': 'OTP sent successfully',
             'email': email
@@ -229,7 +252,7 @@ def verify_signup_otp(request):
     POST /api/users/verify-signup-otp/
     Body: {email, otp}
     """
-    from .models import EmailOTP
+    from .otp_store import otp_store, OTP_VALID
     
     email = request.data.get('email')
     otp = request.data.get('otp')
@@ -240,43 +263,29 @@ def verify_signup_otp(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        # Get the latest unverified OTP for this email
-        otp_obj = EmailOTP.objects.filter(
-            email=email,
-            otp=otp,
-            purpose='signup',
-            is_verified=False
-        ).latest('created_at')
-        
-        if otp_obj.is_valid():
-            otp_obj.is_verified = True
-            otp_obj.save()
-            return Response({
-                'message': 'Email verified successfully',
-                'email': email
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response(
-                {'error': 'OTP has expired. Please request a new one.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    except EmailOTP.DoesNotExist:
-        return Response(
-            {'error': 'Invalid OTP'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    # Atomically check and consume the OTP
+    result = otp_store.verify(email, otp, purpose='signup', consume=True)
+    
+    if result != OTP_VALID:
+        return _otp_error_response(result)
+    
+    return Response({
+        'message': 'Email verified successfully',
+        'email': email
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
+@throttle_classes([OTPRateThrottle])
 def send_password_reset_otp(request):
     """
     Send OTP for password reset
     POST /api/users/send-password-reset-otp/
     Body: {email}
     """
-    from .models import EmailOTP
-    from .email_service import generate_otp, send_otp_email
+    from .email_service import generate_otp
+    from .mail_queue import enqueue_otp_email
+    from .otp_store import otp_store
     
     email = request.data.get('email')
     
@@ -287,9 +296,7 @@ def send_password_reset_otp(request):
         )
     
     # Check if user exists
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
+    if not User.objects.filter(email=email).exists():
         # Don't reveal if email exists or not for security
         return Response({
             'message': 'If this email is registered, you will receive a password reset code.',
@@ -299,15 +306,12 @@ def send_password_reset_otp(request):
     # Generate OTP
     otp = generate_otp()
     
-    # Save to database
-    EmailOTP.objects.create(
-        email=email,
-        otp=otp,
-        purpose='password_reset'
-    )
+    # Store in Redis (expires automatically after OTP_TTL_SECONDS)
+    if not otp_store.issue(email, otp, purpose='password_reset'):
+        return _otp_unavailable_response()
     
-    # Send email
-    send_otp_email(email, otp, purpose='password_reset')
+    # Queue email (delivered by the mail worker)
+    enqueue_otp_email(email, otp, purpose='password_reset')
     
     return Response({
         'message': 'If this email is registered, you will receive a password reset code.',
@@ -322,7 +326,7 @@ def verify_password_reset_otp(request):
     POST /api/users/verify-password-reset-otp/
     Body: {email, otp}
     """
-    from .models import EmailOTP
+    from .otp_store import otp_store, OTP_VALID
     
     email = request.data.get('email')
     otp = request.data.get('otp')
@@ -333,31 +337,17 @@ def verify_password_reset_otp(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        # Get the latest unverified OTP for this email
-        otp_obj = EmailOTP.objects.filter(
-            email=email,
-            otp=otp,
-            purpose='password_reset',
-            is_verified=False
-        ).latest('created_at')
-        
-        if otp_obj.is_valid():
-            return Response({
-                'message': 'OTP verified successfully. You can now reset your password.',
-                'email': email,
-                'otp': otp  # Return OTP for use in reset password step
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response(
-                {'error': 'OTP has expired. Please request a new one.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    except EmailOTP.DoesNotExist:
-        return Response(
-            {'error': 'Invalid OTP'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    # Check without consuming - the OTP is redeemed by reset_password
+    result = otp_store.verify(email, otp, purpose='password_reset', consume=False)
+    
+    if result != OTP_VALID:
+        return _otp_error_response(result)
+    
+    return Response({
+        'message': 'OTP verified successfully. You can now reset your password.',
+        'email': email,
+        'otp': otp  # Return OTP for use in reset password step
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -367,7 +357,7 @@ def reset_password(request):
     POST /api/users/reset-password/
     Body: {email, otp, new_password}
     """
-    from .models import EmailOTP
+    from .otp_store import otp_store, OTP_EXPIRED, OTP_VALID
     
     email = request.data.get('email')
     otp = request.data.get('otp')
@@ -386,52 +376,27 @@ def reset_password(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    try:
-        # Verify OTP one more time
-        otp_obj = EmailOTP.objects.filter(
-            email=email,
-            otp=otp,
-            purpose='password_reset',
-            is_verified=False
-        ).latest('created_at')
-        
-        if not otp_obj.is_valid():
-            return Response(
-                {'error': 'OTP has expired. Please request a new one.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Get user and reset password
-        user = User.objects.get(email=email)
-        user.set_password(new_password)
-        user.save()
-        
-        # Mark OTP as verified
-        otp_obj.is_verified = True
-        otp_obj.save()
-        
-        # Log activity
-        UserActivity.objects.create(
-            user=user,
-            activity='Password reset via OTP',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
-        )
-        
-        return Response({
-            'message': 'Password reset successfully. You can now login with your new password.'
-        }, status=status.HTTP_200_OK)
-        
-    except EmailOTP.DoesNotExist:
-        return Response(
-            {'error': 'Invalid OTP'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-    except User.DoesNotExist:
-        return Response(
-            {'error': 'User not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    # Verify and consume the OTP in one atomic step. Check it before looking
+    # up the user so the response doesn't reveal whether email is registered
+    result = otp_store.verify(email, otp, purpose='password_reset', consume=True)
+    
+    if result != OTP_VALID:
+        return _otp_error_response(result)
+    
+    user = User.objects.filter(email=email).first()
+    if user is None:
+        # Account deleted after the OTP was sent
+        return _otp_error_response(OTP_EXPIRED)
+    
+    user.set_password(new_password)
+    user.save()
+    
+    # Log activity (queued, flushed in batches)
+    log_activity(user, 'Password reset via OTP', request)
+    
+    return Response({
+        'message': 'Password reset successfully. You can now login with your new password.'
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
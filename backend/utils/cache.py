@@ -5,8 +5,10 @@ Provides decorators and helper functions for caching API responses
 from functools import wraps
 from django.core.cache import cache
 from django.conf import settings
+from core.local_cache import local_cache
 import hashlib
 import json
+import time
 
 
 def generate_cache_key(prefix, *args, **kwargs):
@@ -67,15 +69,50 @@ def cache_exam_data(exam_id, data, timeout=3600):
     """Cache exam data by exam ID"""
     cache_key = f"apollo11:exam:{exam_id}"
     cache.set(cache_key, data, timeout)
+    # Replaces any earlier value, which workers may hold
+    local_cache.invalidate(cache_key)
 
 
 def get_cached_exam(exam_id):
     """Get cached exam data"""
     cache_key = f"apollo11:exam:{exam_id}"
-    return cache.get(cache_key)
+    return local_cache.get(cache_key)
 
 
 def invalidate_exam_cache(exam_id):
     """Invalidate cache for specific exam"""
     cache_key = f"apollo11:exam:{exam_id}"
-    cache.delete(cache_key)
+    local_cache.delete(cache_key)
+
+
+def _version_key(namespace):
+    return f"apollo11:version:{namespace}"
+
+
+def get_cache_version(namespace):
+    """
+    Get the current version stamp for a cache namespace.
+    
+    Versions start from the current timestamp, so a flushed cache never
+    re-issues a version (and ETag) that clients may still hold. Stamps are
+    kept in each worker's memory until bumped (see core/local_cache.py).
+    """
+    key = _version_key(namespace)
+    version = local_cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    """Invalidate every entry stored under the current version of namespace"""
+    key = _version_key(namespace)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # Version missing (e.g. cache flushed) - start a fresh one
+        cache.add(key, int(time.time()), None)
+        version = cache.get(key)
+    local_cache.invalidate(key)
+    return version
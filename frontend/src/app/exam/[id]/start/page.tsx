@@ -32,6 +32,7 @@ export default function ExamPage() {
         "running" | "timeout" | "completed"
     >("running");
     const [loading, setLoading] = useState(true);
+    const [queuePosition, setQueuePosition] = useState<{ position: number; eta_seconds: number } | null>(null);
 
     // New state for UI
     const [activeSection, setActiveSection] = useState<string>("");
@@ -95,8 +96,10 @@ export default function ExamPage() {
 
                 // Start exam with Redis timer
                 const startResponse = await examTimerService.startExam(
-                    Number(params.id)
+                    Number(params.id),
+                    setQueuePosition
                 );
+                setQueuePosition(null);
 
                 setAttemptId(startResponse.attempt_id);
                 setExamTitle(startResponse.exam_title);
@@ -321,6 +324,12 @@ export default function ExamPage() {
                 <div className="text-center">
                     <div className="h-10 w-10 animate-spin rounded-full border-4 border-blue-600 border-t-transparent mx-auto mb-4"></div>
                     <p className="text-gray-500 font-medium">Loading Exam...</p>
+                    {queuePosition && (
+                        <p className="text-gray-500 text-sm mt-2">
+                            High demand right now. You are #{queuePosition.position} in the queue
+                            (about {queuePosition.eta_seconds}s). Your timer starts when the exam opens.
+                        </p>
+                    )}
                 </div>
             </div>
         );
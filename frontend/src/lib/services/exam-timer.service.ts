@@ -2,10 +2,23 @@ import api from '../api';
 
 export const examTimerService = {
     // Start exam and get initial timer state
-    async startExam(examId: number) {
+    // During start surges the backend queues the request (202) and returns
+    // the queue position; keep retrying until admitted. The timer only
+    // starts once the attempt is created.
+    async startExam(
+        examId: number,
+        onQueued?: (queue: { position: number; eta_seconds: number }) => void
+    ) {
         // Backend expects exam_id in URL, not body
-        const response = await api.post(`/exam/timer/start/${examId}/`);
-        return response.data;
+        while (true) {
+            const response = await api.post(`/exam/timer/start/${examId}/`);
+            if (response.status !== 202) {
+                return response.data;
+            }
+            onQueued?.(response.data);
+            const retryAfter = Number(response.data.retry_after) || 2;
+            await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+        }
     },
 
     // Get questions for the attempt